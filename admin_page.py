@@ -0,0 +1,83 @@
+# admin_page.py
+# Hidden operations dashboard (app.py?admin=<ADVISOR_ADMIN_TOKEN>): stage
+# latency percentiles and histograms, token usage, cache hit rate, errors.
+
+import streamlit as st
+
+from metrics import LATENCY_BUCKETS, METRICS
+from startup import startup_report
+
+STAGE_METRIC = "advisor_stage_duration_seconds"
+
+
+def _ms(seconds):
+    return None if seconds is None else round(seconds * 1000, 1)
+
+
+def render_admin_page():
+    counters, histograms, stats = METRICS.snapshot()
+
+    st.markdown('<h1 class="main-header">📈 Advisor Metrics</h1>', unsafe_allow_html=True)
+
+    # Stage latencies
+    st.markdown('<div class="section-header">⏱️ Stage Latency</div>', unsafe_allow_html=True)
+    stages = sorted(dict(labels)['stage'] for name, labels in histograms if name == STAGE_METRIC)
+    rows = []
+    for stage in stages:
+        count, total, _, _ = histograms[(STAGE_METRIC, (('stage', stage),))]
+        percentiles = METRICS.percentiles(STAGE_METRIC, stage=stage)
+        rows.append({
+            'Stage': stage,
+            'Count': count,
+            'Mean (ms)': _ms(total / count) if count else None,
+            'p50 (ms)': _ms(percentiles[50]),
+            'p95 (ms)': _ms(percentiles[95]),
+            'p99 (ms)': _ms(percentiles[99]),
+        })
+    if rows:
+        st.dataframe(rows, use_container_width=True, hide_index=True)
+        stage = st.selectbox("Histogram", stages)
+        _, _, bucket_counts, _ = histograms[(STAGE_METRIC, (('stage', stage),))]
+        st.bar_chart({f"≤{bound}s": [count] for bound, count in zip(LATENCY_BUCKETS, bucket_counts)})
+    else:
+        st.info("No requests recorded yet")
+
+    # Tokens, cache and fallbacks
+    st.markdown('<div class="section-header">🔢 Usage</div>', unsafe_allow_html=True)
+    prompt_tokens = counters.get(("advisor_gemini_tokens_total", (('kind', 'prompt'),)), 0)
+    response_tokens = counters.get(("advisor_gemini_tokens_total", (('kind', 'response'),)), 0)
+    responses = counters.get(("advisor_gemini_responses_total", ()), 0)
+    cache_stats = stats.get('cache', {})
+    hits = cache_stats.get('memory_hits', 0) + cache_stats.get('disk_hits', 0)
+    lookups = hits + cache_stats.get('misses', 0)
+    fallbacks = sum(value for (name, _), value in counters.items() if name == "advisor_fallback_served_total")
+
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Prompt tokens", f"{prompt_tokens:,}")
+    col2.metric("Response tokens", f"{response_tokens:,}")
+    col3.metric("Tokens / response", f"{(prompt_tokens + response_tokens) / responses:,.0f}" if responses else "N/A")
+    col4.metric("Cache hit rate", f"{hits / lookups:.0%}" if lookups else "N/A")
+
+    col1, col2, col3, col4 = st.columns(4)
+    client_stats = stats.get('gemini_client', {})
+    col1.metric("API requests", client_stats.get('requests', 0))
+    col2.metric("Retries", client_stats.get('retries', 0))
+    col3.metric("Deduplicated", client_stats.get('deduplicated', 0))
+    col4.metric("Fallbacks served", fallbacks)
+
+    # Errors
+    st.markdown('<div class="section-header">⚠️ Errors</div>', unsafe_allow_html=True)
+    errors = [dict(labels, count=value) for (name, labels), value in counters.items() if name == "advisor_errors_total"]
+    if errors:
+        st.dataframe(errors, use_container_width=True, hide_index=True)
+    else:
+        st.success("No errors recorded")
+
+    # Raw exports
+    st.markdown('<div class="section-header">🧾 Exports</div>', unsafe_allow_html=True)
+    st.code(startup_report(), language="text")
+    prometheus_text = METRICS.render_prometheus()
+    st.download_button("📥 Download Prometheus metrics", prometheus_text, file_name="advisor_metrics.prom",
+                       mime="text/plain", use_container_width=True)
+    with st.expander("Prometheus text"):
+        st.code(prometheus_text, language="text")
@@ -0,0 +1,398 @@
+# api.py
+# JSON HTTP API (ASGI, Starlette) for apps and partner integrations, using
+# the same validation, scoring, prompts and cache as the Streamlit page:
+#
+#   python api.py --port 8000 --workers 4
+#
+#   POST /score      profile -> lifestyle score and breakdown
+#   POST /recommend  profile -> score and recommendations (?stream=1 for NDJSON chunks)
+#   POST /batch      {"profiles": [...], "recommend": false} -> per-profile results
+#   POST /meal-plan  profile -> daily meal plan from the bundled food table (?variant=N for another)
+#   GET  /health, GET /metrics
+#
+# Profiles are JSON objects with the lifestyle_form field names (see
+# options.PROFILE_FIELDS). Each worker process has its own Gemini client and
+# cache memory tier; set ADVISOR_BACKEND=sqlite to share the quota and cache.
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from contextlib import asynccontextmanager
+
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse, Response, StreamingResponse
+from starlette.routing import Route
+
+import settings
+import microbatch
+import structured
+from backends import create_backend
+from cache import RecommendationCache, profile_key
+from fallback import fallback_report
+from goal_index import GoalIndex
+from meal_plan import plan_dict, plan_meals
+from metrics import METRICS
+from nutrients import FoodTable
+from profiles import parse_profile
+from routing import model_for, model_tiers
+from prompts import build_prompt, cache_namespace
+from scoring import SCORE_CATEGORIES, calculate_score, encode_profiles, score_batch
+
+METRICS.describe("advisor_api_requests_total", "API requests by endpoint and status code")
+
+# Errors parse_profile raises for records that aren't valid profiles
+INVALID_PROFILE_ERRORS = (ValueError, TypeError, AttributeError)
+
+
+class APIError(Exception):
+    """An error response: HTTP status and message."""
+
+    def __init__(self, status_code, message):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def _json(data, status_code=200):
+    return Response(json.dumps(data, ensure_ascii=False, separators=(",", ":")), status_code,
+                    media_type="application/json")
+
+
+async def _read_json(request):
+    try:
+        return json.loads(await request.body())
+    except ValueError as e:
+        raise APIError(400, f"Request body is not valid JSON: {e}") from None
+
+
+def _profile(record):
+    if not isinstance(record, dict):
+        raise APIError(422, "A profile must be a JSON object")
+    try:
+        return parse_profile(record)
+    except INVALID_PROFILE_ERRORS as e:
+        raise APIError(422, str(e)) from None
+
+
+def _scores(profile):
+    score, score_breakdown = calculate_score(profile)
+    return {'lifestyle_score': score, 'score_breakdown': score_breakdown}
+
+
+def _ndjson(event):
+    return json.dumps(event, ensure_ascii=False, separators=(",", ":")) + "\n"
+
+
+class Advisor:
+    """Per-process state behind the endpoints: Gemini clients, cache, goal index, lookup and food tables.
+
+    clients and batchers map model names (see routing.py) to a client and
+    its micro-batcher; no clients means recommendations are unavailable,
+    no food table means meal plans are.
+    """
+
+    def __init__(self, clients=None, cache=None, goal_index=None, table=None, client_error=None, batchers=None,
+                 foods=None):
+        self.clients = clients or {}
+        self.batchers = batchers or {}
+        self.cache = cache
+        self.goal_index = goal_index
+        self.table = table
+        self.foods = foods
+        self.client_error = client_error
+        self._upgrades = set()
+
+    @classmethod
+    def from_settings(cls):
+        from batch_advisor import create_client
+        from lookup_table import RecommendationTable
+
+        backend = create_backend()
+        cache = RecommendationCache(backend=backend)
+        METRICS.register_stats("cache", cache.stats)
+        table = None
+        if os.path.exists(settings.LOOKUP_TABLE_PATH):
+            try:
+                table = RecommendationTable(settings.LOOKUP_TABLE_PATH)
+            except ValueError as e:
+                METRICS.record_error("recommendation_table", e)
+            if table is not None and table.model_name != cache_namespace():
+                table = None
+        foods = FoodTable.load() if settings.MEAL_PLAN else None
+        try:
+            clients = {model_name: create_client(backend, model_name) for model_name in model_tiers().values()}
+        except Exception as e:
+            # Scoring and meal plans still work without an API key
+            return cls(cache=cache, goal_index=GoalIndex(), table=table, client_error=f"{type(e).__name__}: {e}",
+                       foods=foods)
+        batchers = {}
+        for tier, model_name in model_tiers().items():
+            suffix = "" if tier == 'standard' else f"_{tier}"
+            METRICS.register_stats(f"gemini_client{suffix}", clients[model_name].stats)
+            if microbatch.enabled():
+                batchers[model_name] = microbatch.MicroBatcher(clients[model_name])
+                METRICS.register_stats(f"microbatch{suffix}", batchers[model_name].stats)
+        return cls(clients, cache, GoalIndex(), table, batchers=batchers, foods=foods)
+
+    def cached(self, profile):
+        """Recommendations for the profile from the lookup table or cache, or None."""
+        entry = self.table.lookup(profile) if self.table is not None else None
+        if entry is not None:
+            return entry.recommendations
+        if self.cache is None:
+            return None
+        recommendations = self.cache.get(profile_key(profile, namespace=cache_namespace()))
+        if recommendations is None and self.goal_index is not None:
+            similar_key = self.goal_index.find(profile, namespace=cache_namespace())
+            if similar_key is not None:
+                recommendations = self.cache.get(similar_key)
+        return recommendations
+
+    def remember(self, profile, text):
+        if self.cache is None or not well_formed(text):
+            return
+        cache_key = profile_key(profile, namespace=cache_namespace())
+        self.cache.set(cache_key, text)
+        if self.goal_index is not None:
+            self.goal_index.add(profile, cache_key, namespace=cache_namespace())
+
+    def require_client(self):
+        if not self.clients:
+            raise APIError(503, f"Recommendations are unavailable: {self.client_error}")
+
+    def client_for(self, profile):
+        """The client of the model the profile's report is routed to."""
+        return self.clients[model_for(profile)]
+
+    def prompt(self, profile):
+        return structured.build_structured_prompt(profile) if structured.ENABLED else build_prompt(profile)
+
+    def generate(self, profile):
+        """Coroutine for the model's report, micro-batched when enabled; runs on client_for(profile)'s loop."""
+        batcher = self.batchers.get(model_for(profile))
+        if batcher is not None:
+            return batcher.generate(profile)
+        return self.client_for(profile).generate(self.prompt(profile))
+
+    async def recommend(self, profile, score_breakdown):
+        """(text, source) for a profile: cached, from the model, or the rule-based fallback.
+
+        When the model misses the fallback budget, the fallback is returned and
+        the model's report is cached once it arrives, for the next request.
+        """
+        text = self.cached(profile)
+        if text is not None:
+            return text, "cache"
+        self.require_client()
+        request = asyncio.ensure_future(self.client_for(profile).run_async(self.generate(profile)))
+        try:
+            response = await asyncio.wait_for(asyncio.shield(request), settings.FALLBACK_BUDGET_SECONDS or None)
+        except asyncio.TimeoutError:
+            METRICS.inc("advisor_fallback_served_total", reason="timeout")
+            if settings.FALLBACK_UPGRADE:
+                self._upgrades.add(request)
+                request.add_done_callback(lambda done: self._upgrade(profile, done))
+            else:
+                request.cancel()
+            return fallback_report(profile, score_breakdown), "fallback"
+        except Exception as e:
+            METRICS.record_error("api_recommend", e)
+            METRICS.inc("advisor_fallback_served_total", reason="error")
+            return fallback_report(profile, score_breakdown), "fallback"
+        if not well_formed(response.text):
+            METRICS.inc("advisor_fallback_served_total", reason="malformed")
+            return fallback_report(profile, score_breakdown), "fallback"
+        self.remember(profile, response.text)
+        return response.text, "model"
+
+    def _upgrade(self, profile, request):
+        self._upgrades.discard(request)
+        if not request.cancelled() and request.exception() is None:
+            self.remember(profile, request.result().text)
+
+
+def well_formed(text):
+    """False for structured reports that aren't valid JSON reports; free-form text always passes."""
+    if not structured.ENABLED:
+        return True
+    try:
+        structured.parse_report(text)
+    except structured.MalformedReport:
+        return False
+    return True
+
+
+def report_fields(text, source):
+    """Response fields for a report; structured reports also get their sections, and markdown text."""
+    fields = {'recommendations': text, 'source': source}
+    if structured.ENABLED and source != "fallback":
+        fields['sections'] = structured.parse_report(text)
+        fields['recommendations'] = structured.report_markdown(fields['sections'])
+    return fields
+
+
+async def score(request):
+    profile = _profile(await _read_json(request))
+    return _json(_scores(profile))
+
+
+async def recommend(request):
+    advisor = request.app.state.advisor
+    profile = _profile(await _read_json(request))
+    scores = _scores(profile)
+    if request.query_params.get("stream", "").lower() in ("1", "true", "yes"):
+        return StreamingResponse(stream_recommendations(advisor, profile, scores), media_type="application/x-ndjson")
+    text, source = await advisor.recommend(profile, scores['score_breakdown'])
+    return _json(dict(scores, **report_fields(text, source)))
+
+
+async def stream_recommendations(advisor, profile, scores):
+    """NDJSON events: the score, then text chunks, then done (with the source)."""
+    yield _ndjson({'event': "score", **scores})
+    text = advisor.cached(profile)
+    if text is None and not advisor.clients:
+        yield _ndjson({'event': "error", 'error': f"Recommendations are unavailable: {advisor.client_error}"})
+        return
+    if text is not None or structured.ENABLED or advisor.batchers:
+        # JSON reports can't be shown half-finished and batched ones arrive together,
+        # so they're sent whole like cached ones
+        if text is None:
+            text, source = await advisor.recommend(profile, scores['score_breakdown'])
+        else:
+            source = "cache"
+        fields = report_fields(text, source)
+        yield _ndjson({'event': "text", 'text': fields.pop('recommendations')})
+        yield _ndjson({'event': "done", **fields})
+        return
+
+    chunks = []
+    try:
+        client = advisor.client_for(profile)
+        async for chunk in client.iterate_async(client.stream(advisor.prompt(profile))):
+            chunks.append(chunk.text)
+            yield _ndjson({'event': "text", 'text': chunk.text})
+    except Exception as e:
+        METRICS.record_error("api_stream", e)
+        if chunks:
+            yield _ndjson({'event': "error", 'error': "The recommendation stream was interrupted"})
+            return
+        METRICS.inc("advisor_fallback_served_total", reason="error")
+        yield _ndjson({'event': "text", 'text': fallback_report(profile, scores['score_breakdown'])})
+        yield _ndjson({'event': "done", 'source': "fallback"})
+        return
+    advisor.remember(profile, "".join(chunks))
+    yield _ndjson({'event': "done", 'source': "model"})
+
+
+async def batch(request):
+    body = await _read_json(request)
+    records = body.get('profiles') if isinstance(body, dict) else None
+    if not isinstance(records, list):
+        raise APIError(422, 'Expected a JSON object with a "profiles" list')
+    if len(records) > settings.API_MAX_BATCH_PROFILES:
+        raise APIError(413, f"At most {settings.API_MAX_BATCH_PROFILES} profiles per batch")
+
+    results = []
+    profiles = []
+    for row, record in enumerate(records, start=1):
+        try:
+            profiles.append(_profile(record))
+            results.append({'row': row})
+        except APIError as e:
+            results.append({'row': row, 'error': str(e)})
+    valid = [result for result in results if 'error' not in result]
+    if profiles:
+        # Vectorized: one pass over all valid profiles
+        scores, breakdown = score_batch(encode_profiles(profiles))
+        for index, result in enumerate(valid):
+            result['lifestyle_score'] = int(scores[index])
+            result['score_breakdown'] = {category: int(breakdown[category][index]) for category in SCORE_CATEGORIES}
+
+    if body.get('recommend'):
+        advisor = request.app.state.advisor
+        advisor.require_client()
+        limit = asyncio.Semaphore(settings.BATCH_CONCURRENCY)
+
+        async def add_recommendations(result, profile):
+            async with limit:
+                text, source = await advisor.recommend(profile, result['score_breakdown'])
+            result.update(report_fields(text, source))
+
+        await asyncio.gather(*(add_recommendations(result, profile) for result, profile in zip(valid, profiles)))
+    return _json({'results': results})
+
+
+async def meal_plan(request):
+    advisor = request.app.state.advisor
+    if advisor.foods is None:
+        raise APIError(404, "Meal plans are disabled")
+    try:
+        variant = int(request.query_params.get("variant", 0))
+    except ValueError:
+        raise APIError(400, "variant must be an integer") from None
+    profile = _profile(await _read_json(request))
+    return _json(plan_dict(plan_meals(profile, advisor.foods, variant)))
+
+
+async def health(request):
+    advisor = request.app.state.advisor
+    return _json({'status': "ok", 'recommendations': bool(advisor.clients)})
+
+
+async def metrics(request):
+    return PlainTextResponse(METRICS.render_prometheus(), media_type="text/plain; version=0.0.4")
+
+
+def instrumented(endpoint, handler):
+    async def wrapper(request):
+        started = time.perf_counter()
+        try:
+            response = await handler(request)
+        except APIError as e:
+            response = _json({'error': str(e)}, e.status_code)
+        METRICS.inc("advisor_api_requests_total", endpoint=endpoint, status=str(response.status_code))
+        METRICS.observe_stage(f"api_{endpoint}", time.perf_counter() - started)
+        return response
+    return wrapper
+
+
+def create_app(advisor=None):
+    """The ASGI application; `advisor` defaults to one built from settings at startup."""
+
+    @asynccontextmanager
+    async def lifespan(app):
+        app.state.advisor = advisor if advisor is not None else Advisor.from_settings()
+        yield
+        for client in app.state.advisor.clients.values():
+            client.close()
+
+    return Starlette(routes=[
+        Route("/score", instrumented("score", score), methods=["POST"]),
+        Route("/recommend", instrumented("recommend", recommend), methods=["POST"]),
+        Route("/batch", instrumented("batch", batch), methods=["POST"]),
+        Route("/meal-plan", instrumented("meal_plan", meal_plan), methods=["POST"]),
+        Route("/health", health, methods=["GET"]),
+        Route("/metrics", metrics, methods=["GET"]),
+    ], lifespan=lifespan)
+
+
+def main(argv=None):
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Serve the advisor's JSON API.")
+    parser.add_argument("--host", default=settings.API_HOST, help="interface to bind")
+    parser.add_argument("--port", type=int, default=settings.API_PORT, help="port to listen on")
+    parser.add_argument("--workers", type=int, default=settings.API_WORKERS, help="worker processes")
+    args = parser.parse_args(argv)
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+
+    uvicorn.run("api:create_app", factory=True, host=args.host, port=args.port, workers=args.workers,
+                access_log=False)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,7 +2,40 @@ import streamlit as st
 import google.generativeai as genai
 from gemini_api_key import GEMINI_API_KEY
 import json
+import os
+import time
+import concurrent.futures
+import functools
+import io
+import tempfile
+import uuid
 from datetime import datetime
+from backends import create_backend
+from cache import RecommendationCache, profile_key
+from goal_index import GoalIndex
+from history import AssessmentStore
+from jobs import JobQueue, JobQueueFull
+from lookup_table import RecommendationTable
+from meal_plan import plan_meals
+from nutrients import FoodTable
+from gemini_client import AsyncGeminiClient
+from fallback import fallback_report, fallback_sections
+from metrics import METRICS, start_metrics_server
+from profiles import parse_profile
+from routing import model_for, model_tiers
+from scoring import CATEGORY_MAX_POINTS, calculate_score, preview_score, score_delta
+from prompts import build_prompt, cache_namespace, generation_config
+from sections import REPORT_SECTIONS, assemble_report, carry_over_sections, generate_sections, sections_for_tab
+from startup import timed
+from admin_page import render_admin_page
+import export
+import microbatch
+import options
+import settings
+import structured
+import ui_assets
+
+page_started = time.perf_counter()
 
 # Page configuration
 st.set_page_config(
@@ -13,318 +46,318 @@ st.set_page_config(
 )
 
 # Custom CSS for clean, simple UI
-st.markdown("""
-<style>
-    /* Clean white background */
-    .stApp {
-        background-color: #ffffff;
-    }
-    
-    .main {
-        background-color: #ffffff;
-        max-width: 1200px;
-        margin: 0 auto;
-    }
-    
-    /* Simple header */
-    .main-header {
-        font-size: 2.5rem;
-        font-weight: 700;
-        color: #000000 !important;
-        text-align: center;
-        margin-bottom: 0.5rem;
-    }
-    
-    .sub-header {
-        text-align: center;
-        color: #000000 !important;
-        font-size: 1.1rem;
-        margin-bottom: 2rem;
-    }
-    
-    /* Clean section headers */
-    .section-header {
-        font-size: 1.3rem;
-        font-weight: 600;
-        color: #000000 !important;
-        margin: 2rem 0 1rem 0;
-        padding-bottom: 0.5rem;
-        border-bottom: 2px solid #e2e8f0;
-    }
-    
-    /* Simple inputs */
-    .stSelectbox label, .stMultiSelect label, .stSlider label, .stRadio label, 
-    .stNumberInput label, .stTextArea label {
-        font-size: 0.95rem;
-        font-weight: 600;
-        color: #000000 !important;
-    }
-    
-    /* All text elements */
-    p, span, div, label, h1, h2, h3, h4, h5, h6 {
-        color: #000000 !important;
-    }
-    
-    /* Streamlit specific text */
-    .stMarkdown, .stMarkdown p, .stMarkdown span, .stMarkdown div {
-        color: #000000 !important;
-    }
-    
-    /* Metric labels and values */
-    [data-testid="stMetricLabel"], [data-testid="stMetricValue"] {
-        color: #000000 !important;
-    }
-    
-    div[data-baseweb="select"] > div,
-    div[data-baseweb="input"] > div,
-    .stTextArea textarea,
-    .stNumberInput input {
-        border-radius: 8px;
-        border: 1px solid #cbd5e0;
-        background: white;
-        color: #000000 !important;
-    }
-    
-    div[data-baseweb="select"] > div:hover,
-    div[data-baseweb="input"] > div:hover,
-    .stTextArea textarea:hover,
-    .stNumberInput input:hover {
-        border-color: #4299e1;
-    }
-    
-    /* Simple button */
-    .stButton>button {
-        width: 100% !important;
-        background-color: #48bb78 !important;
-        color: white !important;
-        font-weight: 700 !important;
-        padding: 0.75rem 2rem !important;
-        border-radius: 8px !important;
-        border: none !important;
-        font-size: 1.1rem !important;
-        margin-top: 2rem !important;
-    }
-    
-    .stButton>button:hover {
-        background-color: #38a169 !important;
-    }
-    
-    .stButton>button:active {
-        background-color: #2f855a !important;
-    }
-    
-    /* Form submit button */
-    .stFormSubmitButton>button {
-        width: 100% !important;
-        background-color: #48bb78 !important;
-        color: white !important;
-        font-weight: 700 !important;
-        font-size: 1.1rem !important;
-        padding: 0.75rem 2rem !important;
-        border-radius: 8px !important;
-        border: none !important;
-    }
-    
-    .stFormSubmitButton>button:hover {
-        background-color: #38a169 !important;
-    }
-    
-    .stFormSubmitButton>button:active {
-        background-color: #2f855a !important;
-    }
-    
-    /* All button types */
-    button[kind="primary"], button[kind="secondary"] {
-        background-color: #48bb78 !important;
-        color: white !important;
-        font-weight: 700 !important;
-        font-size: 1.1rem !important;
-        border: none !important;
-    }
-    
-    button[kind="primary"]:hover, button[kind="secondary"]:hover {
-        background-color: #38a169 !important;
-    }
-    
-    button[kind="primary"]:active, button[kind="secondary"]:active {
-        background-color: #2f855a !important;
-    }
-    
-    /* Score card */
-    .score-card {
-        padding: 2rem;
-        border-radius: 12px;
-        background: white;
-        text-align: center;
-        box-shadow: 0 1px 3px rgba(0,0,0,0.1);
-        border: 1px solid #e2e8f0;
-    }
-    
-    .score-card h3, .score-card h2 {
-        color: #000000 !important;
-    }
-    
-    .health-score {
-        font-size: 4rem;
-        font-weight: 700;
-        margin: 1rem 0;
-    }
-    
-    /* Metric cards */
-    .metric-card {
-        padding: 1.5rem;
-        border-radius: 8px;
-        background: white;
-        box-shadow: 0 1px 3px rgba(0,0,0,0.1);
-        margin: 1rem 0;
-        border: 1px solid #e2e8f0;
-    }
-    
-    /* Recommendation box */
-    .recommendation-box {
-        padding: 2rem;
-        border-radius: 8px;
-        background: white;
-        margin: 1rem 0;
-        border: 1px solid #e2e8f0;
-        box-shadow: 0 1px 3px rgba(0,0,0,0.1);
-        color: #000000 !important;
-        line-height: 1.8;
-    }
-    
-    .recommendation-box * {
-        color: #000000 !important;
-    }
-    
-    /* Tabs */
-    .stTabs [data-baseweb="tab-list"] {
-        gap: 0.5rem;
-    }
-    
-    .stTabs [data-baseweb="tab"] {
-        border-radius: 8px;
-        padding: 0.75rem 1.5rem;
-        background: white;
-        border: 1px solid #e2e8f0;
-        color: #000000 !important;
-    }
-    
-    .stTabs [data-baseweb="tab"]:hover {
-        background: #f7fafc;
-    }
-    
-    .stTabs [data-baseweb="tab"][aria-selected="true"] {
-        background: #4299e1;
-        color: white !important;
-        border-color: #4299e1;
-    }
-    
-    /* Progress bar */
-    .stProgress > div > div > div {
-        background-color: #4299e1;
-    }
-    
-    /* Divider */
-    .input-divider {
-        height: 1px;
-        background: #e2e8f0;
-        margin: 1.5rem 0;
-    }
-    
-    /* Info boxes */
-    .stAlert {
-        border-radius: 8px;
-        border: 1px solid #e2e8f0;
-    }
-    
-    .stAlert * {
-        color: #000000 !important;
-    }
-    
-    /* Slider */
-    .stSlider > div > div > div > div {
-        background: #4299e1 !important;
-    }
-    
-    /* Multiselect tags */
-    .stMultiSelect [data-baseweb="tag"] {
-        background-color: #4299e1;
-        color: white !important;
-    }
-    
-    /* Form container */
-    [data-testid="stForm"] {
-        background: white;
-        padding: 2rem;
-        border-radius: 12px;
-        box-shadow: 0 1px 3px rgba(0,0,0,0.1);
-        border: 1px solid #e2e8f0;
-    }
-    
-    /* Welcome card */
-    .welcome-card {
-        background: white;
-        padding: 2rem;
-        border-radius: 12px;
-        box-shadow: 0 1px 3px rgba(0,0,0,0.1);
-        border: 1px solid #e2e8f0;
-        margin: 2rem 0;
-    }
-    
-    .welcome-card * {
-        color: #000000 !important;
-    }
-    
-    /* Download button specific */
-    .stDownloadButton > button {
-        background-color: #48bb78 !important;
-        color: white !important;
-        font-weight: 700 !important;
-        font-size: 1.1rem !important;
-        padding: 0.75rem 2rem !important;
-        border-radius: 8px !important;
-        width: 100% !important;
-        border: none !important;
-    }
-    
-    .stDownloadButton > button:hover {
-        background-color: #38a169 !important;
-    }
-    
-    .stDownloadButton > button:active {
-        background-color: #2f855a !important;
-    }
-    
-    /* Ensure button text is always visible */
-    button p, button span, button div, button * {
-        color: white !important;
-        font-weight: 700 !important;
-        background: transparent !important;
-    }
-    
-    /* Force all buttons to be green */
-    button {
-        background-color: #48bb78 !important;
-        color: white !important;
-    }
-    
-    button:hover {
-        background-color: #38a169 !important;
-    }
-    
-    button:active {
-        background-color: #2f855a !important;
-    }
-</style>
-""", unsafe_allow_html=True)
+st.markdown(ui_assets.CUSTOM_CSS, unsafe_allow_html=True)
 
-# Initialize Gemini API
+# Cache and rate-limit backend (None = per-process defaults); with a shared backend,
+# every app process behind the load balancer shares cached reports and the API quota
+@st.cache_resource
+def get_backend():
+    with timed("backend"):
+        return create_backend()
+
+
+# One configured, rate-limited client per server process and model name,
+# so reruns skip client setup and all sessions share the API quota
+@st.cache_resource
+def get_gemini_client(model_name):
+    with timed(f"gemini_client[{model_name}]"):
+        genai.configure(api_key=GEMINI_API_KEY)
+        client = AsyncGeminiClient(genai.GenerativeModel(model_name, generation_config=generation_config()),
+                                   backend=get_backend())
+        METRICS.register_stats("gemini_client" if model_name == settings.GEMINI_MODEL else "gemini_client_fast",
+                               client.stats)
+        return client
+
+
+# Initialize Gemini API: the standard model, plus the fast tier's when configured (routing.py)
 try:
-    genai.configure(api_key=GEMINI_API_KEY)
-    model = genai.GenerativeModel('gemini-2.0-flash-exp')
+    gemini_client = get_gemini_client(settings.GEMINI_MODEL)
+    report_clients = {model_name: get_gemini_client(model_name) for model_name in model_tiers().values()}
 except Exception as e:
     st.error(f"⚠️ API Configuration Error: {str(e)}")
 
+
+# One recommendation cache per server process, shared by all sessions
+@st.cache_resource
+def get_recommendation_cache():
+    with timed("recommendation_cache"):
+        cache = RecommendationCache(backend=get_backend())
+        METRICS.register_stats("cache", cache.stats)
+        return cache
+
+
+recommendation_cache = get_recommendation_cache()
+
+
+# Near-duplicate health goals index over the recommendation cache, shared by all sessions
+@st.cache_resource
+def get_goal_index():
+    goal_index = GoalIndex()
+    METRICS.register_stats("goal_index", goal_index.stats)
+    return goal_index
+
+
+goal_index = get_goal_index()
+
+
+# Precomputed lookup table, memory-mapped once per process (None when absent or built for
+# another model or prompt template)
+@st.cache_resource
+def get_recommendation_table(path, namespace):
+    if not os.path.exists(path):
+        return None
+    try:
+        with timed("recommendation_table"):
+            table = RecommendationTable(path)
+    except ValueError as e:
+        # Not a lookup file, or one written by an older version
+        METRICS.record_error("recommendation_table", e)
+        return None
+    if table.model_name != namespace:
+        return None
+    METRICS.register_stats("lookup_table", table.stats)
+    return table
+
+
+recommendation_table = get_recommendation_table(settings.LOOKUP_TABLE_PATH, cache_namespace())
+
+
+# Bundled food-composition table for the Nutrition tab's meal plan, loaded once per process
+@st.cache_resource
+def get_food_table(path):
+    with timed("food_table"):
+        return FoodTable.load(path)
+
+
+# Micro-batcher for whole reports per model (None when off), shared by all sessions so
+# concurrent submits can be combined into one model call
+@st.cache_resource
+def get_microbatcher(model_name):
+    if not microbatch.enabled():
+        return None
+    batcher = microbatch.MicroBatcher(get_gemini_client(model_name))
+    METRICS.register_stats("microbatch" if model_name == settings.GEMINI_MODEL else "microbatch_fast",
+                           batcher.stats)
+    return batcher
+
+
+microbatchers = {model_name: get_microbatcher(model_name) for model_name in model_tiers().values()}
+
+
+# Background workers for report generation, shared by all sessions
+@st.cache_resource
+def get_job_queue():
+    job_queue = JobQueue()
+    METRICS.register_stats("jobs", job_queue.stats)
+    return job_queue
+
+
+job_queue = get_job_queue()
+
+
+# One assessment history store per server process
+@st.cache_resource
+def get_assessment_store():
+    with timed("assessment_store"):
+        return AssessmentStore(backend=get_backend())
+
+
+assessment_store = get_assessment_store()
+
+
+# Optional Prometheus scrape endpoint, started once per process
+@st.cache_resource
+def get_metrics_server(port):
+    return start_metrics_server(port)
+
+
+if settings.METRICS_PORT:
+    get_metrics_server(settings.METRICS_PORT)
+
+
+def recommendation_html(text):
+    return f'<div class="recommendation-box" style="color: #000000 !important;">{text}</div>'
+
+
+def section_html(section, text):
+    return f'<div class="recommendation-box" style="color: #000000 !important;"><strong>{section.title}</strong><br>{text}</div>'
+
+
+def cache_recommendations(user_data, cache_key, text):
+    if structured.ENABLED:
+        # Malformed JSON reports are replaced by the fallback and retried next time
+        try:
+            structured.parse_report(text)
+        except structured.MalformedReport:
+            return
+    recommendation_cache.set(cache_key, text)
+    goal_index.add(user_data, cache_key, namespace=cache_namespace())
+
+
+def request_report(prompt, user_data):
+    """Future of the whole report for a profile from its routed model, micro-batched when enabled."""
+    model_name = model_for(user_data)
+    client, batcher = report_clients[model_name], microbatchers[model_name]
+    if batcher is not None:
+        return client.submit(batcher.generate(user_data))
+    return client.submit(client.generate(prompt))
+
+
+def recommendation_job(job, prompt, user_data, cache_key, score_breakdown):
+    # Runs on a worker thread: no st.* calls, results are picked up by the polling page
+    future = request_report(prompt, user_data)
+    try:
+        while True:
+            if job.cancelled:
+                future.cancel()
+                return None
+            try:
+                response = future.result(timeout=0.25)
+                break
+            except concurrent.futures.TimeoutError:
+                continue
+        cache_recommendations(user_data, cache_key, response.text)
+        return response.text, "model"
+    except Exception as e:
+        METRICS.record_error("job", e)
+        METRICS.inc("advisor_fallback_served_total", reason="error")
+        return fallback_report(user_data, score_breakdown), "fallback"
+
+
+# Session keys restored from a job's metadata when its page is reloaded
+JOB_SESSION_KEYS = ('profile', 'lifestyle_score', 'score_breakdown', 'score_delta', 'assessment_id')
+
+
+def start_new_assessment():
+    st.session_state.show_form = True
+    st.session_state.recommendations = None
+    st.session_state.lifestyle_score = None
+    st.session_state.profile = None
+    st.session_state.score_breakdown = {}
+    st.session_state.pending_prompt = None
+    st.session_state.pending_cache_key = None
+    st.session_state.pending_sections = False
+    st.session_state.recommendation_sections = {}
+    st.session_state.recommendation_source = None
+    st.session_state.assessment_id = None
+    st.session_state.score_delta = None
+    st.session_state.preview_score = None
+    st.session_state.meal_plan_variant = 0
+    if st.session_state.upgrade_future is not None:
+        st.session_state.upgrade_future.cancel()
+        st.session_state.upgrade_future = None
+    if st.session_state.job_id is not None:
+        job_queue.cancel(st.session_state.job_id)
+        st.session_state.job_id = None
+    if "job" in st.query_params:
+        del st.query_params["job"]
+    st.rerun()
+
+
+# Shows the fallback report while the model's report that missed the latency budget is
+# still coming, then reruns the whole page with it; never blocks the script run
+@st.fragment(run_every=1)
+def upgrade_status():
+    future = st.session_state.upgrade_future
+    if not future.done():
+        st.markdown(recommendation_html(st.session_state.recommendations), unsafe_allow_html=True)
+        st.caption("⚡ Showing instant guidance while the AI recommendations are prepared")
+        return
+    st.session_state.upgrade_future = None
+    try:
+        response = future.result()
+    except Exception:
+        # Keep the fallback report
+        st.session_state.pending_cache_key = None
+        st.rerun()
+    store_recommendations(response.text, "model")
+    cache_recommendations(st.session_state.profile, st.session_state.pending_cache_key, response.text)
+    st.session_state.pending_cache_key = None
+    save_recommendations()
+    st.rerun()
+
+
+# Polls the session's background job until it finishes, then reruns the whole page
+@st.fragment(run_every=1)
+def job_status():
+    job = job_queue.get(st.session_state.job_id)
+    if job is not None and not job.done:
+        ahead = job_queue.position(job)
+        message = f"⏳ Waiting in line ({ahead} ahead of you)..." if ahead else "⏳ Analyzing your lifestyle..."
+        st.markdown(recommendation_html(message), unsafe_allow_html=True)
+        st.caption("You can reload this page; your recommendations will still appear here.")
+        if st.button("✖️ Cancel"):
+            start_new_assessment()
+        return
+    if job is not None and job.result is not None:
+        store_recommendations(*job.result)
+    else:
+        # Failed or expired job
+        store_recommendations(fallback_report(st.session_state.profile, st.session_state.score_breakdown), "fallback")
+        METRICS.inc("advisor_fallback_served_total", reason="error")
+    st.session_state.job_id = None
+    save_recommendations()
+    st.rerun()
+
+
+def current_user_id():
+    # Anonymous id kept in the URL (?user=...), so a bookmark brings the history back
+    user_id = st.query_params.get("user")
+    if not user_id:
+        user_id = uuid.uuid4().hex
+        st.query_params["user"] = user_id
+    return user_id
+
+
+def store_recommendations(text, source):
+    """Put a finished report in the session; JSON reports are parsed once into per-tab sections."""
+    sections = {}
+    if text is not None and source == "model" and structured.ENABLED:
+        profile, score_breakdown = st.session_state.profile, st.session_state.score_breakdown
+        try:
+            sections = structured.parse_report(text)
+        except structured.MalformedReport as e:
+            METRICS.record_error("structured_report", e)
+            if structured.looks_like_json(text):
+                # Broken JSON isn't readable; serve the rule-based report instead
+                text, source = fallback_report(profile, score_breakdown), "fallback"
+                METRICS.inc("advisor_fallback_served_total", reason="malformed")
+        else:
+            # Sections the model left out come from the rules
+            rules = fallback_sections(profile, score_breakdown)
+            for section in REPORT_SECTIONS:
+                sections.setdefault(section.key, rules[section.key])
+            text = structured.report_markdown(sections)
+    st.session_state.recommendations = text
+    st.session_state.recommendation_source = source
+    st.session_state.recommendation_sections = sections
+
+
+def export_history(user_id):
+    # Runs when the export button is clicked: every stored report of the user, in every format.
+    # The ZIP is written to an unnamed temporary file, one assessment at a time, and handed to
+    # Streamlit as a raw file it reads once to serve the download
+    archive = tempfile.TemporaryFile(buffering=0)
+    writer = io.BufferedWriter(archive)
+    export.write_zip(writer, assessment_store.iter_assessments(user_id), formats=tuple(export.FORMATS))
+    writer.flush()
+    writer.detach()
+    return archive
+
+
+def next_meal_plan():
+    st.session_state.meal_plan_variant += 1
+
+
+def save_recommendations():
+    if st.session_state.assessment_id is None:
+        return
+    try:
+        assessment_store.set_recommendations(st.session_state.assessment_id, st.session_state.recommendations,
+                                             st.session_state.recommendation_source)
+    except Exception as e:
+        METRICS.record_error("history_save", e)
+
 # Initialize session state
 if 'recommendations' not in st.session_state:
     st.session_state.recommendations = None
@@ -332,21 +365,59 @@ if 'lifestyle_score' not in st.session_state:
     st.session_state.lifestyle_score = None
 if 'show_form' not in st.session_state:
     st.session_state.show_form = True
-if 'user_data' not in st.session_state:
-    st.session_state.user_data = {}
+if 'profile' not in st.session_state:
+    st.session_state.profile = None
 if 'score_breakdown' not in st.session_state:
     st.session_state.score_breakdown = {}
+if 'pending_prompt' not in st.session_state:
+    st.session_state.pending_prompt = None
+if 'pending_cache_key' not in st.session_state:
+    st.session_state.pending_cache_key = None
+if 'pending_sections' not in st.session_state:
+    st.session_state.pending_sections = False
+if 'recommendation_sections' not in st.session_state:
+    st.session_state.recommendation_sections = {}
+if 'recommendation_source' not in st.session_state:
+    st.session_state.recommendation_source = None
+if 'upgrade_future' not in st.session_state:
+    st.session_state.upgrade_future = None
+if 'assessment_id' not in st.session_state:
+    st.session_state.assessment_id = None
+if 'score_delta' not in st.session_state:
+    st.session_state.score_delta = None
+if 'job_id' not in st.session_state:
+    st.session_state.job_id = None
+if 'meal_plan_variant' not in st.session_state:
+    st.session_state.meal_plan_variant = 0
+
+# Hidden admin dashboard at ?admin=<ADVISOR_ADMIN_TOKEN>
+if settings.ADMIN_TOKEN and st.query_params.get("admin") == settings.ADMIN_TOKEN:
+    render_admin_page()
+    st.stop()
+
+user_id = current_user_id()
+
+# A reloaded page picks its background job back up from ?job=<id>
+if st.session_state.show_form and st.session_state.job_id is None and st.query_params.get("job"):
+    restored_job = job_queue.get(st.query_params["job"])
+    if restored_job is not None and restored_job.metadata and not restored_job.cancelled:
+        for key in JOB_SESSION_KEYS:
+            st.session_state[key] = restored_job.metadata[key]
+        st.session_state.job_id = restored_job.id
+        st.session_state.show_form = False
+    else:
+        del st.query_params["job"]
 
 # Header
 st.markdown('<h1 class="main-header">🌱 Lifestyle & Diet Advisor</h1>', unsafe_allow_html=True)
 st.markdown('<p class="sub-header">Get personalized health recommendations powered by AI</p>', unsafe_allow_html=True)
 st.markdown('<p style="text-align: center; color: #000000; font-size: 0.9rem; margin-top: -1rem; margin-bottom: 2rem;">Built by MD Zaheer JK</p>', unsafe_allow_html=True)
 
-# Show form or recommendations based on state
-if st.session_state.show_form:
-    st.markdown("---")
-    
-    with st.form("lifestyle_form"):
+# Widget changes rerun only the form, so the score preview updates without
+# rerunning the page; submitting stores the values and reruns the whole page
+@st.fragment
+def lifestyle_form():
+    with st.container(border=True, key="lifestyle_form"):
         # Diet & Nutrition Section
         st.markdown('<div class="section-header">🍽️ Diet & Nutrition</div>', unsafe_allow_html=True)
         
@@ -354,12 +425,12 @@ if st.session_state.show_form:
         with col1:
             diet_type = st.selectbox(
                 "Primary Diet Type",
-                ["Omnivore", "Vegetarian", "Vegan", "Pescatarian", "Keto", "Paleo", "Mediterranean"]
+                options.DIET_TYPES
             )
         with col2:
-            meals_per_day = st.slider("Meals per Day", 1, 6, 3)
+            meals_per_day = st.slider("Meals per Day", *options.MEALS_PER_DAY_RANGE)
         with col3:
-            water_intake = st.slider("Water Intake (glasses/day)", 0, 15, 8)
+            water_intake = st.slider("Water Intake (glasses/day)", *options.WATER_INTAKE_RANGE)
         
         st.markdown('<div class="input-divider"></div>', unsafe_allow_html=True)
         
@@ -368,11 +439,11 @@ if st.session_state.show_form:
         
         col1, col2 = st.columns(2)
         with col1:
-            sleep_hours = st.slider("Average Sleep (hours/night)", 3, 12, 7)
+            sleep_hours = st.slider("Average Sleep (hours/night)", *options.SLEEP_HOURS_RANGE)
         with col2:
             sleep_quality = st.select_slider(
                 "Sleep Quality",
-                options=["Very Poor", "Poor", "Fair", "Good", "Excellent"]
+                options=options.SLEEP_QUALITIES
             )
         
         st.markdown('<div class="input-divider"></div>', unsafe_allow_html=True)
@@ -384,12 +455,12 @@ if st.session_state.show_form:
         with col1:
             exercise_frequency = st.selectbox(
                 "Exercise Frequency",
-                ["Sedentary", "1-2 times/week", "3-4 times/week", "5-6 times/week", "Daily"]
+                options.EXERCISE_FREQUENCIES
             )
         with col2:
             exercise_type = st.multiselect(
                 "Exercise Types",
-                ["Cardio", "Strength Training", "Yoga", "Sports", "Walking", "Cycling", "Swimming"]
+                options.EXERCISE_TYPES
             )
         
         st.markdown('<div class="input-divider"></div>', unsafe_allow_html=True)
@@ -401,12 +472,12 @@ if st.session_state.show_form:
         with col1:
             stress_level = st.select_slider(
                 "Stress Level",
-                options=["Very Low", "Low", "Moderate", "High", "Very High"]
+                options=options.STRESS_LEVELS
             )
         with col2:
             meditation = st.radio(
                 "Do you meditate?", 
-                ["Yes, regularly", "Sometimes", "No"]
+                options.MEDITATION_OPTIONS
             )
         
         st.markdown('<div class="input-divider"></div>', unsafe_allow_html=True)
@@ -418,12 +489,12 @@ if st.session_state.show_form:
         with col1:
             smoking = st.radio(
                 "Smoking Status", 
-                ["Non-smoker", "Occasional", "Regular"]
+                options.SMOKING_OPTIONS
             )
         with col2:
             alcohol = st.selectbox(
                 "Alcohol Consumption",
-                ["None", "Occasional (1-2/week)", "Moderate (3-5/week)", "Regular (daily)"]
+                options.ALCOHOL_OPTIONS
             )
         
         st.markdown('<div class="input-divider"></div>', unsafe_allow_html=True)
@@ -433,154 +504,157 @@ if st.session_state.show_form:
         
         col1, col2 = st.columns(2)
         with col1:
-            age = st.number_input("Age", min_value=15, max_value=100, value=30)
+            age = st.number_input("Age", min_value=options.AGE_RANGE[0], max_value=options.AGE_RANGE[1], value=options.AGE_RANGE[2])
         with col2:
             health_goals = st.text_area(
                 "Health Goals (optional)",
                 placeholder="e.g., Weight loss, Muscle gain, Better energy..."
             )
         
-        submit_button = st.form_submit_button("✅ Get My Recommendations", use_container_width=True)
+        user_data = {
+            'age': age,
+            'diet_type': diet_type,
+            'meals_per_day': meals_per_day,
+            'water_intake': water_intake,
+            'sleep_hours': sleep_hours,
+            'sleep_quality': sleep_quality,
+            'exercise_frequency': exercise_frequency,
+            'exercise_type': exercise_type,
+            'stress_level': stress_level,
+            'meditation': meditation,
+            'smoking': smoking,
+            'alcohol': alcohol,
+            'health_goals': health_goals
+        }
+        
+        if settings.SCORE_PREVIEW:
+            st.markdown('<div class="input-divider"></div>', unsafe_allow_html=True)
+            st.markdown('<div class="section-header">📊 Score Preview</div>', unsafe_allow_html=True)
+            
+            # Computed locally from the widget values; the model is only called on submit
+            score, score_breakdown = preview_score(user_data)
+            previous_score = st.session_state.get('preview_score')
+            st.session_state.preview_score = score
+            col1, col2 = st.columns([1, 3])
+            with col1:
+                st.metric("Lifestyle Score", score,
+                          delta=score - previous_score if previous_score not in (None, score) else None)
+            with col2:
+                st.progress(score / 100)
+                st.caption(" · ".join(f"{category} {points}/{CATEGORY_MAX_POINTS[category]}"
+                                      for category, points in score_breakdown.items()))
+        
+        if st.button("✅ Get My Recommendations", use_container_width=True):
+            st.session_state.submitted_form = user_data
+            st.rerun()
+
+
+# Show form or recommendations based on state
+if st.session_state.show_form:
+    st.markdown("---")
+    
+    lifestyle_form()
+    
+    submitted_form = st.session_state.pop('submitted_form', None)
+    if submitted_form is not None:
+        profile = parse_profile(submitted_form)
+        cache_key = profile_key(profile, namespace=cache_namespace())
 
-    if submit_button:
         with st.spinner("Analyzing your lifestyle..."):
             try:
-                prompt = f"""
-                As a professional health and lifestyle advisor, analyze the following user profile and provide comprehensive recommendations:
-
-                User Profile:
-                - Age: {age}
-                - Diet Type: {diet_type}
-                - Meals per Day: {meals_per_day}
-                - Water Intake: {water_intake} glasses/day
-                - Sleep: {sleep_hours} hours/night, Quality: {sleep_quality}
-                - Exercise: {exercise_frequency}, Types: {', '.join(exercise_type) if exercise_type else 'None'}
-                - Stress Level: {stress_level}
-                - Meditation: {meditation}
-                - Smoking: {smoking}
-                - Alcohol: {alcohol}
-                - Health Goals: {health_goals if health_goals else 'General wellness'}
-
-                Please provide a comprehensive analysis with:
-
-                1. LIFESTYLE HEALTH SCORE ANALYSIS:
-                   - Provide an estimated score out of 100
-                   - Break down the score by category (positive and negative aspects)
-                   - Explain what impacts the score
-
-                2. DETAILED RECOMMENDATIONS by category:
-                   
-                   **Diet & Nutrition:**
-                   - Specific meal suggestions with timing and portions
-                   - Foods to include and avoid
-                   - Nutrient focus areas
-                   
-                   **Hydration:**
-                   - Optimal water intake recommendations
-                   - Best timing for hydration
-                   
-                   **Sleep Optimization:**
-                   - Sleep hygiene tips
-                   - Bedtime routine suggestions
-                   - Environmental factors to improve sleep quality
-                   
-                   **Exercise Plan:**
-                   - Specific activities suited to their lifestyle
-                   - Duration and frequency recommendations
-                   - Progressive plan to increase activity
-                   
-                   **Stress Management:**
-                   - Practical stress-reduction techniques
-                   - Mindfulness and relaxation practices
-                   
-                   **Habit Modifications:**
-                   - Specific lifestyle changes needed
-                   - Sustainable behavior modifications
-
-                3. PERSONALIZED ACTION PLAN:
-                   - 3-5 immediate steps to take this week
-                   - Prioritized by impact and ease of implementation
-
-                4. HEALTH RISKS & CONCERNS:
-                   - Potential health risks based on current lifestyle
-                   - Warning signs to watch for
-                   - When to consult healthcare professionals
-
-                Format the response with clear headings using **bold** for sections and bullet points for easy reading.
-                Make it detailed, actionable, and personalized to their specific situation.
-                """
-                
-                response = model.generate_content(prompt)
-                recommendations_text = response.text
+                with METRICS.timer("prompt"):
+                    prompt = structured.build_structured_prompt(profile) if structured.ENABLED else build_prompt(profile)
                 
                 # Calculate lifestyle score with detailed breakdown
-                score = 0
-                score_breakdown = {}
+                with METRICS.timer("scoring"):
+                    score, score_breakdown = calculate_score(profile)
                 
-                # Water intake (max 40 points)
-                water_score = min(water_intake * 5, 40)
-                score += water_score
-                score_breakdown['Water Intake'] = water_score
+                # Compare against the user's last assessment for the score delta and incremental sections
+                previous = None
+                try:
+                    previous = assessment_store.latest(user_id)
+                except Exception as e:
+                    METRICS.record_error("history_load", e)
+                st.session_state.score_delta = score_delta(previous[1], score_breakdown) if previous else None
+                if previous and settings.REPORT_MODE == "incremental":
+                    reused = carry_over_sections(previous[0], profile, recommendation_cache,
+                                                 namespace=cache_namespace())
+                    METRICS.inc("advisor_sections_reused_total", len(reused))
                 
-                # Sleep duration (max 35 points)
-                sleep_duration_score = min(sleep_hours * 5, 35)
-                score += sleep_duration_score
-                score_breakdown['Sleep Duration'] = sleep_duration_score
+                recommendations_text = None
+                recommendation_source = "model"
+                job = None
+                if settings.REPORT_MODE == "single":
+                    # Identical profiles are served from precomputed cells or the cache instead of the API
+                    table_entry = recommendation_table.lookup(profile) if recommendation_table is not None else None
+                    if table_entry is not None:
+                        recommendations_text = table_entry.recommendations
+                    else:
+                        recommendations_text = recommendation_cache.get(cache_key)
+                    if recommendations_text is None:
+                        # Same profile with similarly worded goals
+                        similar_key = goal_index.find(profile, namespace=cache_namespace())
+                        if similar_key is not None:
+                            recommendations_text = recommendation_cache.get(similar_key)
+                    if recommendations_text is None and settings.BACKGROUND_JOBS:
+                        # Generated by a worker; the results page polls the job
+                        job = job_queue.submit(recommendation_job, prompt, profile, cache_key, score_breakdown)
+                    elif recommendations_text is None and (structured.ENABLED or microbatch.enabled()
+                                                           or not settings.STREAM_RECOMMENDATIONS):
+                        # JSON can't be shown half-finished and batched reports arrive together,
+                        # so neither is streamed
+                        try:
+                            future = request_report(prompt, profile)
+                            response = future.result(timeout=settings.FALLBACK_BUDGET_SECONDS or None)
+                            recommendations_text = response.text
+                            cache_recommendations(profile, cache_key, recommendations_text)
+                        except concurrent.futures.TimeoutError:
+                            # Serve the rule-based report now and swap in the model output when it arrives
+                            recommendations_text = fallback_report(profile, score_breakdown)
+                            recommendation_source = "fallback"
+                            METRICS.inc("advisor_fallback_served_total", reason="timeout")
+                            if settings.FALLBACK_UPGRADE:
+                                st.session_state.upgrade_future = future
+                                st.session_state.pending_cache_key = cache_key
+                            else:
+                                future.cancel()
+                        except Exception:
+                            recommendations_text = fallback_report(profile, score_breakdown)
+                            recommendation_source = "fallback"
+                            METRICS.inc("advisor_fallback_served_total", reason="error")
                 
-                # Sleep quality (10 points)
-                sleep_quality_score = 10 if sleep_quality in ["Good", "Excellent"] else 0
-                score += sleep_quality_score
-                score_breakdown['Sleep Quality'] = sleep_quality_score
-                
-                # Exercise frequency (15 points)
-                exercise_score = 15 if exercise_frequency in ["3-4 times/week", "5-6 times/week", "Daily"] else 0
-                score += exercise_score
-                score_breakdown['Exercise'] = exercise_score
-                
-                # Stress management (10 points)
-                stress_score = 10 if stress_level in ["Very Low", "Low"] else 0
-                score += stress_score
-                score_breakdown['Stress Management'] = stress_score
-                
-                # Smoking status (10 points)
-                smoking_score = 10 if smoking == "Non-smoker" else 0
-                score += smoking_score
-                score_breakdown['Non-smoking'] = smoking_score
-                
-                # Alcohol consumption (5 points)
-                alcohol_score = 5 if alcohol in ["None", "Occasional (1-2/week)"] else 0
-                score += alcohol_score
-                score_breakdown['Alcohol Moderation'] = alcohol_score
-                
-                # Meditation bonus (5 points)
-                meditation_score = 5 if meditation == "Yes, regularly" else 0
-                score += meditation_score
-                score_breakdown['Meditation'] = meditation_score
-                
-                score = min(score, 100)
-                
-                st.session_state.recommendations = recommendations_text
                 st.session_state.lifestyle_score = score
                 st.session_state.score_breakdown = score_breakdown
-                st.session_state.user_data = {
-                    'age': age,
-                    'diet_type': diet_type,
-                    'meals_per_day': meals_per_day,
-                    'water_intake': water_intake,
-                    'sleep_hours': sleep_hours,
-                    'sleep_quality': sleep_quality,
-                    'exercise_frequency': exercise_frequency,
-                    'exercise_type': exercise_type,
-                    'stress_level': stress_level,
-                    'meditation': meditation,
-                    'smoking': smoking,
-                    'alcohol': alcohol,
-                    'health_goals': health_goals
-                }
+                st.session_state.profile = profile
+                store_recommendations(recommendations_text, recommendation_source)
+                if recommendations_text is None and settings.REPORT_MODE in ("sections", "incremental"):
+                    # Sections are generated concurrently once the results page renders
+                    st.session_state.pending_sections = True
+                elif recommendations_text is None and job is None:
+                    # Streamed into the Overview tab once the results page renders
+                    st.session_state.pending_prompt = prompt
+                    st.session_state.pending_cache_key = cache_key
                 st.session_state.show_form = False
+                # Pending recommendations are added to the saved assessment once they arrive
+                try:
+                    with METRICS.timer("history_save"):
+                        st.session_state.assessment_id = assessment_store.save(
+                            user_id, profile, score, score_breakdown, st.session_state.recommendations,
+                            st.session_state.recommendation_source if recommendations_text is not None else None,
+                        )
+                except Exception as e:
+                    METRICS.record_error("history_save", e)
+                if job is not None:
+                    job.metadata = {key: st.session_state[key] for key in JOB_SESSION_KEYS}
+                    st.session_state.job_id = job.id
+                    st.query_params["job"] = job.id
+                METRICS.observe_stage("submit", time.perf_counter() - page_started)
                 st.rerun()
                 
+            except JobQueueFull:
+                st.warning("⏳ The advisor is very busy right now. Please try again in a minute.")
             except Exception as e:
+                METRICS.record_error("submit", e)
                 st.error(f"⚠️ Unable to fetch recommendations. Please check your API key and try again.")
                 st.error(f"Error details: {str(e)}")
 
@@ -588,6 +662,8 @@ else:
     # Display recommendations
     st.markdown("---")
     
+    profile = st.session_state.profile
+    
     col1, col2, col3 = st.columns([1, 2, 1])
     with col2:
         score = st.session_state.lifestyle_score
@@ -618,16 +694,90 @@ else:
         """, unsafe_allow_html=True)
         
         st.progress(score / 100)
+        
+        if st.session_state.score_delta is not None:
+            total, changes = st.session_state.score_delta
+            details = ", ".join(f"{category} {change:+d}" for category, change in changes.items())
+            st.caption(f"{total:+d} points since your last assessment" + (f" ({details})" if details else ""))
     
     st.markdown("<br>", unsafe_allow_html=True)
     
+    # Placeholders for per-section recommendations, filled in as sections complete
+    section_slots = {}
+    show_sections = st.session_state.pending_sections or bool(st.session_state.recommendation_sections)
+    
+    def add_section_slots(sections):
+        for section in sections:
+            slot = st.empty()
+            text = st.session_state.recommendation_sections.get(section.key)
+            if text:
+                slot.markdown(section_html(section, text), unsafe_allow_html=True)
+            elif st.session_state.pending_sections:
+                slot.markdown(section_html(section, "⏳ Generating..."), unsafe_allow_html=True)
+            section_slots.setdefault(section.key, []).append(slot)
+    
     # Display recommendations in tabs
-    tab1, tab2, tab3, tab4 = st.tabs(["📊 Overview", "🥗 Nutrition", "💪 Fitness", "🧠 Wellness"])
+    tab1, tab2, tab3, tab4, tab5 = st.tabs(["📊 Overview", "🥗 Nutrition", "💪 Fitness", "🧠 Wellness", "📈 History"])
     
     with tab1:
         st.markdown('<h3 style="color: #000000;">Your Personalized Recommendations</h3>', unsafe_allow_html=True)
-        st.markdown(f'<div class="recommendation-box" style="color: #000000 !important;">{st.session_state.recommendations}</div>', 
-                   unsafe_allow_html=True)
+        if st.session_state.pending_sections:
+            add_section_slots(REPORT_SECTIONS)
+        elif st.session_state.recommendations is None and st.session_state.pending_prompt:
+            # Render chunks as they arrive so the first tokens show immediately
+            recommendation_placeholder = st.empty()
+            source_placeholder = st.empty()
+            recommendation_placeholder.markdown(recommendation_html("⏳ Analyzing your lifestyle..."), unsafe_allow_html=True)
+            streamed_text = ""
+            fallback_text = None
+            started = time.perf_counter()
+            try:
+                report_client = report_clients[model_for(st.session_state.profile)]
+                for chunk in report_client.stream_sync(st.session_state.pending_prompt, heartbeat=0.25):
+                    if chunk is None:
+                        # No output yet: past the latency budget, show the rule-based report
+                        if (fallback_text is None and not streamed_text and settings.FALLBACK_BUDGET_SECONDS
+                                and time.perf_counter() - started > settings.FALLBACK_BUDGET_SECONDS):
+                            fallback_text = fallback_report(st.session_state.profile, st.session_state.score_breakdown)
+                            recommendation_placeholder.markdown(recommendation_html(fallback_text), unsafe_allow_html=True)
+                            source_placeholder.caption("⚡ Showing instant guidance while the AI recommendations are prepared")
+                            METRICS.inc("advisor_fallback_served_total", reason="timeout")
+                            if not settings.FALLBACK_UPGRADE:
+                                break
+                        continue
+                    streamed_text += chunk.text
+                    if fallback_text is None:
+                        recommendation_placeholder.markdown(recommendation_html(f"{streamed_text}▌"), unsafe_allow_html=True)
+            except Exception as e:
+                METRICS.record_error("stream", e)
+                streamed_text = ""
+            if streamed_text:
+                recommendation_placeholder.markdown(recommendation_html(streamed_text), unsafe_allow_html=True)
+                source_placeholder.empty()
+                st.session_state.recommendations = streamed_text
+                st.session_state.recommendation_source = "model"
+                cache_recommendations(st.session_state.profile, st.session_state.pending_cache_key, streamed_text)
+            else:
+                if fallback_text is None:
+                    fallback_text = fallback_report(st.session_state.profile, st.session_state.score_breakdown)
+                    recommendation_placeholder.markdown(recommendation_html(fallback_text), unsafe_allow_html=True)
+                    METRICS.inc("advisor_fallback_served_total", reason="error")
+                source_placeholder.caption("⚡ AI recommendations are unavailable right now; showing guidance from our built-in rules")
+                st.session_state.recommendations = fallback_text
+                st.session_state.recommendation_source = "fallback"
+            st.session_state.pending_prompt = None
+            st.session_state.pending_cache_key = None
+            save_recommendations()
+        elif st.session_state.recommendations is None and st.session_state.job_id is not None:
+            job_status()
+        elif st.session_state.upgrade_future is not None:
+            upgrade_status()
+        else:
+            recommendation_placeholder = st.empty()
+            source_placeholder = st.empty()
+            recommendation_placeholder.markdown(recommendation_html(st.session_state.recommendations), unsafe_allow_html=True)
+            if st.session_state.recommendation_source == "fallback":
+                source_placeholder.caption("⚡ AI recommendations are unavailable right now; showing guidance from our built-in rules")
     
     with tab2:
         st.markdown('<h3 style="color: #000000;">Nutrition Guidelines</h3>', unsafe_allow_html=True)
@@ -635,16 +785,44 @@ else:
         col1, col2 = st.columns(2)
         with col1:
             st.markdown('<div class="metric-card">', unsafe_allow_html=True)
-            st.metric("Current Diet", st.session_state.user_data.get('diet_type', 'N/A'))
-            st.metric("Meals/Day", st.session_state.user_data.get('meals_per_day', 'N/A'))
+            st.metric("Current Diet", profile.diet_type.label)
+            st.metric("Meals/Day", profile.meals_per_day)
             st.markdown('</div>', unsafe_allow_html=True)
         with col2:
             st.markdown('<div class="metric-card">', unsafe_allow_html=True)
-            st.metric("Water Intake", f"{st.session_state.user_data.get('water_intake', 0)} glasses")
+            st.metric("Water Intake", f"{profile.water_intake} glasses")
             st.metric("Recommended", "8-10 glasses")
             st.markdown('</div>', unsafe_allow_html=True)
         
         st.info("💡 Balance your meals throughout the day and stay hydrated")
+        
+        if settings.MEAL_PLAN:
+            # Built from the bundled food table in about a millisecond; no model call
+            try:
+                with METRICS.timer("meal_plan"):
+                    plan = plan_meals(profile, get_food_table(settings.FOODS_PATH),
+                                      variant=st.session_state.meal_plan_variant)
+            except Exception as e:
+                METRICS.record_error("meal_plan", e)
+                plan = None
+            if plan is not None:
+                st.markdown('<h4 style="color: #000000;">🍽️ Sample Meal Plan</h4>', unsafe_allow_html=True)
+                for meal in plan.meals:
+                    foods = ", ".join(f"{food} {grams} g" for food, grams in meal.items)
+                    st.markdown(f"**{meal.name}** ({meal.totals['kcal']} kcal): {foods}")
+                totals, targets = plan.totals, plan.targets
+                st.caption(
+                    f"Daily total {totals['kcal']} kcal (target {targets['kcal']}) · "
+                    f"protein {totals['protein_g']} g ({targets['protein_g']}) · "
+                    f"carbs {totals['carbs_g']} g ({targets['carbs_g']}) · "
+                    f"fat {totals['fat_g']} g ({targets['fat_g']}) · "
+                    f"fibre {totals['fiber_g']} g (at least {targets['fiber_g']}). "
+                    "Targets are estimates for your age, activity, diet and goals, not medical advice."
+                )
+                st.button("🔀 Another meal plan", on_click=next_meal_plan)
+        
+        if show_sections:
+            add_section_slots(sections_for_tab('nutrition'))
     
     with tab3:
         st.markdown('<h3 style="color: #000000;">Activity Overview</h3>', unsafe_allow_html=True)
@@ -652,15 +830,18 @@ else:
         col1, col2 = st.columns(2)
         with col1:
             st.markdown('<div class="metric-card">', unsafe_allow_html=True)
-            st.metric("Exercise Frequency", st.session_state.user_data.get('exercise_frequency', 'N/A'))
+            st.metric("Exercise Frequency", profile.exercise_frequency.label)
             st.markdown('</div>', unsafe_allow_html=True)
         with col2:
             st.markdown('<div class="metric-card">', unsafe_allow_html=True)
-            exercise_types = st.session_state.user_data.get('exercise_type', [])
+            exercise_types = profile.exercise_type
             st.metric("Activities", ", ".join(exercise_types) if exercise_types else "None")
             st.markdown('</div>', unsafe_allow_html=True)
         
         st.success("🎯 Aim for 150 minutes of moderate activity per week")
+        
+        if show_sections:
+            add_section_slots(sections_for_tab('fitness'))
     
     with tab4:
         st.markdown('<h3 style="color: #000000;">Mental Wellness</h3>', unsafe_allow_html=True)
@@ -668,106 +849,135 @@ else:
         col1, col2 = st.columns(2)
         with col1:
             st.markdown('<div class="metric-card">', unsafe_allow_html=True)
-            st.metric("Sleep Duration", f"{st.session_state.user_data.get('sleep_hours', 0)} hours")
-            st.metric("Sleep Quality", st.session_state.user_data.get('sleep_quality', 'N/A'))
+            st.metric("Sleep Duration", f"{profile.sleep_hours} hours")
+            st.metric("Sleep Quality", profile.sleep_quality.label)
             st.markdown('</div>', unsafe_allow_html=True)
         with col2:
             st.markdown('<div class="metric-card">', unsafe_allow_html=True)
-            st.metric("Stress Level", st.session_state.user_data.get('stress_level', 'N/A'))
-            st.metric("Meditation", st.session_state.user_data.get('meditation', 'N/A'))
+            st.metric("Stress Level", profile.stress_level.label)
+            st.metric("Meditation", profile.meditation.label)
             st.markdown('</div>', unsafe_allow_html=True)
         
         st.warning("🌙 Aim for 7-9 hours of quality sleep each night")
+        
+        if show_sections:
+            add_section_slots(sections_for_tab('wellness'))
+    
+    with tab5:
+        st.markdown('<h3 style="color: #000000;">Your Progress</h3>', unsafe_allow_html=True)
+        
+        # Trend queries only read scores and breakdowns, never the stored reports
+        history = assessment_store.score_history(user_id)
+        if len(history) > 1:
+            st.line_chart(
+                [{'Date': datetime.fromtimestamp(row['created_at']), 'Lifestyle Score': row['lifestyle_score']}
+                 for row in history],
+                x='Date', y='Lifestyle Score',
+            )
+            st.markdown('<div class="section-header">Change Since Last Assessment</div>', unsafe_allow_html=True)
+            columns = st.columns(4)
+            for i, (category, (points, delta)) in enumerate(assessment_store.category_deltas(user_id).items()):
+                columns[i % 4].metric(category, f"{points}/{CATEGORY_MAX_POINTS[category]}", delta)
+            st.dataframe(
+                [{'Date': datetime.fromtimestamp(row['created_at']).strftime('%Y-%m-%d %H:%M'),
+                  'Score': row['lifestyle_score'],
+                  'Recommendations': {'model': "AI", 'fallback': "Built-in rules"}.get(row['source'], "Pending")}
+                 for row in reversed(history)],
+                use_container_width=True, hide_index=True,
+            )
+        else:
+            st.info("📈 Complete another assessment to start tracking your progress")
+        st.download_button(
+            label="📦 Export All Assessments (ZIP)",
+            data=functools.partial(export_history, user_id),
+            file_name=f"health_history_{datetime.now().strftime('%Y%m%d')}.zip",
+            mime="application/zip",
+        )
+        st.caption("🔖 Bookmark this page to keep your assessment history")
+    
+    if st.session_state.pending_sections:
+        section_texts = {}
+        rule_sections = fallback_sections(st.session_state.profile, st.session_state.score_breakdown)
+        used_fallback = False
+        started = time.perf_counter()
+        try:
+            completed = generate_sections(gemini_client, st.session_state.profile,
+                                          cache=recommendation_cache, namespace=cache_namespace())
+            for item in gemini_client.iterate_sync(completed, heartbeat=0.25):
+                if item is None:
+                    # Past the latency budget, fill the unfinished sections from the rules
+                    if (not used_fallback and settings.FALLBACK_BUDGET_SECONDS
+                            and time.perf_counter() - started > settings.FALLBACK_BUDGET_SECONDS):
+                        used_fallback = True
+                        METRICS.inc("advisor_fallback_served_total", reason="timeout")
+                        for section in REPORT_SECTIONS:
+                            if section.key not in section_texts:
+                                for slot in section_slots.get(section.key, []):
+                                    slot.markdown(section_html(section, rule_sections[section.key]), unsafe_allow_html=True)
+                        if not settings.FALLBACK_UPGRADE:
+                            break
+                    continue
+                section, text, error = item
+                if error is not None:
+                    used_fallback = True
+                    text = rule_sections[section.key]
+                    METRICS.inc("advisor_fallback_served_total", reason="error")
+                else:
+                    section_texts[section.key] = text
+                for slot in section_slots.get(section.key, []):
+                    slot.markdown(section_html(section, text), unsafe_allow_html=True)
+        except Exception as e:
+            METRICS.record_error("sections", e)
+            used_fallback = True
+        if used_fallback:
+            st.caption("⚡ Some sections show guidance from our built-in rules because the AI was slow or unavailable")
+        for section in REPORT_SECTIONS:
+            section_texts.setdefault(section.key, rule_sections[section.key])
+        st.session_state.recommendation_sections = section_texts
+        st.session_state.recommendations = assemble_report(section_texts)
+        st.session_state.recommendation_source = "fallback" if used_fallback else "model"
+        st.session_state.pending_sections = False
+        save_recommendations()
     
     # Download Report and New Assessment Buttons
     st.markdown("<br>", unsafe_allow_html=True)
     
-    # Create downloadable report with score breakdown
-    score_breakdown = st.session_state.get('score_breakdown', {})
-    breakdown_text = "\n".join([f"{category}: {score} points" for category, score in score_breakdown.items()])
-    
-    report_content = f"""
-LIFESTYLE & DIET ADVISOR - HEALTH REPORT
-{'='*50}
-
-Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
-
-LIFESTYLE SCORE: {st.session_state.lifestyle_score}/100
-
-SCORE BREAKDOWN:
-{breakdown_text}
-
-USER PROFILE:
-{'='*50}
-Age: {st.session_state.user_data.get('age', 'N/A')}
-Diet Type: {st.session_state.user_data.get('diet_type', 'N/A')}
-Meals per Day: {st.session_state.user_data.get('meals_per_day', 'N/A')}
-Water Intake: {st.session_state.user_data.get('water_intake', 'N/A')} glasses/day
-Sleep Hours: {st.session_state.user_data.get('sleep_hours', 'N/A')} hours/night
-Sleep Quality: {st.session_state.user_data.get('sleep_quality', 'N/A')}
-Exercise Frequency: {st.session_state.user_data.get('exercise_frequency', 'N/A')}
-Exercise Types: {', '.join(st.session_state.user_data.get('exercise_type', [])) if st.session_state.user_data.get('exercise_type') else 'None'}
-Stress Level: {st.session_state.user_data.get('stress_level', 'N/A')}
-Meditation: {st.session_state.user_data.get('meditation', 'N/A')}
-Smoking: {st.session_state.user_data.get('smoking', 'N/A')}
-Alcohol: {st.session_state.user_data.get('alcohol', 'N/A')}
-Health Goals: {st.session_state.user_data.get('health_goals', 'N/A')}
-
-PERSONALIZED RECOMMENDATIONS:
-{'='*50}
-{st.session_state.recommendations}
-
-{'='*50}
-Disclaimer: This report provides general wellness guidance. 
-Always consult healthcare professionals for medical advice.
-"""
+    # The report is only rendered when the button is clicked, in the chosen format
+    report_data = export.ReportData(
+        st.session_state.profile,
+        st.session_state.lifestyle_score,
+        st.session_state.score_breakdown,
+        st.session_state.recommendations,
+        datetime.now(),
+        st.session_state.recommendation_sections or None,
+    )
     
     # Buttons in same row
     col1, col2 = st.columns([1, 1])
     with col1:
+        export_format = st.selectbox("Report format", list(export.FORMATS),
+                                     format_func=lambda name: export.FORMATS[name].label, label_visibility="collapsed")
         st.download_button(
             label="📥 Download Report",
-            data=report_content,
-            file_name=f"health_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt",
-            mime="text/plain",
+            data=functools.partial(export.render, report_data, export_format),
+            file_name=export.file_name(report_data, export_format),
+            mime=export.FORMATS[export_format].mime,
             use_container_width=True,
-            type="primary"
+            type="primary",
+            # Still waiting on a background job
+            disabled=st.session_state.recommendations is None
         )
     with col2:
         if st.button("🔄 New Assessment", use_container_width=True, type="primary"):
-            st.session_state.show_form = True
-            st.session_state.recommendations = None
-            st.session_state.lifestyle_score = None
-            st.session_state.user_data = {}
-            st.session_state.score_breakdown = {}
-            st.rerun()
+            start_new_assessment()
 
 # Welcome screen
 if st.session_state.show_form and st.session_state.recommendations is None:
     st.markdown("---")
-    st.markdown("""
-    <div class="welcome-card">
-        <h3 style="color: #000000;">👋 Welcome!</h3>
-        <p style="color: #000000; margin: 1rem 0;">
-            Fill out the form above to receive personalized health and lifestyle recommendations powered by AI.
-        </p>
-        <p style="color: #000000;">
-            Our system analyzes your lifestyle habits and provides tailored advice for:
-        </p>
-        <ul style="color: #000000; text-align: left; margin: 1rem 0;">
-            <li>Diet and nutrition planning</li>
-            <li>Exercise recommendations</li>
-            <li>Sleep optimization tips</li>
-            <li>Stress management techniques</li>
-        </ul>
-    </div>
-    """, unsafe_allow_html=True)
+    st.markdown(ui_assets.WELCOME_CARD_HTML, unsafe_allow_html=True)
 
 # Footer
 st.markdown("---")
-st.markdown("""
-<div style='text-align: center; color: #000000; padding: 1rem 0;'>
-    <p><strong>Lifestyle & Diet Advisor</strong> | Powered by Google Gemini AI</p>
-    <p style='font-size: 0.9rem;'>⚠️ This tool provides general wellness guidance. Consult healthcare professionals for medical advice.</p>
-</div>
-""", unsafe_allow_html=True)
+st.markdown(ui_assets.FOOTER_HTML, unsafe_allow_html=True)
+
+METRICS.observe_stage("render_form" if st.session_state.show_form else "render_results", time.perf_counter() - page_started)
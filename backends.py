@@ -0,0 +1,196 @@
+# backends.py
+# Storage behind the recommendation cache's second tier, the Gemini rate
+# limits and the assessment history. MemoryBackend keeps them in the
+# process; SQLiteBackend keeps them in one SQLite database in WAL mode, so
+# every app process that opens the same file (several Streamlit workers
+# behind a load balancer, batch jobs) shares cache hits and history and
+# draws from a single global API quota.
+#
+# A backend stores string values with their creation time, implements
+# token buckets (take) and opens the history's database (history_database);
+# any store offering the same methods can be used. History is queried by
+# user and date with SQL, so history_database returns a DB-API connection
+# rather than going through the key-value methods.
+
+import os
+import sqlite3
+import threading
+import time
+
+import settings
+
+
+def connect(path, **kwargs):
+    """SQLite connection for a file several processes use: WAL journal and a busy timeout."""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    db = sqlite3.connect(path, check_same_thread=False, timeout=settings.SQLITE_BUSY_TIMEOUT_SECONDS, **kwargs)
+    # Readers don't block the writer and vice versa; NORMAL is durable enough under WAL
+    db.execute("PRAGMA journal_mode=WAL")
+    db.execute("PRAGMA synchronous=NORMAL")
+    return db
+
+
+def _refill(tokens, updated, now, rate_per_minute, capacity):
+    return min(capacity, tokens + max(now - updated, 0) * rate_per_minute / 60)
+
+
+class MemoryBackend:
+    """In-process backend; nothing is shared with other processes."""
+
+    shared = False
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._buckets = {}
+
+    def get(self, key):
+        """(value, created_at) of an entry, marking it as used, or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, created_at, _ = entry
+            self._entries[key] = (value, created_at, time.time())
+            return value, created_at
+
+    def set(self, key, value, created_at=None):
+        now = time.time()
+        with self._lock:
+            self._entries[key] = (value, created_at if created_at is not None else now, now)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def evict(self, created_before, max_entries):
+        """Drop entries created before `created_before`, then the least recently used past max_entries."""
+        with self._lock:
+            expired = [key for key, (_, created_at, _) in self._entries.items() if created_at <= created_before]
+            for key in expired:
+                del self._entries[key]
+            overflow = len(self._entries) - max_entries
+            if overflow > 0:
+                by_use = sorted(self._entries, key=lambda key: self._entries[key][2])
+                for key in by_use[:overflow]:
+                    del self._entries[key]
+            return len(expired) + max(overflow, 0)
+
+    def take(self, bucket, amount, rate_per_minute, capacity):
+        """Take `amount` tokens from a bucket; returns 0 on success or the seconds to wait before retrying."""
+        now = time.time()
+        with self._lock:
+            tokens, updated = self._buckets.get(bucket, (capacity, now))
+            tokens = _refill(tokens, updated, now, rate_per_minute, capacity)
+            if tokens >= amount:
+                self._buckets[bucket] = (tokens - amount, now)
+                return 0
+            self._buckets[bucket] = (tokens, now)
+            return (amount - tokens) / (rate_per_minute / 60)
+
+    def history_database(self):
+        """Connection for history.AssessmentStore; in memory, so the history ends with the process."""
+        return sqlite3.connect(":memory:", check_same_thread=False)
+
+
+class SQLiteBackend:
+    """Backend in a SQLite database in WAL mode, shared by every process that opens the same file."""
+
+    shared = True
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        # Autocommit; take() opens its own write transaction
+        self._db = connect(path, isolation_level=None)
+        self._db.executescript(
+            "CREATE TABLE IF NOT EXISTS recommendations ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+            "created_at REAL NOT NULL, accessed_at REAL NOT NULL);"
+            "CREATE INDEX IF NOT EXISTS idx_recommendations_accessed ON recommendations (accessed_at);"
+            "CREATE TABLE IF NOT EXISTS rate_limits ("
+            "bucket TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL);"
+        )
+
+    def get(self, key):
+        with self._lock:
+            row = self._db.execute(
+                "SELECT value, created_at FROM recommendations WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None:
+                self._db.execute("UPDATE recommendations SET accessed_at = ? WHERE key = ?", (time.time(), key))
+            return row
+
+    def set(self, key, value, created_at=None):
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO recommendations (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, value, created_at if created_at is not None else now, now),
+            )
+
+    def delete(self, key):
+        with self._lock:
+            self._db.execute("DELETE FROM recommendations WHERE key = ?", (key,))
+
+    def clear(self):
+        with self._lock:
+            self._db.execute("DELETE FROM recommendations")
+
+    def evict(self, created_before, max_entries):
+        with self._lock:
+            removed = self._db.execute(
+                "DELETE FROM recommendations WHERE created_at <= ?", (created_before,)
+            ).rowcount
+            (count,) = self._db.execute("SELECT COUNT(*) FROM recommendations").fetchone()
+            overflow = count - max_entries
+            if overflow > 0:
+                removed += self._db.execute(
+                    "DELETE FROM recommendations WHERE key IN ("
+                    "SELECT key FROM recommendations ORDER BY accessed_at LIMIT ?)",
+                    (overflow,),
+                ).rowcount
+            return max(removed, 0)
+
+    def take(self, bucket, amount, rate_per_minute, capacity):
+        now = time.time()
+        with self._lock:
+            # IMMEDIATE takes the write lock up front, so concurrent processes see each other's takes
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._db.execute(
+                    "SELECT tokens, updated FROM rate_limits WHERE bucket = ?", (bucket,)
+                ).fetchone()
+                tokens = _refill(*row, now, rate_per_minute, capacity) if row else capacity
+                wait = 0 if tokens >= amount else (amount - tokens) / (rate_per_minute / 60)
+                self._db.execute(
+                    "INSERT OR REPLACE INTO rate_limits (bucket, tokens, updated) VALUES (?, ?, ?)",
+                    (bucket, tokens - amount if not wait else tokens, now),
+                )
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+        return wait
+
+    def history_database(self):
+        """Connection for history.AssessmentStore to the shared database, so every process sees one history."""
+        return connect(self.path)
+
+
+def create_backend(kind=None, path=None):
+    """The backend selected by settings.BACKEND: None for "local", else a MemoryBackend or SQLiteBackend."""
+    kind = kind or settings.BACKEND
+    if kind == "local":
+        return None
+    if kind == "memory":
+        return MemoryBackend()
+    if kind == "sqlite":
+        return SQLiteBackend(path or settings.BACKEND_PATH)
+    raise ValueError(f"Unknown backend {kind!r}; expected local, memory or sqlite")
@@ -0,0 +1,194 @@
+# batch_advisor.py
+# Headless batch entry point: score profiles and generate recommendations
+# from a CSV or JSONL file without the Streamlit UI.
+#
+#   python batch_advisor.py profiles.csv --output results.jsonl
+#   python batch_advisor.py profiles.jsonl --score-only
+#
+# Input rows use the lifestyle_form field names (see options.PROFILE_FIELDS);
+# in CSV, exercise_type lists are separated with ";".
+
+import argparse
+import csv
+import json
+import sys
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import microbatch
+import settings
+import structured
+from backends import create_backend
+from cache import RecommendationCache, profile_key
+from gemini_client import AsyncGeminiClient
+from goal_index import GoalIndex
+from profiles import parse_profile
+from prompts import build_prompt, cache_namespace, generation_config
+from routing import model_for, model_tiers
+from report import build_report
+from scoring import calculate_score
+
+
+def read_records(path, input_format=None):
+    """Yield (row_number, record) pairs one at a time from a CSV or JSONL file."""
+    if input_format is None:
+        input_format = "csv" if path.lower().endswith(".csv") else "jsonl"
+
+    stream = sys.stdin if path == "-" else open(path, newline="", encoding="utf-8")
+    try:
+        if input_format == "csv":
+            for row_number, row in enumerate(csv.DictReader(stream), start=1):
+                yield row_number, row
+        else:
+            for row_number, line in enumerate(stream, start=1):
+                if line.strip():
+                    try:
+                        yield row_number, json.loads(line)
+                    except json.JSONDecodeError as e:
+                        yield row_number, e
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+
+
+def create_client(backend=None, model_name=None):
+    import google.generativeai as genai
+    from gemini_api_key import GEMINI_API_KEY
+
+    genai.configure(api_key=GEMINI_API_KEY)
+    model = genai.GenerativeModel(model_name or settings.GEMINI_MODEL, generation_config=generation_config())
+    return AsyncGeminiClient(model, backend=backend)
+
+
+def create_clients(backend=None):
+    """A client per configured model tier, by model name (see routing.py)."""
+    return {model_name: create_client(backend, model_name) for model_name in model_tiers().values()}
+
+
+class BatchAdvisor:
+    """Scores one profile and, unless score_only, fetches its recommendations."""
+
+    def __init__(self, client=None, cache=None, score_only=False, goal_index=None, clients=None, batchers=None):
+        self.client = client
+        self.cache = cache
+        self.score_only = score_only
+        self.goal_index = goal_index
+        # By model name: reports go to the profile's routed model, else to `client`
+        self.clients = clients or {}
+        self.batchers = batchers or {}
+
+    def process(self, row_number, record):
+        result = {'row': row_number}
+        try:
+            if isinstance(record, Exception):
+                raise ValueError(f"Invalid JSON: {record}")
+            user_data = parse_profile(record)
+            score, score_breakdown = calculate_score(user_data)
+            result.update(user_data=user_data.to_dict(), lifestyle_score=score, score_breakdown=score_breakdown)
+            if self.score_only:
+                return result
+
+            recommendations = self._recommend(user_data)
+            result['recommendations'] = recommendations
+            if structured.ENABLED:
+                # recommendations stays the model's JSON; sections and the report are markdown
+                result['sections'] = structured.parse_report(recommendations)
+                recommendations = structured.report_markdown(result['sections'])
+            result['report'] = build_report(user_data, score, score_breakdown, recommendations, datetime.now())
+        except Exception as e:
+            result['error'] = f"{type(e).__name__}: {e}"
+        return result
+
+    def _recommend(self, user_data):
+        cache_key = profile_key(user_data, namespace=cache_namespace())
+        if self.cache is not None:
+            cached = self.cache.get(cache_key)
+            if cached is None and self.goal_index is not None:
+                similar_key = self.goal_index.find(user_data, namespace=cache_namespace())
+                if similar_key is not None:
+                    cached = self.cache.get(similar_key)
+            if cached is not None:
+                return cached
+        model_name = model_for(user_data)
+        client = self.clients.get(model_name, self.client)
+        batcher = self.batchers.get(model_name)
+        if structured.ENABLED:
+            recommendations = client.generate_sync(structured.build_structured_prompt(user_data)).text
+            # Malformed reports raise here, before they can be cached
+            structured.parse_report(recommendations)
+        elif batcher is not None:
+            # Rows processed concurrently share multi-profile calls
+            recommendations = client.run_sync(batcher.generate(user_data)).text
+        else:
+            recommendations = client.generate_sync(build_prompt(user_data)).text
+        if self.cache is not None:
+            self.cache.set(cache_key, recommendations)
+            if self.goal_index is not None:
+                self.goal_index.add(user_data, cache_key, namespace=cache_namespace())
+        return recommendations
+
+
+def run_batch(records, advisor, concurrency):
+    """Process records with at most `concurrency` model calls in flight, yielding results in input order."""
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        pending = deque()
+        for row_number, record in records:
+            pending.append(executor.submit(advisor.process, row_number, record))
+            # Keep a bounded window so huge inputs are never fully buffered
+            if len(pending) >= concurrency * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score lifestyle profiles and generate recommendations in bulk.")
+    parser.add_argument("input", help="CSV or JSONL file of profiles ('-' for stdin)")
+    parser.add_argument("-o", "--output", default="-", help="JSONL file for results (default: stdout)")
+    parser.add_argument("--format", choices=["csv", "jsonl"], help="input format (default: from file extension)")
+    parser.add_argument("-c", "--concurrency", type=int, default=settings.BATCH_CONCURRENCY,
+                        help="maximum concurrent model calls")
+    parser.add_argument("--score-only", action="store_true", help="compute scores without calling the model")
+    parser.add_argument("--no-cache", action="store_true", help="bypass the recommendation cache")
+    args = parser.parse_args(argv)
+
+    if args.concurrency < 1:
+        parser.error("--concurrency must be at least 1")
+
+    # A shared backend makes batch runs draw from the same quota and cache as the app
+    backend = None if args.score_only else create_backend()
+    clients = {} if args.score_only else create_clients(backend)
+    cache = None if args.score_only or args.no_cache else RecommendationCache(backend=backend)
+    goal_index = GoalIndex() if cache is not None else None
+    batchers = {}
+    if microbatch.enabled():
+        batchers = {model_name: microbatch.MicroBatcher(client) for model_name, client in clients.items()}
+    advisor = BatchAdvisor(cache=cache, score_only=args.score_only, goal_index=goal_index,
+                           clients=clients, batchers=batchers)
+
+    output = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    processed = failed = 0
+    started = time.perf_counter()
+    try:
+        records = read_records(args.input, args.format)
+        for result in run_batch(records, advisor, args.concurrency):
+            output.write(json.dumps(result, ensure_ascii=False) + "\n")
+            processed += 1
+            if 'error' in result:
+                failed += 1
+                print(f"Row {result['row']}: {result['error']}", file=sys.stderr)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+        for client in clients.values():
+            client.close()
+
+    elapsed = time.perf_counter() - started
+    print(f"Processed {processed} profiles ({failed} failed) in {elapsed:.1f}s", file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
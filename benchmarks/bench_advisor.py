@@ -0,0 +1,286 @@
+# benchmarks/bench_advisor.py
+# Offline benchmark harness for the advisor. Runs against FakeGenerativeModel,
+# so no API key or quota is needed:
+#
+#   python -m benchmarks.bench_advisor --profiles 5000 --latency lognormal:0.05,0.5
+#   python -m benchmarks.bench_advisor --scenarios submit,ui --ui-profiles 20 --json bench.json
+#
+# Scenarios:
+#   scoring  calculate_score() loop vs. vectorized score_batch()
+#   submit   the app's submit pipeline (prompt, cache, client, scoring) from concurrent sessions
+#   stream   time to first chunk and total time of streamed responses
+#   batch    batch_advisor.run_batch() over all profiles
+#   mealplan meal_plan.plan_meals() per profile (no model calls)
+#   ui       the real Streamlit script driven through streamlit.testing's AppTest
+
+import argparse
+import json
+import os
+import resource
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+import settings
+from batch_advisor import BatchAdvisor, run_batch
+from benchmarks.fake_gemini import FakeGenerativeModel, install
+from benchmarks.synthetic_profiles import synthetic_profiles
+from cache import RecommendationCache, profile_key
+from gemini_client import AsyncGeminiClient
+from meal_plan import plan_meals
+from microbatch import MicroBatcher
+from nutrients import FoodTable
+from prompts import build_prompt, cache_namespace, estimate_tokens
+from scoring import calculate_score, encode_profiles, score_batch
+
+ALL_SCENARIOS = ("scoring", "submit", "stream", "batch", "mealplan", "ui")
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+
+
+def percentile(samples, q):
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))]
+
+
+def summarize(name, latencies, elapsed, failures=0, requests=None, **extra):
+    requests = len(latencies) + failures if requests is None else requests
+    result = {
+        'scenario': name,
+        'requests': requests,
+        'failures': failures,
+        'elapsed_s': round(elapsed, 4),
+        'requests_per_s': round(requests / elapsed, 1) if elapsed else None,
+    }
+    for q in (50, 95, 99):
+        value = percentile(latencies, q)
+        result[f'p{q}_ms'] = round(value * 1000, 2) if value is not None else None
+    result.update(extra)
+    return result
+
+
+def make_client(args):
+    model = FakeGenerativeModel(latency=args.latency, failure_rate=args.failure_rate,
+                                failure_code=args.failure_code, seed=args.seed)
+    client = AsyncGeminiClient(model, requests_per_minute=args.rpm, tokens_per_minute=args.tpm,
+                               backoff_base=args.backoff_base, hedge_max_ratio=args.hedge_max_ratio)
+    return model, client
+
+
+def bench_scoring(profiles, args):
+    started = time.perf_counter()
+    for profile in profiles:
+        calculate_score(profile)
+    loop_elapsed = time.perf_counter() - started
+
+    columns = encode_profiles(profiles)
+    started = time.perf_counter()
+    score_batch(columns)
+    batch_elapsed = time.perf_counter() - started
+    # requests/s is the calculate_score() loop; batch_profiles_per_s the vectorized path
+    return summarize("scoring", [], loop_elapsed, requests=len(profiles),
+                     batch_profiles_per_s=round(len(profiles) / batch_elapsed) if batch_elapsed else None)
+
+
+def bench_submit(profiles, args):
+    model, client = make_client(args)
+    cache = RecommendationCache(path="") if args.cache else None
+
+    batcher = None
+    if args.microbatch_window_ms > 0:
+        batcher = MicroBatcher(client, window_seconds=args.microbatch_window_ms / 1000,
+                               max_size=args.microbatch_size, mode=args.prompt_mode)
+
+    def submit(user_data):
+        started = time.perf_counter()
+        prompt = build_prompt(user_data, mode=args.prompt_mode)
+        key = profile_key(user_data, namespace=cache_namespace(model.model_name, args.prompt_mode))
+        text = cache.get(key) if cache is not None else None
+        if text is None and batcher is not None:
+            text = client.run_sync(batcher.generate(user_data)).text
+        elif text is None:
+            text = client.generate_sync(prompt).text
+            if cache is not None:
+                cache.set(key, text)
+        calculate_score(user_data)
+        return time.perf_counter() - started
+
+    latencies, failures = run_concurrently(submit, profiles, args.sessions)
+    client.close()
+    prompt_tokens = [estimate_tokens(build_prompt(user_data, mode=args.prompt_mode)) for user_data in profiles]
+    return latencies, failures, {'model_calls': model.calls, 'retries': client.stats['retries'],
+                                 'p50_prompt_tokens': percentile(prompt_tokens, 50),
+                                 'prompt_tokens_sent': model.prompt_tokens, 'hedges': client.stats['hedges']}
+
+
+def bench_stream(profiles, args):
+    model, client = make_client(args)
+    first_chunk = []
+
+    def stream(user_data):
+        started = time.perf_counter()
+        for i, _ in enumerate(client.stream_sync(build_prompt(user_data, mode=args.prompt_mode))):
+            if i == 0:
+                first_chunk.append(time.perf_counter() - started)
+        return time.perf_counter() - started
+
+    latencies, failures = run_concurrently(stream, profiles, args.sessions)
+    client.close()
+    ttft, ttft_p99 = percentile(first_chunk, 50), percentile(first_chunk, 99)
+    return latencies, failures, {
+        'model_calls': model.calls,
+        'p50_first_chunk_ms': round(ttft * 1000, 2) if ttft is not None else None,
+        'p99_first_chunk_ms': round(ttft_p99 * 1000, 2) if ttft_p99 is not None else None,
+        'hedges': client.stats['hedges'],
+    }
+
+
+def bench_batch(profiles, args):
+    model, client = make_client(args)
+    advisor = BatchAdvisor(client=client)
+    records = ((i, profile) for i, profile in enumerate(profiles, start=1))
+    rows = failures = 0
+    for result in run_batch(records, advisor, args.concurrency):
+        rows += 1
+        failures += 'error' in result
+    client.close()
+    return [], failures, {'requests': rows, 'model_calls': model.calls, 'concurrency': args.concurrency}
+
+
+def bench_mealplan(profiles, args):
+    foods = FoodTable.load()
+    latencies = []
+    kcal_errors = []
+    for user_data in profiles:
+        started = time.perf_counter()
+        plan = plan_meals(user_data, foods)
+        latencies.append(time.perf_counter() - started)
+        kcal_errors.append(abs(plan.totals['kcal'] / plan.targets['kcal'] - 1))
+    return latencies, 0, {'mean_kcal_error_pct': round(100 * sum(kcal_errors) / len(kcal_errors), 1)}
+
+
+def bench_ui(profiles, args):
+    from streamlit.testing.v1 import AppTest
+
+    install(latency=args.latency, failure_rate=args.failure_rate, failure_code=args.failure_code, seed=args.seed)
+    latencies = []
+    failures = 0
+    for user_data in profiles[:args.ui_profiles]:
+        at = AppTest.from_file(APP_PATH, default_timeout=60).run()
+        by_label = {widget.label: widget for kind in (at.selectbox, at.slider, at.select_slider, at.multiselect,
+                                                      at.radio, at.number_input, at.text_area) for widget in kind}
+        by_label["Primary Diet Type"].set_value(user_data['diet_type'])
+        by_label["Meals per Day"].set_value(user_data['meals_per_day'])
+        by_label["Water Intake (glasses/day)"].set_value(user_data['water_intake'])
+        by_label["Average Sleep (hours/night)"].set_value(user_data['sleep_hours'])
+        by_label["Sleep Quality"].set_value(user_data['sleep_quality'])
+        by_label["Exercise Frequency"].set_value(user_data['exercise_frequency'])
+        by_label["Exercise Types"].set_value(user_data['exercise_type'])
+        by_label["Stress Level"].set_value(user_data['stress_level'])
+        by_label["Do you meditate?"].set_value(user_data['meditation'])
+        by_label["Smoking Status"].set_value(user_data['smoking'])
+        by_label["Alcohol Consumption"].set_value(user_data['alcohol'])
+        by_label["Age"].set_value(user_data['age'])
+        by_label["Health Goals (optional)"].set_value(user_data['health_goals'])
+
+        started = time.perf_counter()
+        at.button[0].click().run()
+        elapsed = time.perf_counter() - started
+        if at.exception or at.session_state.recommendations is None:
+            failures += 1
+        else:
+            latencies.append(elapsed)
+    return latencies, failures, {}
+
+
+def run_concurrently(function, items, workers):
+    latencies = []
+    failures = 0
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for future in [executor.submit(function, item) for item in items]:
+            try:
+                latencies.append(future.result())
+            except Exception:
+                failures += 1
+    return latencies, failures
+
+
+SCENARIOS = {
+    'submit': bench_submit,
+    'stream': bench_stream,
+    'batch': bench_batch,
+    'mealplan': bench_mealplan,
+    'ui': bench_ui,
+}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the advisor against a local Gemini stand-in.")
+    parser.add_argument("--scenarios", default="scoring,submit,stream,batch",
+                        help=f"comma-separated subset of {','.join(ALL_SCENARIOS)}")
+    parser.add_argument("--profiles", type=int, default=2000, help="synthetic profiles per scenario")
+    parser.add_argument("--ui-profiles", type=int, default=20, help="profiles for the (slow) ui scenario")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--latency", default="fixed:0.05", help="fixed:S, uniform:A,B or lognormal:MEDIAN,SIGMA")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="probability of an injected API error")
+    parser.add_argument("--failure-code", type=int, default=503, help="status code of injected errors")
+    parser.add_argument("--sessions", type=int, default=32, help="concurrent sessions for submit/stream")
+    parser.add_argument("--concurrency", type=int, default=settings.BATCH_CONCURRENCY, help="batch concurrency")
+    parser.add_argument("--rpm", type=int, default=0, help="client requests/min limit (0 = unlimited)")
+    parser.add_argument("--tpm", type=int, default=0, help="client tokens/min limit (0 = unlimited)")
+    parser.add_argument("--backoff-base", type=float, default=0.01, help="client retry backoff base (s)")
+    parser.add_argument("--prompt-mode", default=settings.PROMPT_MODE, help="prompt template (full or compact)")
+    parser.add_argument("--hedge-max-ratio", type=float, default=settings.GEMINI_HEDGE_MAX_RATIO,
+                        help="share of calls that may get a hedged duplicate (0 = off)")
+    parser.add_argument("--microbatch-window-ms", type=int, default=0,
+                        help="micro-batch submit requests arriving within this window (0 = off)")
+    parser.add_argument("--microbatch-size", type=int, default=settings.MICROBATCH_MAX_SIZE,
+                        help="profiles per micro-batch")
+    parser.add_argument("--cache", action="store_true", help="use an in-memory recommendation cache in submit")
+    parser.add_argument("--trace-memory", action="store_true", help="report peak Python allocations per scenario")
+    parser.add_argument("--json", help="also write results to this JSON file")
+    args = parser.parse_args(argv)
+
+    scenarios = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = set(scenarios) - set(ALL_SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    profiles = synthetic_profiles(args.profiles, seed=args.seed)
+    results = []
+    for name in scenarios:
+        if args.trace_memory:
+            tracemalloc.start()
+        started = time.perf_counter()
+        if name == "scoring":
+            result = bench_scoring(profiles, args)
+        else:
+            latencies, failures, extra = SCENARIOS[name](profiles, args)
+            result = summarize(name, latencies, time.perf_counter() - started, failures, **extra)
+        if args.trace_memory:
+            result['peak_alloc_mb'] = round(tracemalloc.get_traced_memory()[1] / 2 ** 20, 1)
+            tracemalloc.stop()
+        results.append(result)
+        print(json.dumps(result), file=sys.stderr)
+
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    max_rss_mb = max_rss / 2 ** 20 if sys.platform == "darwin" else max_rss / 2 ** 10
+
+    print(f"{'scenario':<10}{'requests':>10}{'failed':>8}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for result in results:
+        print(f"{result['scenario']:<10}{result['requests']:>10}{result['failures']:>8}"
+              + "".join(f"{'-' if result[key] is None else result[key]:>10}"
+                        for key in ('requests_per_s', 'p50_ms', 'p95_ms', 'p99_ms')))
+    print(f"peak RSS: {max_rss_mb:.0f} MB")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({'args': vars(args), 'results': results, 'peak_rss_mb': round(max_rss_mb, 1)}, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
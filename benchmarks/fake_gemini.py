@@ -0,0 +1,167 @@
+# benchmarks/fake_gemini.py
+# Local stand-in for genai.GenerativeModel with configurable latency,
+# streaming and failure injection, so the advisor can be benchmarked
+# offline without API keys or quota.
+
+import asyncio
+import json
+import random
+import re
+import threading
+import time
+from types import SimpleNamespace
+
+DEFAULT_TEXT = (
+    "**Diet & Nutrition:**\n- Eat more vegetables and whole grains\n- Keep portions moderate\n\n"
+    "**Hydration:**\n- Drink 8-10 glasses of water a day\n\n"
+    "**Sleep Optimization:**\n- Keep a consistent bedtime\n\n"
+    "**Exercise Plan:**\n- 30 minutes of activity, 5 days a week\n\n"
+    "**Stress Management:**\n- Short breathing breaks twice a day\n\n"
+    "**Habit Modifications:**\n- Change one habit at a time\n"
+)
+
+# Returned when the model is configured for JSON output (structured reports)
+DEFAULT_JSON_TEXT = json.dumps({
+    'score_analysis': {'estimated_score': 70, 'summary': "A reasonable base with room to improve.",
+                       'positives': ["Regular meals"], 'negatives': ["Low water intake"]},
+    'recommendations': {
+        'diet': ["Eat more vegetables and whole grains", "Keep portions moderate"],
+        'hydration': ["Drink 8-10 glasses of water a day"],
+        'sleep': ["Keep a consistent bedtime"],
+        'exercise': ["30 minutes of activity, 5 days a week"],
+        'stress': ["Short breathing breaks twice a day"],
+        'habits': ["Change one habit at a time"],
+    },
+    'action_plan': ["Carry a water bottle", "Walk after dinner"],
+    'risks': ["See a doctor about persistent fatigue"],
+})
+
+
+class FakeAPIError(Exception):
+    """Injected failure carrying an HTTP-style status code, like google.api_core errors."""
+
+    def __init__(self, code, message="injected failure"):
+        super().__init__(f"{code} {message}")
+        self.code = code
+
+
+def latency_sampler(spec):
+    """Build a sampler from "fixed:S", "uniform:A,B" or "lognormal:MEDIAN,SIGMA" (seconds)."""
+    kind, _, args = spec.partition(":")
+    values = [float(value) for value in args.split(",") if value]
+    if kind == "fixed":
+        return lambda rng: values[0]
+    if kind == "uniform":
+        return lambda rng: rng.uniform(values[0], values[1])
+    if kind == "lognormal":
+        median, sigma = values
+        return lambda rng: median * rng.lognormvariate(0, sigma)
+    raise ValueError(f"Unknown latency spec: {spec!r}")
+
+
+# Profile headers of multi-profile prompts (microbatch.py)
+_PROFILE_HEADER = re.compile(r"^PROFILE \d+:$", re.MULTILINE)
+
+
+def _response(text, prompt):
+    usage = SimpleNamespace(
+        prompt_token_count=len(prompt) // 4,
+        candidates_token_count=len(text) // 4,
+        total_token_count=(len(prompt) + len(text)) // 4,
+    )
+    return SimpleNamespace(text=text, usage_metadata=usage)
+
+
+class FakeGenerativeModel:
+    """Drop-in for genai.GenerativeModel's generate_content(_async) API.
+
+    latency: seconds per call as a spec string (see latency_sampler)
+    failure_rate: probability that a call raises FakeAPIError(failure_code)
+    chunk_size: characters per streamed chunk; first_chunk_fraction of the
+    latency elapses before the first chunk, the rest is spread over the others
+    text: the response; defaults to a markdown report, or a JSON one when
+    generation_config asks for application/json. Multi-profile prompts get
+    one delimited copy per profile
+    """
+
+    def __init__(self, model_name="fake-gemini", latency="fixed:0.05", failure_rate=0.0,
+                 failure_code=503, chunk_size=64, first_chunk_fraction=0.3, text=None, seed=None,
+                 generation_config=None):
+        self.model_name = model_name
+        self.sample_latency = latency_sampler(latency)
+        self.failure_rate = failure_rate
+        self.failure_code = failure_code
+        self.chunk_size = chunk_size
+        self.first_chunk_fraction = first_chunk_fraction
+        if text is None:
+            json_output = (generation_config or {}).get('response_mime_type') == "application/json"
+            text = DEFAULT_JSON_TEXT if json_output else DEFAULT_TEXT
+        self.text = text
+        self.calls = 0
+        self.prompt_tokens = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _plan(self, prompt):
+        with self._lock:
+            self.calls += 1
+            self.prompt_tokens += len(prompt) // 4
+            return self.sample_latency(self._rng), self._rng.random() < self.failure_rate
+
+    def _reply(self, prompt):
+        # Multi-profile prompts get one delimited copy of the text per profile
+        count = len(_PROFILE_HEADER.findall(prompt)) if isinstance(prompt, str) else 0
+        if count < 2:
+            return self.text
+        return "\n\n".join(f"=== REPORT {number} ===\n{self.text}" for number in range(1, count + 1))
+
+    def _chunks(self):
+        return [self.text[i:i + self.chunk_size] for i in range(0, len(self.text), self.chunk_size)]
+
+    def generate_content(self, prompt, stream=False, **kwargs):
+        latency, fail = self._plan(prompt)
+        if not stream:
+            time.sleep(latency)
+            if fail:
+                raise FakeAPIError(self.failure_code)
+            return _response(self._reply(prompt), prompt)
+
+        def chunks():
+            pieces = self._chunks()
+            time.sleep(latency * self.first_chunk_fraction)
+            if fail:
+                raise FakeAPIError(self.failure_code)
+            for i, piece in enumerate(pieces):
+                if i:
+                    time.sleep(latency * (1 - self.first_chunk_fraction) / max(len(pieces) - 1, 1))
+                yield _response(piece, prompt)
+        return chunks()
+
+    async def generate_content_async(self, prompt, stream=False, **kwargs):
+        latency, fail = self._plan(prompt)
+        if not stream:
+            await asyncio.sleep(latency)
+            if fail:
+                raise FakeAPIError(self.failure_code)
+            return _response(self._reply(prompt), prompt)
+
+        await asyncio.sleep(latency * self.first_chunk_fraction)
+        if fail:
+            raise FakeAPIError(self.failure_code)
+        pieces = self._chunks()
+
+        async def chunks():
+            for i, piece in enumerate(pieces):
+                if i:
+                    await asyncio.sleep(latency * (1 - self.first_chunk_fraction) / max(len(pieces) - 1, 1))
+                yield _response(piece, prompt)
+        return chunks()
+
+
+def install(**model_kwargs):
+    """Patch google.generativeai so app.py and batch_advisor.py use FakeGenerativeModel."""
+    import google.generativeai as genai
+
+    genai.configure = lambda **kwargs: None
+    genai.GenerativeModel = lambda model_name, generation_config=None, **kwargs: FakeGenerativeModel(
+        model_name, generation_config=generation_config, **model_kwargs)
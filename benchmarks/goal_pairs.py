@@ -0,0 +1,91 @@
+# benchmarks/goal_pairs.py
+# Labelled health-goal pairs for calibrating ADVISOR_GOAL_SIMILARITY_THRESHOLD:
+# True when one recommendation answers both goals. Prints each pair's
+# similarity and how many pairs a threshold reuses rightly and wrongly:
+#
+#   python -m benchmarks.goal_pairs --threshold 0.8
+
+import argparse
+
+import settings
+from goal_index import goal_signature, goal_vector
+
+GOAL_PAIRS = (
+    # Same request, different wording
+    ("lose weight", "Weight loss", True),
+    ("Weight loss", "I want to lose some weight", True),
+    ("lose weight", "Losing weight", True),
+    ("weight loss", "Weight-loss", True),
+    ("Muscle gain", "gain muscle", True),
+    ("Muscle gain", "Build muscle", True),
+    ("Better energy", "more energy", True),
+    ("Better energy", "I need more energy", True),
+    ("Sleep better", "better sleep", True),
+    ("Sleep better", "Help me sleep better please", True),
+    ("Reduce stress", "Stress reduction", True),
+    ("Reduce stress", "less stress", True),
+    ("Lower my blood pressure", "lower blood pressure", True),
+    ("Lower my blood pressure", "reduce blood pressure", True),
+    ("Run a half marathon", "half marathon", True),
+    ("General wellness", "overall wellness", True),
+    ("lose 5 kg", "Lose 5kg", True),
+    ("lose 10 kg in 3 months", "lose 10kg in 3 months", True),
+    ("Fat loss", "lose fat", True),
+    ("gain weight", "Weight gain", True),
+    ("gain weight", "put on weight", True),
+    ("More energy", "Increase energy levels", True),
+    ("Better health", "general wellbeing", True),
+    ("Build strength", "get stronger", True),
+    # Different requests
+    ("lose weight", "gain weight", False),
+    ("Weight loss", "Weight gain", False),
+    ("lose weight", "Muscle gain", False),
+    ("Muscle gain", "Fat loss", False),
+    ("Better energy", "Sleep better", False),
+    ("Sleep better", "Reduce stress", False),
+    ("Run a half marathon", "Run a marathon", False),
+    ("Run a half marathon", "Run a 5k", False),
+    ("Lower my blood pressure", "Lower my cholesterol", False),
+    ("Lower my blood pressure", "Lower my blood sugar", False),
+    ("lower blood sugar", "lower cholesterol", False),
+    ("Reduce stress", "Reduce inflammation", False),
+    ("General wellness", "General strength", False),
+    ("lose belly fat", "lose weight", False),
+    ("improve digestion", "improve endurance", False),
+    ("eat more protein", "eat less sugar", False),
+    ("lose 5 kg", "lose 50 kg", False),
+    ("lose 10 kg in 3 months", "lose 10 kg in 6 months", False),
+    ("eat more protein", "eat less protein", False),
+    ("improve sleep", "improve digestion", False),
+    ("build muscle", "build endurance", False),
+    ("gain weight", "gain muscle", False),
+    ("lower blood pressure", "raise blood pressure", False),
+)
+
+
+def similarity(first, second):
+    """Similarity the goal index sees for two goals; 0 when their numbers or directions differ."""
+    if goal_signature(first) != goal_signature(second):
+        return 0.0
+    return float(goal_vector(first) @ goal_vector(second))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score the labelled goal pairs at a similarity threshold")
+    parser.add_argument("--threshold", type=float, default=settings.GOAL_SIMILARITY_THRESHOLD)
+    args = parser.parse_args(argv)
+    scored = sorted(((similarity(first, second), first, second, same) for first, second, same in GOAL_PAIRS),
+                    reverse=True)
+    for score, first, second, same in scored:
+        print(f"{score:6.3f}  {'same' if same else 'diff':4}  {first!r} / {second!r}")
+    # A wrong reuse serves another person's advice; a missed one only costs a model call
+    highest_different = max(score for score, _, _, same in scored if not same)
+    reused = sum(1 for score, _, _, same in scored if same and score >= args.threshold)
+    wrong = sum(1 for score, _, _, same in scored if not same and score >= args.threshold)
+    print(f"\nthresholds above {highest_different:.3f} reuse no 'different' pair")
+    print(f"at {args.threshold}: {reused}/{sum(same for _, _, same in GOAL_PAIRS)} 'same' pairs reused, "
+          f"{wrong} 'different' pairs wrongly reused")
+
+
+if __name__ == "__main__":
+    main()
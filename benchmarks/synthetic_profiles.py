@@ -0,0 +1,36 @@
+# benchmarks/synthetic_profiles.py
+# Deterministic synthetic lifestyle profiles covering every option of the
+# lifestyle_form widgets.
+
+import random
+
+import options
+
+HEALTH_GOALS = (
+    "", "Weight loss", "lose weight", "Muscle gain", "Better energy", "Sleep better",
+    "Reduce stress", "Run a half marathon", "Lower my blood pressure", "General wellness",
+)
+
+
+def _column(values, count, rng):
+    # Every value appears (once count >= len(values)), in shuffled combinations
+    column = [values[i % len(values)] for i in range(count)]
+    rng.shuffle(column)
+    return column
+
+
+def synthetic_profiles(count, seed=0):
+    """Return `count` user_data dicts; with count >= 128 every option and exercise-type subset occurs."""
+    rng = random.Random(seed)
+    columns = {}
+    for field, (low, high, _) in options.NUMERIC_FIELDS.items():
+        columns[field] = _column(range(low, high + 1), count, rng)
+    for field, vocabulary in options.CATEGORICAL_FIELDS.items():
+        columns[field] = _column(vocabulary, count, rng)
+    # Exercise types as bitmasks over options.EXERCISE_TYPES
+    columns['exercise_type'] = [
+        [name for bit, name in enumerate(options.EXERCISE_TYPES) if mask >> bit & 1]
+        for mask in _column(range(2 ** len(options.EXERCISE_TYPES)), count, rng)
+    ]
+    columns['health_goals'] = _column(HEALTH_GOALS, count, rng)
+    return [{field: columns[field][i] for field in options.PROFILE_FIELDS} for i in range(count)]
@@ -0,0 +1,106 @@
+# cache.py
+# Two-tier cache for model recommendations: an in-memory LRU in front of
+# a SQLite file or shared backend, keyed on a canonical hash of the
+# lifestyle profile.
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+import settings
+from backends import SQLiteBackend
+from profiles import parse_profile
+
+
+def normalize_profile(user_data):
+    """Return a canonical copy of a profile dict for hashing."""
+    profile = dict(user_data)
+    goals = profile.get('health_goals') or ""
+    profile['health_goals'] = " ".join(goals.split()).lower()
+    # Multiselect order is click order, not meaning
+    profile['exercise_type'] = sorted(profile.get('exercise_type') or [])
+    return profile
+
+
+def profile_key(user_data, namespace=""):
+    """Stable cache key for a profile (Profile or user_data dict); namespace separates models/prompts."""
+    profile = parse_profile(user_data)
+    # Binary form is canonical already (exercise types are a bitmask); only goals need folding
+    profile = profile.replace(health_goals=" ".join(profile.health_goals.split()).lower())
+    return hashlib.sha256(namespace.encode("utf-8") + b"|" + profile.to_bytes()).hexdigest()
+
+
+class RecommendationCache:
+    """Memory LRU in front of a backend (see backends.py), with TTL, size-based eviction and counters.
+
+    Without a `backend`, the second tier is a SQLite file at `path`; an
+    empty path leaves the cache memory-only. A shared backend makes the
+    second tier common to every process using it.
+    """
+
+    def __init__(self, path=None, ttl_seconds=None, memory_entries=None, disk_entries=None, backend=None):
+        self.path = path if path is not None else settings.CACHE_PATH
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else settings.CACHE_TTL_SECONDS
+        self.memory_entries = memory_entries if memory_entries is not None else settings.CACHE_MEMORY_ENTRIES
+        self.disk_entries = disk_entries if disk_entries is not None else settings.CACHE_DISK_ENTRIES
+
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()
+        self.stats = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0, 'sets': 0, 'evictions': 0}
+
+        self.backend = backend
+        if self.backend is None and self.path:
+            self.backend = SQLiteBackend(self.path)
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                created_at, value = entry
+                if now - created_at < self.ttl_seconds:
+                    self._memory.move_to_end(key)
+                    self.stats['memory_hits'] += 1
+                    return value
+                del self._memory[key]
+
+            if self.backend is not None:
+                row = self.backend.get(key)
+                if row is not None:
+                    value, created_at = row
+                    if now - created_at < self.ttl_seconds:
+                        self._remember(key, created_at, value)
+                        self.stats['disk_hits'] += 1
+                        return value
+                    self.backend.delete(key)
+
+            self.stats['misses'] += 1
+            return None
+
+    def set(self, key, value):
+        now = time.time()
+        with self._lock:
+            self._remember(key, now, value)
+            self.stats['sets'] += 1
+            if self.backend is not None:
+                self.backend.set(key, value, now)
+                self.stats['evictions'] += self.backend.evict(now - self.ttl_seconds, self.disk_entries)
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            if self.backend is not None:
+                self.backend.clear()
+
+    def hit_rate(self):
+        hits = self.stats['memory_hits'] + self.stats['disk_hits']
+        total = hits + self.stats['misses']
+        return hits / total if total else 0.0
+
+    def _remember(self, key, created_at, value):
+        self._memory[key] = (created_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+            self.stats['evictions'] += 1
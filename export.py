@@ -0,0 +1,274 @@
+# export.py
+# Report export in several formats, rendered only when a download is
+# requested, and bulk export of stored assessments as a streamed ZIP:
+#
+#   python export.py --output history.zip --formats txt,html,json,csv
+#   python export.py --user 3f2a... --formats md --output - > my_reports.zip
+#
+# ZIP entries are written one assessment at a time, so the archive can go
+# to an unseekable stream and memory use doesn't grow with the history.
+
+import argparse
+import csv
+import html
+import io
+import json
+import re
+import sys
+import tempfile
+import zipfile
+from collections import namedtuple
+from datetime import datetime
+
+import options
+from metrics import METRICS
+from profiles import parse_profile
+from report import build_report
+from scoring import SCORE_CATEGORIES
+
+# sections: per-section markdown of a structured report, when there is one
+ReportData = namedtuple('ReportData',
+                        ['profile', 'lifestyle_score', 'score_breakdown', 'recommendations', 'generated_at', 'sections'],
+                        defaults=(None, None))
+
+ExportFormat = namedtuple('ExportFormat', ['label', 'extension', 'mime', 'render'])
+
+# Profile field labels, as in the TXT report
+PROFILE_LABELS = {
+    'age': "Age",
+    'diet_type': "Diet Type",
+    'meals_per_day': "Meals per Day",
+    'water_intake': "Water Intake (glasses/day)",
+    'sleep_hours': "Sleep Hours",
+    'sleep_quality': "Sleep Quality",
+    'exercise_frequency': "Exercise Frequency",
+    'exercise_type': "Exercise Types",
+    'stress_level': "Stress Level",
+    'meditation': "Meditation",
+    'smoking': "Smoking",
+    'alcohol': "Alcohol",
+    'health_goals': "Health Goals",
+}
+
+# Column order of CSV exports, one row per report
+CSV_COLUMNS = (('generated_at', 'lifestyle_score') + options.PROFILE_FIELDS + SCORE_CATEGORIES
+               + ('recommendations',))
+
+
+def _generated_at(report):
+    return report.generated_at or datetime.now()
+
+
+def _profile_rows(profile):
+    return [(PROFILE_LABELS[field], (", ".join(value) or "None") if isinstance(value, list) else value)
+            for field, value in profile.items()]
+
+
+def render_txt(report):
+    return build_report(report.profile, report.lifestyle_score, report.score_breakdown,
+                        report.recommendations or "", _generated_at(report))
+
+
+def render_markdown(report):
+    lines = [
+        "# Lifestyle & Diet Advisor - Health Report",
+        "",
+        f"Generated on {_generated_at(report):%Y-%m-%d %H:%M:%S}",
+        "",
+        f"## Lifestyle Score: {report.lifestyle_score}/100",
+        "",
+        "| Category | Points |",
+        "|----------|--------|",
+    ]
+    lines += [f"| {category} | {points} |" for category, points in report.score_breakdown.items()]
+    lines += ["", "## Your Profile", ""]
+    lines += [f"- **{label}:** {value if value != '' else '-'}" for label, value in _profile_rows(report.profile)]
+    lines += ["", "## Personalized Recommendations", "", report.recommendations or "", "", "---", "",
+              "*This report provides general wellness guidance. "
+              "Always consult healthcare professionals for medical advice.*", ""]
+    return "\n".join(lines)
+
+
+_BOLD = re.compile(r"\*\*(.+?)\*\*")
+_ITALIC = re.compile(r"(?<!\*)\*(?!\*)(.+?)(?<!\*)\*(?!\*)")
+
+
+def _inline_html(text):
+    return _ITALIC.sub(r"<em>\1</em>", _BOLD.sub(r"<strong>\1</strong>", html.escape(text)))
+
+
+def markdown_html(text):
+    """HTML for the markdown subset reports use: paragraphs, bullet lists, bold and italics."""
+    blocks = []
+    for block in re.split(r"\n\s*\n", (text or "").strip()):
+        items, paragraph = [], []
+        for line in block.splitlines():
+            stripped = line.strip()
+            if stripped.startswith(("- ", "* ", "• ")):
+                items.append(f"<li>{_inline_html(stripped[2:])}</li>")
+            elif items and stripped:
+                # Continuation of the previous bullet
+                items[-1] = items[-1][:-5] + " " + _inline_html(stripped) + "</li>"
+            elif stripped:
+                paragraph.append(_inline_html(stripped))
+        if paragraph:
+            blocks.append(f"<p>{'<br>'.join(paragraph)}</p>")
+        if items:
+            blocks.append(f"<ul>{''.join(items)}</ul>")
+    return "\n".join(blocks)
+
+
+def render_html(report):
+    breakdown = "".join(f"<tr><td>{html.escape(category)}</td><td>{points}</td></tr>"
+                        for category, points in report.score_breakdown.items())
+    profile = "".join(f"<tr><th>{html.escape(label)}</th><td>{html.escape(str(value))}</td></tr>"
+                      for label, value in _profile_rows(report.profile))
+    return f"""<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<title>Health Report - {_generated_at(report):%Y-%m-%d}</title>
+<style>
+body {{ font-family: sans-serif; max-width: 50rem; margin: 2rem auto; color: #1a202c; line-height: 1.5; }}
+table {{ border-collapse: collapse; margin-bottom: 1rem; }}
+th, td {{ border: 1px solid #e2e8f0; padding: 0.3rem 0.8rem; text-align: left; }}
+.score {{ font-size: 2.5rem; font-weight: bold; color: #4299e1; }}
+</style>
+</head>
+<body>
+<h1>Lifestyle &amp; Diet Advisor - Health Report</h1>
+<p>Generated on {_generated_at(report):%Y-%m-%d %H:%M:%S}</p>
+<h2>Lifestyle Score</h2>
+<p class="score">{report.lifestyle_score}/100</p>
+<table><tr><th>Category</th><th>Points</th></tr>{breakdown}</table>
+<h2>Your Profile</h2>
+<table>{profile}</table>
+<h2>Personalized Recommendations</h2>
+{markdown_html(report.recommendations)}
+<hr>
+<p><em>This report provides general wellness guidance. Always consult healthcare professionals for medical advice.</em></p>
+</body>
+</html>
+"""
+
+
+def render_json(report):
+    document = {
+        'generated_at': _generated_at(report).isoformat(timespec="seconds"),
+        'lifestyle_score': report.lifestyle_score,
+        'score_breakdown': report.score_breakdown,
+        'profile': dict(report.profile),
+        'recommendations': report.recommendations,
+    }
+    if report.sections:
+        document['sections'] = report.sections
+    return json.dumps(document, ensure_ascii=False, indent=2)
+
+
+def csv_row(report):
+    row = {
+        'generated_at': _generated_at(report).isoformat(timespec="seconds"),
+        'lifestyle_score': report.lifestyle_score,
+        'recommendations': report.recommendations or "",
+    }
+    for field, value in report.profile.items():
+        row[field] = ";".join(value) if isinstance(value, list) else value
+    for category in SCORE_CATEGORIES:
+        row[category] = report.score_breakdown.get(category, 0)
+    return row
+
+
+def render_csv(report):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=CSV_COLUMNS)
+    writer.writeheader()
+    writer.writerow(csv_row(report))
+    return buffer.getvalue()
+
+
+FORMATS = {
+    'txt': ExportFormat("Plain text", "txt", "text/plain", render_txt),
+    'md': ExportFormat("Markdown", "md", "text/markdown", render_markdown),
+    'html': ExportFormat("HTML", "html", "text/html", render_html),
+    'json': ExportFormat("JSON", "json", "application/json", render_json),
+    'csv': ExportFormat("CSV", "csv", "text/csv", render_csv),
+}
+
+
+def render(report, format_name):
+    """The report in one of FORMATS, as bytes."""
+    METRICS.inc("advisor_exports_total", format=format_name)
+    return FORMATS[format_name].render(report).encode("utf-8")
+
+
+def file_name(report, format_name):
+    return f"health_report_{_generated_at(report):%Y%m%d_%H%M%S}.{FORMATS[format_name].extension}"
+
+
+def stored_report(assessment):
+    """ReportData for a row of AssessmentStore.iter_assessments()."""
+    return ReportData(parse_profile(assessment['user_data']), assessment['lifestyle_score'],
+                      assessment['score_breakdown'], assessment['recommendations'],
+                      datetime.fromtimestamp(assessment['created_at']))
+
+
+def write_zip(output, assessments, formats=('txt',)):
+    """Write stored assessments into a ZIP on `output`, which may be unseekable.
+
+    Each format except CSV gets one file per assessment; CSV is a single
+    assessments.csv with a row per assessment, spooled to a temporary file
+    until the end. Returns the number of assessments written.
+    """
+    unknown = set(formats) - set(FORMATS)
+    if unknown:
+        raise ValueError(f"Unknown export formats: {', '.join(sorted(unknown))}")
+    count = 0
+    with zipfile.ZipFile(output, "w", compression=zipfile.ZIP_DEFLATED) as archive, \
+            tempfile.SpooledTemporaryFile(max_size=1 << 20, mode="w+", newline="", encoding="utf-8") as rows:
+        writer = csv.DictWriter(rows, fieldnames=CSV_COLUMNS)
+        writer.writeheader()
+        for assessment in assessments:
+            report = stored_report(assessment)
+            for format_name in formats:
+                if format_name == 'csv':
+                    writer.writerow(csv_row(report))
+                    continue
+                name = f"assessment_{assessment['id']}_{report.generated_at:%Y%m%d_%H%M%S}.{FORMATS[format_name].extension}"
+                with archive.open(name, "w") as entry:
+                    entry.write(render(report, format_name))
+            count += 1
+        if 'csv' in formats:
+            rows.seek(0)
+            with archive.open("assessments.csv", "w") as entry:
+                for line in rows:
+                    entry.write(line.encode("utf-8"))
+    return count
+
+
+def main(argv=None):
+    from backends import create_backend
+    from history import AssessmentStore
+
+    parser = argparse.ArgumentParser(description="Export stored assessments as a ZIP of reports.")
+    parser.add_argument("-o", "--output", required=True, help="ZIP file to write ('-' for stdout)")
+    parser.add_argument("--formats", default="txt", help=f"comma-separated subset of {','.join(FORMATS)}")
+    parser.add_argument("--user", help="only this user's assessments (the ?user= id)")
+    args = parser.parse_args(argv)
+
+    formats = [name.strip() for name in args.formats.split(",") if name.strip()]
+    unknown = set(formats) - set(FORMATS)
+    if unknown:
+        parser.error(f"unknown formats: {', '.join(sorted(unknown))}")
+
+    assessments = AssessmentStore(backend=create_backend()).iter_assessments(user_id=args.user)
+    if args.output == "-":
+        count = write_zip(sys.stdout.buffer, assessments, formats)
+    else:
+        with open(args.output, "wb") as f:
+            count = write_zip(f, assessments, formats)
+    print(f"Exported {count} assessments", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
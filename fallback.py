@@ -0,0 +1,175 @@
+# fallback.py
+# Deterministic, rule-based recommendations built from the score
+# breakdown and form answers. Served when the model is slow or
+# unavailable; runs in well under a millisecond.
+
+from meal_plan import goal_kind
+from scoring import CATEGORY_MAX_POINTS
+from sections import assemble_report
+
+DIET_TIPS = {
+    "Omnivore": [
+        "Fill half your plate with vegetables and fruit, a quarter with lean protein and a quarter with whole grains",
+        "Limit processed and red meat to a few times per week",
+    ],
+    "Vegetarian": [
+        "Combine legumes, dairy or eggs with whole grains for complete protein",
+        "Include iron-rich foods (lentils, spinach) with vitamin C sources to improve absorption",
+    ],
+    "Vegan": [
+        "Take a reliable vitamin B12 supplement or fortified foods",
+        "Eat legumes, tofu, tempeh or seitan daily and add a source of omega-3 such as flax, chia or walnuts",
+    ],
+    "Pescatarian": [
+        "Aim for two portions of fish per week, one of them oily (salmon, sardines, mackerel)",
+        "Round out meals with legumes and whole grains",
+    ],
+    "Keto": [
+        "Choose unsaturated fats (olive oil, avocado, nuts) over processed meats and saturated fats",
+        "Eat plenty of low-carb vegetables for fibre and micronutrients",
+    ],
+    "Paleo": [
+        "Without dairy and grains, get calcium from leafy greens, sardines and almonds",
+        "Keep starchy vegetables such as sweet potatoes in your meals for steady energy",
+    ],
+    "Mediterranean": [
+        "Keep building meals around vegetables, legumes, whole grains, fish and olive oil",
+        "Have a handful of nuts or seeds most days",
+    ],
+}
+
+# Category that lost points -> concrete step for the weekly action plan,
+# in priority order for categories that lost the same number of points
+ACTION_STEPS = {
+    'Non-smoking': "Set a quit date and talk to your doctor or a quit line about cessation support",
+    'Exercise': "Schedule three 30-minute activity sessions in your calendar this week",
+    'Sleep Quality': "Set a consistent sleep schedule and stop using screens 30-60 minutes before bed",
+    'Sleep Duration': "Move your bedtime 15 minutes earlier every few days until you get 7-9 hours of sleep",
+    'Water Intake': "Keep a water bottle nearby and add one extra glass of water each day until you reach 8 glasses",
+    'Stress Management': "Take a 5-minute breathing or stretching break twice a day",
+    'Alcohol Moderation': "Choose at least three alcohol-free days this week",
+    'Meditation': "Try a 5-minute guided meditation each morning",
+}
+ACTION_PRIORITY = {category: rank for rank, category in enumerate(ACTION_STEPS)}
+
+
+def _bullets(lines):
+    return "\n".join(f"- {line}" for line in lines)
+
+
+def fallback_sections(user_data, score_breakdown):
+    """Return rule-based recommendation text per report section key."""
+    water = user_data['water_intake']
+    sleep_hours = user_data['sleep_hours']
+    exercise_types = user_data.get('exercise_type') or []
+
+    diet = list(DIET_TIPS.get(user_data['diet_type'], []))
+    if user_data['meals_per_day'] < 3:
+        diet.append("Add a balanced meal or protein-rich snack so you eat at least three times a day")
+    elif user_data['meals_per_day'] > 4:
+        diet.append("With frequent meals, keep portions small and avoid grazing late in the evening")
+    goal = goal_kind(user_data.get('health_goals'))
+    if goal == "loss":
+        diet.append("For weight loss, build meals around vegetables and lean protein and cut back on sugary drinks")
+    elif goal == "gain":
+        diet.append("For weight or muscle gain, include 20-30 g of protein at each meal")
+
+    hydration = []
+    if score_breakdown['Water Intake'] < CATEGORY_MAX_POINTS['Water Intake']:
+        hydration.append(f"Increase your intake from {water} to 8-10 glasses per day, one extra glass at a time")
+    else:
+        hydration.append(f"Your {water} glasses per day is on target; keep it up")
+    hydration += [
+        "Drink a glass of water when you wake up and with every meal",
+        "Drink more on hot days and around exercise",
+    ]
+
+    sleep = []
+    if sleep_hours < 7:
+        sleep.append(f"You sleep {sleep_hours} hours; aim for 7-9 hours per night")
+    elif sleep_hours > 9:
+        sleep.append(f"You sleep {sleep_hours} hours; regularly needing more than 9 hours is worth discussing with a doctor")
+    if score_breakdown['Sleep Quality'] == 0:
+        sleep += [
+            "Keep the same bed and wake times every day, including weekends",
+            "Keep your bedroom dark, quiet and cool",
+            "Avoid caffeine after midday and heavy meals close to bedtime",
+        ]
+    else:
+        sleep.append("Your sleep quality is good; protect it with a consistent schedule")
+
+    exercise = []
+    frequency = user_data['exercise_frequency']
+    if frequency == "Sedentary":
+        exercise += [
+            "Start with a 10-15 minute walk every day",
+            "Build up gradually to 150 minutes of moderate activity per week",
+        ]
+    elif frequency == "1-2 times/week":
+        exercise.append("Add one more session per week to reach at least three")
+    else:
+        exercise.append(f"Your {frequency.lower()} routine meets activity guidelines; keep it varied")
+    if "Strength Training" not in exercise_types:
+        exercise.append("Add strength training on two days per week")
+    if not ({"Yoga", "Walking"} & set(exercise_types)):
+        exercise.append("Include some low-intensity movement such as walking or yoga for recovery")
+
+    stress = []
+    if score_breakdown['Stress Management'] == 0:
+        stress += [
+            f"Your stress level is {user_data['stress_level'].lower()}; schedule short breaks during the day",
+            "Try box breathing: inhale 4s, hold 4s, exhale 4s, hold 4s",
+        ]
+    else:
+        stress.append("Your stress level is low; keep the habits that help you unwind")
+    if score_breakdown['Meditation'] == 0:
+        stress.append("Practice 5-10 minutes of meditation or mindfulness daily")
+
+    habits = []
+    if user_data['smoking'] == "Regular":
+        habits.append("Quitting smoking is the single biggest health improvement you can make; ask your doctor about support")
+    elif user_data['smoking'] == "Occasional":
+        habits.append("Identify the situations where you smoke and plan alternatives to quit completely")
+    if score_breakdown['Alcohol Moderation'] == 0:
+        habits.append(f"Reduce alcohol from {user_data['alcohol'].lower()} to no more than 1-2 drinks per week")
+    habits.append("Change one habit at a time and track it for a few weeks")
+
+    # Biggest point losses first
+    lost = sorted(
+        (category for category, points in score_breakdown.items() if points < CATEGORY_MAX_POINTS[category]),
+        key=lambda category: (score_breakdown[category] - CATEGORY_MAX_POINTS[category], ACTION_PRIORITY[category]),
+    )
+    action_plan = [ACTION_STEPS[category] for category in lost][:5]
+    if not action_plan:
+        action_plan = ["Keep your current routine and reassess in a month"]
+
+    risks = []
+    if user_data['smoking'] != "Non-smoker":
+        risks.append("Smoking raises the risk of heart disease, lung disease and cancer")
+    if score_breakdown['Alcohol Moderation'] == 0:
+        risks.append("Regular alcohol use can affect liver health, sleep and blood pressure")
+    if frequency == "Sedentary":
+        risks.append("Low physical activity is linked to cardiovascular and metabolic disease")
+    if sleep_hours < 6 or score_breakdown['Sleep Quality'] == 0:
+        risks.append("Insufficient or poor sleep affects mood, immunity and weight")
+    if user_data['stress_level'] in ("High", "Very High"):
+        risks.append("Chronic stress can raise blood pressure and affect mental health")
+    if water < 6:
+        risks.append("Low water intake can cause fatigue, headaches and poor concentration")
+    risks.append("Consult a healthcare professional before major changes, or if you notice persistent symptoms")
+
+    return {
+        'diet': _bullets(diet),
+        'hydration': _bullets(hydration),
+        'sleep': _bullets(sleep),
+        'exercise': _bullets(exercise),
+        'stress': _bullets(stress),
+        'habits': _bullets(habits),
+        'action_plan': _bullets(action_plan),
+        'risks': _bullets(risks),
+    }
+
+
+def fallback_report(user_data, score_breakdown):
+    """The full rule-based report as markdown, in report section order."""
+    return assemble_report(fallback_sections(user_data, score_breakdown))
@@ -0,0 +1,413 @@
+# gemini_client.py
+# Async client layer around a genai.GenerativeModel: token-bucket rate
+# limiting, retries with jittered exponential backoff, per-request
+# timeouts, de-duplication of identical in-flight requests and hedging
+# (a duplicate request once a call runs past the model's usual latency).
+#
+# All calls run on a single long-lived event loop so the model's async
+# gRPC channel is created once and reused. Synchronous callers (the
+# Streamlit script, thread-pool batch jobs) use generate_sync() and
+# stream_sync(), which hand work to that loop.
+
+import asyncio
+import queue
+import random
+import threading
+import time
+from collections import deque
+
+import settings
+from metrics import METRICS
+
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+# Rough characters-per-token ratio used to charge the tokens/min bucket
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(prompt):
+    expected_output = settings.GEMINI_EXPECTED_OUTPUT_TOKENS
+    if settings.PROMPT_MAX_OUTPUT_TOKENS > 0:
+        expected_output = min(expected_output, settings.PROMPT_MAX_OUTPUT_TOKENS)
+    return len(prompt) // CHARS_PER_TOKEN + expected_output
+
+
+def is_retryable(error):
+    """True for timeouts, connection failures and 429/5xx API errors."""
+    if isinstance(error, (asyncio.TimeoutError, ConnectionError)):
+        return True
+    return getattr(error, 'code', None) in RETRYABLE_STATUS_CODES
+
+
+class TokenBucket:
+    """Async token bucket refilled continuously at `rate_per_minute`.
+
+    A rate of 0 disables the limit.
+    """
+
+    def __init__(self, rate_per_minute, capacity=None):
+        self.rate_per_second = rate_per_minute / 60
+        self.capacity = capacity if capacity is not None else rate_per_minute
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, amount=1):
+        if self.rate_per_second <= 0:
+            return
+        # A single request larger than the bucket only has to wait for a full bucket
+        amount = min(amount, self.capacity)
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate_per_second)
+                self.updated = now
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                await asyncio.sleep((amount - self.tokens) / self.rate_per_second)
+
+
+class SharedTokenBucket:
+    """Token bucket kept in a backend (see backends.py), so processes sharing it share the limit.
+
+    A rate of 0 disables the limit.
+    """
+
+    def __init__(self, backend, name, rate_per_minute, capacity=None):
+        self.backend = backend
+        self.name = name
+        self.rate_per_minute = rate_per_minute
+        self.capacity = capacity if capacity is not None else rate_per_minute
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, amount=1):
+        if self.rate_per_minute <= 0:
+            return
+        amount = min(amount, self.capacity)
+        async with self._lock:
+            while True:
+                wait = await asyncio.to_thread(
+                    self.backend.take, self.name, amount, self.rate_per_minute, self.capacity)
+                if not wait:
+                    return
+                await asyncio.sleep(wait)
+
+
+class LatencyTracker:
+    """Rolling window of recent call latencies, for percentile estimates."""
+
+    def __init__(self, window=None):
+        self.samples = deque(maxlen=window if window is not None else settings.GEMINI_HEDGE_WINDOW)
+
+    def observe(self, seconds):
+        self.samples.append(seconds)
+
+    def percentile(self, q):
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(q / 100 * len(ordered)))]
+
+
+class AsyncGeminiClient:
+    """Rate-limited, retrying wrapper around a GenerativeModel's async API.
+
+    With a `backend`, the rate limits are kept there and shared with every
+    client using the same backend and model. generate() calls still running
+    at the hedge_percentile of recent latencies, and stream() calls still
+    waiting for their first chunk at that percentile of recent first-chunk
+    latencies, get one duplicate request, for at most hedge_max_ratio of
+    calls; the first response wins.
+    """
+
+    def __init__(self, model, requests_per_minute=None, tokens_per_minute=None,
+                 max_retries=None, timeout_seconds=None, backoff_base=None, backoff_max=None, backend=None,
+                 hedge_percentile=None, hedge_max_ratio=None):
+        self.model = model
+        requests_per_minute = (requests_per_minute if requests_per_minute is not None
+                               else settings.GEMINI_REQUESTS_PER_MINUTE)
+        tokens_per_minute = tokens_per_minute if tokens_per_minute is not None else settings.GEMINI_TOKENS_PER_MINUTE
+        if backend is None:
+            self.request_bucket = TokenBucket(requests_per_minute)
+            self.token_bucket = TokenBucket(tokens_per_minute)
+        else:
+            # The API quota is per model, whichever process spends it
+            model_name = getattr(model, 'model_name', settings.GEMINI_MODEL)
+            self.request_bucket = SharedTokenBucket(backend, f"{model_name}:requests", requests_per_minute)
+            self.token_bucket = SharedTokenBucket(backend, f"{model_name}:tokens", tokens_per_minute)
+        self.max_retries = max_retries if max_retries is not None else settings.GEMINI_MAX_RETRIES
+        self.timeout_seconds = timeout_seconds if timeout_seconds is not None else settings.GEMINI_TIMEOUT_SECONDS
+        self.backoff_base = backoff_base if backoff_base is not None else settings.GEMINI_BACKOFF_BASE_SECONDS
+        self.backoff_max = backoff_max if backoff_max is not None else settings.GEMINI_BACKOFF_MAX_SECONDS
+
+        self.hedge_percentile = (hedge_percentile if hedge_percentile is not None
+                                 else settings.GEMINI_HEDGE_PERCENTILE)
+        self.hedge_max_ratio = hedge_max_ratio if hedge_max_ratio is not None else settings.GEMINI_HEDGE_MAX_RATIO
+        self.latency = LatencyTracker()
+        self.first_chunk_latency = LatencyTracker()
+
+        self.stats = {'requests': 0, 'retries': 0, 'deduplicated': 0, 'failures': 0,
+                      'calls': 0, 'hedges': 0, 'hedges_won': 0}
+        self._inflight = {}
+        self._loop = None
+        self._loop_lock = threading.Lock()
+
+    async def generate(self, prompt, **kwargs):
+        """Return the model response for `prompt`.
+
+        Concurrent calls with the same prompt and arguments share a single
+        API request, which is cancelled once every caller has been cancelled.
+        """
+        key = (prompt, repr(sorted(kwargs.items())))
+        entry = self._inflight.get(key)
+        if entry is None:
+            task = asyncio.ensure_future(
+                self._hedged(lambda observe: self._generate_with_retries(prompt, kwargs, observe), self.latency))
+            entry = self._inflight[key] = [task, 0]
+
+            def forget(_):
+                # A cancelled request may already have been replaced by a new one
+                if self._inflight.get(key) is entry:
+                    del self._inflight[key]
+            task.add_done_callback(forget)
+        else:
+            self.stats['deduplicated'] += 1
+        task = entry[0]
+        entry[1] += 1
+        try:
+            # Shield so one caller giving up doesn't cancel the request for the others
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if entry[1] == 1 and not task.done():
+                self._inflight.pop(key, None)
+                task.cancel()
+            raise
+        finally:
+            entry[1] -= 1
+
+    async def stream(self, prompt, **kwargs):
+        """Yield response chunks; failures before the first chunk are retried.
+
+        Streams still waiting for their first chunk at the hedge_percentile of
+        recent first-chunk latencies get one duplicate request, like generate().
+        Every chunk read has the client's timeout, so a stream that stalls
+        part-way raises asyncio.TimeoutError instead of hanging.
+        """
+        opened = await self._hedged(lambda observe: self._open_stream(prompt, kwargs, observe),
+                                    self.first_chunk_latency)
+        if opened is None:
+            return
+        chunks, first, started = opened
+        last = first
+        yield first
+        while True:
+            try:
+                chunk = await asyncio.wait_for(chunks.__anext__(), self.timeout_seconds)
+            except StopAsyncIteration:
+                break
+            last = chunk
+            yield chunk
+        METRICS.observe_stage("gemini_stream", time.perf_counter() - started)
+        # Streamed usage metadata is cumulative, so the last chunk has the totals
+        METRICS.record_usage(last)
+
+    def generate_sync(self, prompt, **kwargs):
+        """Blocking generate() for code that isn't running an event loop."""
+        return self.run_sync(self.generate(prompt, **kwargs))
+
+    def stream_sync(self, prompt, heartbeat=None, **kwargs):
+        """Blocking iterator over stream() chunks (see iterate_sync for heartbeat)."""
+        return self.iterate_sync(self.stream(prompt, **kwargs), heartbeat=heartbeat)
+
+    def submit(self, coroutine):
+        """Schedule a coroutine on the client's event loop; returns a concurrent.futures.Future."""
+        return asyncio.run_coroutine_threadsafe(coroutine, self._event_loop())
+
+    def run_sync(self, coroutine):
+        """Run a coroutine on the client's event loop and wait for its result."""
+        return self.submit(coroutine).result()
+
+    def iterate_sync(self, async_iterable, heartbeat=None):
+        """Consume an async iterable on the client's event loop, yielding items as they arrive.
+
+        With `heartbeat` (seconds), None is yielded whenever no item arrives
+        within that time, so callers can enforce their own latency budget.
+        Closing the iterator early cancels the underlying work.
+        """
+        items = queue.Queue()
+        done = object()
+
+        async def pump():
+            try:
+                async for item in async_iterable:
+                    items.put(item)
+            except BaseException as e:
+                items.put(e)
+            finally:
+                items.put(done)
+
+        future = self.submit(pump())
+        try:
+            while True:
+                try:
+                    item = items.get(timeout=heartbeat)
+                except queue.Empty:
+                    yield None
+                    continue
+                if item is done:
+                    return
+                if isinstance(item, BaseException):
+                    raise item
+                yield item
+        finally:
+            future.cancel()
+
+    async def run_async(self, coroutine):
+        """Await a coroutine run on the client's event loop from another event loop (e.g. an ASGI server's)."""
+        return await asyncio.wrap_future(self.submit(coroutine))
+
+    async def iterate_async(self, async_iterable):
+        """Consume an async iterable on the client's event loop from another event loop."""
+        loop = asyncio.get_running_loop()
+        items = asyncio.Queue()
+        done = object()
+
+        async def pump():
+            try:
+                async for item in async_iterable:
+                    loop.call_soon_threadsafe(items.put_nowait, item)
+            except BaseException as e:
+                loop.call_soon_threadsafe(items.put_nowait, e)
+            finally:
+                loop.call_soon_threadsafe(items.put_nowait, done)
+
+        future = self.submit(pump())
+        try:
+            while True:
+                item = await items.get()
+                if item is done:
+                    return
+                if isinstance(item, BaseException):
+                    raise item
+                yield item
+        finally:
+            future.cancel()
+
+    def close(self):
+        with self._loop_lock:
+            if self._loop is not None:
+                self._loop.call_soon_threadsafe(self._loop.stop)
+                self._loop = None
+
+    def hedge_delay(self, latency=None):
+        """Seconds after which a call gets a hedged duplicate, or None while hedging is off or warming up."""
+        latency = latency if latency is not None else self.latency
+        if self.hedge_max_ratio <= 0 or len(latency.samples) < settings.GEMINI_HEDGE_MIN_SAMPLES:
+            return None
+        return latency.percentile(self.hedge_percentile)
+
+    async def _hedged(self, attempt, latency):
+        """Await attempt(observe=True), racing a duplicate attempt(observe=False) once it runs past the hedge delay."""
+        self.stats['calls'] += 1
+        primary = asyncio.ensure_future(attempt(True))
+        hedge = None
+        pending = {primary}
+        try:
+            delay = self.hedge_delay(latency)
+            if delay is not None:
+                done, _ = await asyncio.wait({primary}, timeout=delay)
+                if not done and self.stats['hedges'] < self.hedge_max_ratio * self.stats['calls']:
+                    self.stats['hedges'] += 1
+                    # Hedges only finish when they're fast, so their latencies would skew the window
+                    hedge = asyncio.ensure_future(attempt(False))
+                    pending.add(hedge)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        self.stats['hedges_won'] += task is hedge
+                        return task.result()
+            # Both failed: report the original request's error
+            return primary.result()
+        finally:
+            # Also when the caller is cancelled, so no attempt outlives it
+            for task in pending:
+                task.cancel()
+
+    async def _open_stream(self, prompt, kwargs, observe=True):
+        """(chunk iterator, first chunk, start time) of a streamed request, or None for an empty stream."""
+        attempt = 0
+        while True:
+            await self._acquire(prompt)
+            started = time.perf_counter()
+            try:
+                response = await asyncio.wait_for(
+                    self.model.generate_content_async(prompt, stream=True, **kwargs), self.timeout_seconds)
+                chunks = response.__aiter__()
+                first = await asyncio.wait_for(chunks.__anext__(), self.timeout_seconds)
+            except StopAsyncIteration:
+                return None
+            except asyncio.CancelledError:
+                if observe:
+                    self.first_chunk_latency.observe(time.perf_counter() - started)
+                raise
+            except Exception as e:
+                if observe and isinstance(e, asyncio.TimeoutError):
+                    self.first_chunk_latency.observe(time.perf_counter() - started)
+                attempt = await self._backoff_or_raise(e, attempt)
+                continue
+            elapsed = time.perf_counter() - started
+            if observe:
+                self.first_chunk_latency.observe(elapsed)
+            METRICS.observe_stage("gemini_first_chunk", elapsed)
+            return chunks, first, started
+
+    async def _generate_with_retries(self, prompt, kwargs, observe=True):
+        attempt = 0
+        while True:
+            await self._acquire(prompt)
+            started = time.perf_counter()
+            try:
+                response = await asyncio.wait_for(
+                    self.model.generate_content_async(prompt, **kwargs), self.timeout_seconds)
+            except asyncio.CancelledError:
+                # A primary that lost the hedge race would have taken at least this
+                # long; leaving it out would pull the percentiles down
+                if observe:
+                    self.latency.observe(time.perf_counter() - started)
+                raise
+            except Exception as e:
+                if observe and isinstance(e, asyncio.TimeoutError):
+                    self.latency.observe(time.perf_counter() - started)
+                attempt = await self._backoff_or_raise(e, attempt)
+                continue
+            elapsed = time.perf_counter() - started
+            if observe:
+                self.latency.observe(elapsed)
+            METRICS.observe_stage("gemini_call", elapsed)
+            METRICS.record_usage(response)
+            return response
+
+    async def _acquire(self, prompt):
+        await self.request_bucket.acquire(1)
+        await self.token_bucket.acquire(estimate_tokens(prompt))
+        self.stats['requests'] += 1
+
+    async def _backoff_or_raise(self, error, attempt):
+        METRICS.record_error("gemini", error)
+        if attempt >= self.max_retries or not is_retryable(error):
+            self.stats['failures'] += 1
+            raise error
+        self.stats['retries'] += 1
+        # Full jitter keeps retrying clients from synchronising
+        await asyncio.sleep(random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt)))
+        return attempt + 1
+
+    def _event_loop(self):
+        with self._loop_lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="gemini-client", daemon=True).start()
+                self._loop = loop
+            return self._loop
@@ -0,0 +1,142 @@
+# goal_index.py
+# Near-duplicate lookup for the free-text health_goals field: profiles whose
+# other fields match exactly and whose goals read alike ("lose weight",
+# "Weight loss") share one cached recommendation. Goal words are normalized
+# (synonyms, plurals), embedded offline as hashed character trigrams and
+# compared by cosine similarity; numbers ("lose 5 kg") and directions
+# ("lose weight" vs "gain weight") must match exactly.
+
+import re
+import threading
+import zlib
+from collections import OrderedDict
+
+import numpy as np
+
+import settings
+from cache import profile_key
+
+# Filler words that don't change what a goal asks for
+STOPWORDS = frozenset((
+    "a", "am", "an", "and", "be", "become", "complete", "do", "finish", "for", "general", "get", "help",
+    "i", "im", "in", "level", "levels", "like", "me", "my", "need", "of", "on", "overall", "please", "run", "some", "the",
+    "to", "try", "trying", "want", "would",
+))
+# Words that say which way a goal wants something to go. Goals only match with
+# the same directions, so "lose weight" never reuses "gain weight".
+DIRECTIONS = {
+    **dict.fromkeys(("lose", "losing", "loss", "lost", "reduce", "reducing", "reduction", "lower", "lowering",
+                     "less", "decrease", "cut", "cutting", "drop", "shed", "burn", "burning"), "down"),
+    **dict.fromkeys(("gain", "gaining", "build", "building", "bulk", "increase", "increasing", "more", "boost",
+                     "better", "improve", "improving", "raise", "put"), "up"),
+}
+# Other wordings of the same thing
+SYNONYMS = {"wellbeing": "wellness", "health": "wellness", "energetic": "energy", "stronger": "strength"}
+
+VECTOR_SIZE = 256
+MAX_GOALS_PER_PROFILE = 32
+
+
+def goal_terms(text):
+    """Normalized content words of a goal text, without fillers, directions and numbers."""
+    terms = []
+    for word in re.findall(r"[a-z]+", (text or "").lower()):
+        if word in STOPWORDS or word in DIRECTIONS:
+            continue
+        if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        terms.append(SYNONYMS.get(word, word))
+    return terms
+
+
+def goal_vector(text, size=VECTOR_SIZE):
+    """Unit-length hashed trigram vector of goal_terms(); all zeros when there are none.
+
+    Numbers and directions are left out: goal_signature() compares them exactly.
+    """
+    vector = np.zeros(size, dtype=np.float32)
+    for word in goal_terms(text):
+        padded = f" {word} "
+        for i in range(len(padded) - 2):
+            vector[zlib.crc32(padded[i:i + 3].encode("utf-8")) % size] += 1
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+def goal_signature(text):
+    """Numbers and directions of a goal text, which similar goals must share.
+
+    "lose 5 kg in 10 weeks" -> "10,5|down".
+    """
+    text = (text or "").lower()
+    numbers = {number.lstrip("0") or "0" for number in re.findall(r"\d+(?:\.\d+)?", text)}
+    directions = {DIRECTIONS[word] for word in re.findall(r"[a-z]+", text) if word in DIRECTIONS}
+    return f"{','.join(sorted(numbers))}|{','.join(sorted(directions))}"
+
+
+def structured_key(user_data, namespace=""):
+    """Key of everything in the profile except the goal text, plus the goal's signature.
+
+    Goals only reuse each other's recommendations within a group, so "lose 5 kg"
+    never matches "lose 50 kg" or "gain 5 kg".
+    """
+    signature = goal_signature(user_data.get('health_goals'))
+    return profile_key(dict(user_data, health_goals=""), namespace=f"{namespace}|goals|{signature}")
+
+
+class GoalIndex:
+    """Bounded in-memory index from (structured fields, goal vector) to recommendation cache keys.
+
+    Entries are grouped by structured_key(), so a lookup only compares the
+    goal against the few goals seen for the same profile (one small matrix
+    product). The least recently used groups are evicted past max_entries.
+    """
+
+    def __init__(self, threshold=None, max_entries=None):
+        self.threshold = threshold if threshold is not None else settings.GOAL_SIMILARITY_THRESHOLD
+        self.max_entries = max_entries if max_entries is not None else settings.GOAL_INDEX_ENTRIES
+        self._lock = threading.Lock()
+        self._groups = OrderedDict()
+        self._size = 0
+        self.stats = {'lookups': 0, 'matches': 0, 'entries': 0}
+
+    def add(self, user_data, cache_key, namespace=""):
+        vector = goal_vector(user_data.get('health_goals'))
+        if not self.threshold or not vector.any():
+            return
+        group_key = structured_key(user_data, namespace)
+        with self._lock:
+            vectors, keys = self._groups.pop(group_key, (np.empty((0, VECTOR_SIZE), dtype=np.float32), []))
+            self._size -= len(keys)
+            if cache_key in keys:
+                index = keys.index(cache_key)
+                vectors = np.delete(vectors, index, axis=0)
+                keys = keys[:index] + keys[index + 1:]
+            vectors = np.vstack([vectors, vector])[-MAX_GOALS_PER_PROFILE:]
+            keys = (keys + [cache_key])[-MAX_GOALS_PER_PROFILE:]
+            self._groups[group_key] = (vectors, keys)
+            self._size += len(keys)
+            while self._size > self.max_entries and self._groups:
+                _, (_, evicted) = self._groups.popitem(last=False)
+                self._size -= len(evicted)
+            self.stats['entries'] = self._size
+
+    def find(self, user_data, namespace=""):
+        """Cache key of the most similar goal for an otherwise identical profile, or None."""
+        vector = goal_vector(user_data.get('health_goals'))
+        if not self.threshold or not vector.any():
+            return None
+        group_key = structured_key(user_data, namespace)
+        with self._lock:
+            self.stats['lookups'] += 1
+            group = self._groups.get(group_key)
+            if group is None:
+                return None
+            self._groups.move_to_end(group_key)
+            vectors, keys = group
+            similarities = vectors @ vector
+            best = int(np.argmax(similarities))
+            if similarities[best] < self.threshold:
+                return None
+            self.stats['matches'] += 1
+            return keys[best]
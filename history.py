@@ -0,0 +1,139 @@
+# history.py
+# Persistent assessment history in SQLite. Scores and breakdowns live in a
+# narrow, (user_id, created_at)-indexed table so trend queries never touch
+# the profile or report text, which are stored separately. With a backend
+# (see backends.py) the tables live in the backend's database instead of
+# the history file.
+
+import json
+import threading
+import time
+
+import settings
+from backends import connect
+
+
+class AssessmentStore:
+    """Saves assessments per user and answers score-over-time queries.
+
+    Without a `backend`, the history is a SQLite file at `path`.
+    """
+
+    def __init__(self, path=None, backend=None):
+        self.path = path if path is not None else settings.HISTORY_PATH
+        self._lock = threading.Lock()
+        # WAL, so several app processes can share the history file
+        self._db = backend.history_database() if backend is not None else connect(self.path)
+        self._db.executescript(
+            "CREATE TABLE IF NOT EXISTS assessments ("
+            "id INTEGER PRIMARY KEY, user_id TEXT NOT NULL, created_at REAL NOT NULL, "
+            "lifestyle_score INTEGER NOT NULL, score_breakdown TEXT NOT NULL, source TEXT);"
+            "CREATE INDEX IF NOT EXISTS idx_assessments_user_created "
+            "ON assessments (user_id, created_at);"
+            "CREATE TABLE IF NOT EXISTS assessment_details ("
+            "assessment_id INTEGER PRIMARY KEY REFERENCES assessments (id) ON DELETE CASCADE, "
+            "user_data TEXT NOT NULL, recommendations TEXT);"
+        )
+        self._db.commit()
+
+    def save(self, user_id, user_data, lifestyle_score, score_breakdown, recommendations=None,
+             source=None, created_at=None):
+        """Store one assessment and return its id; recommendations can be added later."""
+        created_at = created_at if created_at is not None else time.time()
+        with self._lock:
+            cursor = self._db.execute(
+                "INSERT INTO assessments (user_id, created_at, lifestyle_score, score_breakdown, source) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (user_id, created_at, lifestyle_score, json.dumps(score_breakdown), source),
+            )
+            assessment_id = cursor.lastrowid
+            self._db.execute(
+                "INSERT INTO assessment_details (assessment_id, user_data, recommendations) VALUES (?, ?, ?)",
+                (assessment_id, json.dumps(dict(user_data)), recommendations),
+            )
+            self._db.commit()
+        return assessment_id
+
+    def set_recommendations(self, assessment_id, recommendations, source):
+        with self._lock:
+            self._db.execute("UPDATE assessments SET source = ? WHERE id = ?", (source, assessment_id))
+            self._db.execute(
+                "UPDATE assessment_details SET recommendations = ? WHERE assessment_id = ?",
+                (recommendations, assessment_id),
+            )
+            self._db.commit()
+
+    def score_history(self, user_id, limit=100):
+        """Most recent assessments, oldest first: dicts of id, created_at, score, breakdown and source."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT id, created_at, lifestyle_score, score_breakdown, source FROM assessments "
+                "WHERE user_id = ? ORDER BY created_at DESC LIMIT ?",
+                (user_id, limit),
+            ).fetchall()
+        return [
+            {'id': assessment_id, 'created_at': created_at, 'lifestyle_score': score,
+             'score_breakdown': json.loads(breakdown), 'source': source}
+            for assessment_id, created_at, score, breakdown, source in reversed(rows)
+        ]
+
+    def category_deltas(self, user_id):
+        """Per-category points of the latest assessment and the change since the one before."""
+        history = self.score_history(user_id, limit=2)
+        if not history:
+            return {}
+        latest = history[-1]['score_breakdown']
+        previous = history[0]['score_breakdown'] if len(history) == 2 else None
+        return {
+            category: (points, points - previous.get(category, 0) if previous is not None else None)
+            for category, points in latest.items()
+        }
+
+    def latest(self, user_id):
+        """(user_data, score_breakdown) of the user's most recent assessment, or None."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT d.user_data, a.score_breakdown FROM assessments a "
+                "JOIN assessment_details d ON d.assessment_id = a.id "
+                "WHERE a.user_id = ? ORDER BY a.created_at DESC LIMIT 1",
+                (user_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        return json.loads(row[0]), json.loads(row[1])
+
+    def profiles(self):
+        """Yield the user_data of every stored assessment, oldest first."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT user_data FROM assessment_details ORDER BY assessment_id"
+            ).fetchall()
+        for (user_data,) in rows:
+            yield json.loads(user_data)
+
+    def iter_assessments(self, user_id=None, batch_size=200):
+        """Yield every stored assessment (of one user, or all) with its profile and report, oldest first.
+
+        Rows are read in id-ordered batches, so exports of the whole history
+        hold one batch in memory and never keep the store locked for long.
+        """
+        where = "AND a.user_id = ? " if user_id is not None else ""
+        last_id = 0
+        while True:
+            with self._lock:
+                rows = self._db.execute(
+                    "SELECT a.id, a.user_id, a.created_at, a.lifestyle_score, a.score_breakdown, a.source, "
+                    "d.user_data, d.recommendations FROM assessments a "
+                    "JOIN assessment_details d ON d.assessment_id = a.id "
+                    f"WHERE a.id > ? {where}ORDER BY a.id LIMIT ?",
+                    (last_id,) + ((user_id,) if user_id is not None else ()) + (batch_size,),
+                ).fetchall()
+            if not rows:
+                return
+            for assessment_id, owner, created_at, score, breakdown, source, user_data, recommendations in rows:
+                yield {
+                    'id': assessment_id, 'user_id': owner, 'created_at': created_at, 'lifestyle_score': score,
+                    'score_breakdown': json.loads(breakdown), 'source': source,
+                    'user_data': json.loads(user_data), 'recommendations': recommendations,
+                }
+            last_id = rows[-1][0]
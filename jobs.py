@@ -0,0 +1,133 @@
+# jobs.py
+# In-process background job queue: a bounded FIFO served by a pool of worker
+# threads, with job lookup by id, cancellation and result retention so a
+# reloaded page can pick its job up again. queue.Queue stands in for an
+# external broker; the interface (submit/get/cancel) is what the app uses.
+
+import queue
+import threading
+import time
+import uuid
+
+import settings
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+
+class JobQueueFull(Exception):
+    """Raised by JobQueue.submit when max_pending jobs are already waiting."""
+
+
+class Job:
+    """One unit of work. The function receives the job first so it can check `cancelled`."""
+
+    def __init__(self, function, args, kwargs, metadata=None):
+        self.id = uuid.uuid4().hex
+        self.function = function
+        self.args = args
+        self.kwargs = kwargs
+        self.metadata = metadata or {}
+        self.status = QUEUED
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self._cancel = threading.Event()
+        self._done = threading.Event()
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    @property
+    def done(self):
+        return self._done.is_set()
+
+    def wait(self, timeout=None):
+        return self._done.wait(timeout)
+
+
+class JobQueue:
+    """Bounded job queue with a fixed pool of daemon worker threads."""
+
+    def __init__(self, workers=None, max_pending=None, result_ttl=None):
+        self.max_pending = max_pending if max_pending is not None else settings.JOB_MAX_PENDING
+        self.result_ttl = result_ttl if result_ttl is not None else settings.JOB_RESULT_TTL_SECONDS
+        self._queue = queue.Queue()
+        self._jobs = {}
+        self._pending = 0
+        self._lock = threading.Lock()
+        self.stats = {'submitted': 0, 'completed': 0, 'failed': 0, 'cancelled': 0, 'rejected': 0}
+        for i in range(workers if workers is not None else settings.JOB_WORKERS):
+            threading.Thread(target=self._work, name=f"job-worker-{i}", daemon=True).start()
+
+    def submit(self, function, *args, metadata=None, **kwargs):
+        """Enqueue function(job, *args, **kwargs); raises JobQueueFull past max_pending waiting jobs."""
+        job = Job(function, args, kwargs, metadata)
+        with self._lock:
+            self._purge()
+            if self._pending >= self.max_pending:
+                self.stats['rejected'] += 1
+                raise JobQueueFull(f"{self._pending} jobs are already waiting")
+            self._jobs[job.id] = job
+            self._pending += 1
+            self.stats['submitted'] += 1
+        self._queue.put(job)
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id):
+        """Cancel a job; queued jobs never start, running ones see job.cancelled."""
+        job = self.get(job_id)
+        if job is not None and not job.done:
+            job._cancel.set()
+        return job
+
+    def position(self, job):
+        """Number of queued jobs submitted before this one."""
+        with self._lock:
+            return sum(1 for other in self._jobs.values()
+                       if other.status == QUEUED and other.created_at < job.created_at)
+
+    def pending(self):
+        with self._lock:
+            return self._pending
+
+    def _work(self):
+        while True:
+            job = self._queue.get()
+            with self._lock:
+                self._pending -= 1
+                if not job.cancelled:
+                    job.status = RUNNING
+                    job.started_at = time.time()
+            if job.status == RUNNING:
+                try:
+                    job.result = job.function(job, *job.args, **job.kwargs)
+                except Exception as e:
+                    job.error = e
+            with self._lock:
+                if job.cancelled:
+                    job.status = CANCELLED
+                elif job.error is not None:
+                    job.status = FAILED
+                else:
+                    job.status = DONE
+                self.stats[{DONE: 'completed', FAILED: 'failed', CANCELLED: 'cancelled'}[job.status]] += 1
+                job.finished_at = time.time()
+            job._done.set()
+
+    def _purge(self):
+        # Drop finished jobs once nobody can still be polling for them
+        expired = time.time() - self.result_ttl
+        for job_id in [job_id for job_id, job in self._jobs.items()
+                       if job.finished_at is not None and job.finished_at < expired]:
+            del self._jobs[job_id]
@@ -0,0 +1,228 @@
+# lookup_table.py
+# Precomputed recommendations for common profile cells, stored in a compact
+# memory-mapped file: an open-addressing hash table of fixed-size slots
+# followed by zlib-compressed report texts. A cell is every form field
+# except age (bucketed into bands) and health goals (must be empty).
+#
+# Build the table offline from the most common cells in the assessment
+# history, from a CSV/JSONL file of profiles, or from random samples:
+#
+#   python lookup_table.py --from-history 5000
+#   python lookup_table.py --input cohort.jsonl --output .cache/custom.table
+#   python lookup_table.py --sample 2000 --concurrency 8
+
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import random
+import struct
+import sys
+import zlib
+from collections import Counter, namedtuple
+
+import numpy as np
+
+import options
+import settings
+
+MAGIC = b"LDATBL02"
+# magic, capacity, count, blob offset and the length of the namespace that follows: model,
+# prompt template and routing (prompts.cache_namespace), in UTF-8. Slots start at the next
+# multiple of 8 bytes.
+HEADER = struct.Struct("<8sQQQI")
+SLOT_DTYPE = np.dtype([('key', '<u8'), ('offset', '<u8'), ('length', '<u4'), ('score', '<u4')])
+
+# Age bands of a cell; profiles are generated with the band's middle age
+AGE_BANDS = ((15, 17), (18, 29), (30, 44), (45, 59), (60, 74), (75, 100))
+
+TableEntry = namedtuple('TableEntry', ['score', 'recommendations'])
+
+
+def age_band(age):
+    for index, (low, high) in enumerate(AGE_BANDS):
+        if low <= age <= high:
+            return index
+    return None
+
+
+def profile_cell(user_data):
+    """Canonical cell of a profile, or None when it has health goals or an unbanded age."""
+    if (user_data.get('health_goals') or "").strip():
+        return None
+    band = age_band(user_data['age'])
+    if band is None:
+        return None
+    return (band,) + tuple(
+        tuple(sorted(user_data[field] or [])) if field == 'exercise_type' else user_data[field]
+        for field in options.PROFILE_FIELDS if field not in ('age', 'health_goals')
+    )
+
+
+def cell_profile(cell):
+    """Representative user_data for a cell, used to generate its recommendations."""
+    low, high = AGE_BANDS[cell[0]]
+    fields = [field for field in options.PROFILE_FIELDS if field not in ('age', 'health_goals')]
+    user_data = dict(zip(fields, cell[1:]), age=(low + high) // 2, health_goals="")
+    user_data['exercise_type'] = list(user_data['exercise_type'])
+    return {field: user_data[field] for field in options.PROFILE_FIELDS}
+
+
+def cell_key(cell):
+    """Non-zero 64-bit hash of a cell (0 marks an empty slot)."""
+    digest = hashlib.blake2b(json.dumps(cell, separators=(",", ":")).encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little") or 1
+
+
+def _slots_offset(namespace_length):
+    return -(-(HEADER.size + namespace_length) // 8) * 8
+
+
+def write_table(path, entries, model_name=""):
+    """Write (user_data, score, recommendations) entries to a lookup file; returns the cell count."""
+    cells = {}
+    for user_data, score, recommendations in entries:
+        cell = profile_cell(user_data)
+        if cell is not None:
+            cells[cell_key(cell)] = (score, zlib.compress(recommendations.encode("utf-8"), 9))
+
+    # Power-of-two capacity at most half full keeps probe sequences short
+    capacity = 1 << max(1, (2 * len(cells) - 1).bit_length())
+    slots = np.zeros(capacity, dtype=SLOT_DTYPE)
+    namespace = model_name.encode("utf-8")
+    slots_offset = _slots_offset(len(namespace))
+    blob_offset = slots_offset + slots.nbytes
+    offset = blob_offset
+    blobs = []
+    for key, (score, blob) in cells.items():
+        index = key & (capacity - 1)
+        while slots[index]['key']:
+            index = (index + 1) & (capacity - 1)
+        slots[index] = (key, offset, len(blob), score)
+        blobs.append(blob)
+        offset += len(blob)
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temporary = f"{path}.tmp"
+    with open(temporary, "wb") as f:
+        f.write(HEADER.pack(MAGIC, capacity, len(cells), blob_offset, len(namespace)))
+        f.write(namespace.ljust(slots_offset - HEADER.size, b"\0"))
+        f.write(slots.tobytes())
+        for blob in blobs:
+            f.write(blob)
+    os.replace(temporary, path)
+    return len(cells)
+
+
+class RecommendationTable:
+    """Read-only, memory-mapped view of a lookup file with O(1) expected lookups."""
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, capacity, self.count, self._blob_offset, namespace_length = HEADER.unpack_from(self._map)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a recommendation lookup table of this version; rebuild it")
+        self.model_name = self._map[HEADER.size:HEADER.size + namespace_length].decode("utf-8")
+        self._slots = np.frombuffer(self._map, dtype=SLOT_DTYPE, count=capacity,
+                                    offset=_slots_offset(namespace_length))
+        self._mask = capacity - 1
+        self.stats = {'hits': 0, 'misses': 0}
+
+    def __len__(self):
+        return self.count
+
+    def lookup(self, user_data):
+        """TableEntry(score, recommendations) for the profile's cell, or None."""
+        cell = profile_cell(user_data)
+        if cell is not None:
+            key = cell_key(cell)
+            index = key & self._mask
+            while True:
+                slot_key, offset, length, score = self._slots[index].item()
+                if slot_key == 0:
+                    break
+                if slot_key == key:
+                    self.stats['hits'] += 1
+                    return TableEntry(score, zlib.decompress(self._map[offset:offset + length]).decode("utf-8"))
+                index = (index + 1) & self._mask
+        self.stats['misses'] += 1
+        return None
+
+
+def sample_cells(count, seed=0):
+    """Random, distinct cells drawn uniformly from the form's choices."""
+    rng = random.Random(seed)
+    cells = set()
+    while len(cells) < count:
+        user_data = {field: rng.choice(vocabulary) for field, vocabulary in options.CATEGORICAL_FIELDS.items()}
+        for field, (low, high, _) in options.NUMERIC_FIELDS.items():
+            user_data[field] = rng.randint(low, high)
+        user_data['exercise_type'] = [name for name in options.EXERCISE_TYPES if rng.random() < 0.3]
+        user_data['health_goals'] = ""
+        cells.add(profile_cell(user_data))
+    return list(cells)
+
+
+def most_common_cells(profiles, limit):
+    counts = Counter(cell for cell in map(profile_cell, profiles) if cell is not None)
+    return [cell for cell, _ in counts.most_common(limit)]
+
+
+def main(argv=None):
+    from backends import create_backend
+    from batch_advisor import BatchAdvisor, create_clients, read_records, run_batch
+    from cache import RecommendationCache
+    from history import AssessmentStore
+    from prompts import cache_namespace
+    from profiles import parse_profile
+
+    parser = argparse.ArgumentParser(description="Pregenerate recommendations for common profile cells.")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--from-history", type=int, metavar="N", help="the N most common cells in the assessment history")
+    source.add_argument("--input", help="CSV or JSONL file of profiles; its most common cells are used")
+    source.add_argument("--sample", type=int, metavar="N", help="N random cells")
+    parser.add_argument("--limit", type=int, default=10000, help="maximum cells taken from --input")
+    parser.add_argument("--seed", type=int, default=0, help="random seed for --sample")
+    parser.add_argument("-o", "--output", default=settings.LOOKUP_TABLE_PATH, help="lookup file to write")
+    parser.add_argument("-c", "--concurrency", type=int, default=settings.BATCH_CONCURRENCY,
+                        help="maximum concurrent model calls")
+    args = parser.parse_args(argv)
+
+    backend = create_backend()
+    if args.from_history:
+        cells = most_common_cells(AssessmentStore(backend=backend).profiles(), args.from_history)
+    elif args.input:
+        profiles = []
+        for row_number, record in read_records(args.input):
+            try:
+                profiles.append(parse_profile(record))
+            except (ValueError, TypeError, AttributeError) as e:
+                print(f"row {row_number}: skipped ({e})", file=sys.stderr)
+        cells = most_common_cells(profiles, args.limit)
+    else:
+        cells = sample_cells(args.sample, seed=args.seed)
+    print(f"Generating {len(cells)} cells", file=sys.stderr)
+
+    advisor = BatchAdvisor(clients=create_clients(backend), cache=RecommendationCache(backend=backend))
+    entries = []
+    failed = 0
+    records = ((row, cell_profile(cell)) for row, cell in enumerate(cells, start=1))
+    for result in run_batch(records, advisor, args.concurrency):
+        if 'error' in result:
+            failed += 1
+            print(f"cell {result['row']}: {result['error']}", file=sys.stderr)
+        else:
+            entries.append((result['user_data'], result['lifestyle_score'], result['recommendations']))
+
+    written = write_table(args.output, entries, model_name=cache_namespace())
+    print(f"Wrote {written} cells to {args.output} ({os.path.getsize(args.output):,} bytes, {failed} failed)",
+          file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
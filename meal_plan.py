@@ -0,0 +1,235 @@
+# meal_plan.py
+# Daily meal plans from the bundled food table, without model calls. Energy
+# and macro targets come from the profile's age, exercise frequency, diet
+# type and health goals. Foods are picked per meal from the diet's index,
+# then all portion sizes are fitted at once with a bounded least-squares
+# solve in NumPy, which takes about a millisecond.
+
+import re
+from collections import namedtuple
+
+import numpy as np
+
+from nutrients import NUTRIENTS
+
+# Daily energy needs (kcal) of sedentary people up to each age, from the Dietary
+# Guidelines' estimated calorie needs (mean of the female and male values)
+ENERGY_BY_AGE = ((18, 2000), (30, 2150), (50, 2000), (60, 1900), (200, 1800))
+ACTIVITY_FACTORS = {
+    "Sedentary": 1.0,
+    "1-2 times/week": 1.1,
+    "3-4 times/week": 1.2,
+    "5-6 times/week": 1.3,
+    "Daily": 1.35,
+}
+# Share of energy from protein, carbs and fat
+DEFAULT_MACROS = (0.20, 0.50, 0.30)
+DIET_MACROS = {"Keto": (0.25, 0.05, 0.70), "Paleo": (0.30, 0.30, 0.40), "Mediterranean": (0.18, 0.47, 0.35)}
+# Weight-loss and muscle-gain goals, told apart by their direction words
+# ("gain weight" is a gain goal); the fallback report's tips use the same classes
+GOAL_LOSS_WORDS = frozenset(("lose", "losing", "loss", "lost", "cut", "cutting", "drop", "reduce", "reducing",
+                             "shed", "burn", "burning", "slim", "slimming"))
+GOAL_GAIN_WORDS = frozenset(("gain", "gaining", "build", "building", "bulk", "bulking", "increase", "put"))
+GOAL_MUSCLE_WORDS = frozenset(("muscle", "muscles", "muscular", "strength", "stronger", "bulk", "bulking"))
+WEIGHT_LOSS_ENERGY_FACTOR = 0.85
+MUSCLE_GAIN_ENERGY_FACTOR = 1.1
+GOAL_MIN_PROTEIN_SHARE = 0.30
+FIBER_G_PER_1000_KCAL = 14
+
+# Meal names and types for each meals_per_day, and the share of daily energy per meal type
+MEAL_SLOTS = {
+    1: (("Main meal", 'main'),),
+    2: (("Breakfast", 'breakfast'), ("Dinner", 'main')),
+    3: (("Breakfast", 'breakfast'), ("Lunch", 'main'), ("Dinner", 'main')),
+    4: (("Breakfast", 'breakfast'), ("Lunch", 'main'), ("Snack", 'snack'), ("Dinner", 'main')),
+    5: (("Breakfast", 'breakfast'), ("Morning snack", 'snack'), ("Lunch", 'main'),
+        ("Afternoon snack", 'snack'), ("Dinner", 'main')),
+    6: (("Breakfast", 'breakfast'), ("Morning snack", 'snack'), ("Lunch", 'main'),
+        ("Afternoon snack", 'snack'), ("Dinner", 'main'), ("Evening snack", 'snack')),
+}
+MEAL_ENERGY_WEIGHTS = {'breakfast': 0.25, 'main': 0.35, 'snack': 0.10}
+# Plate roles filled for each meal type; a role without foods for the diet is skipped
+MEAL_ROLES = {
+    'breakfast': ('protein', 'starch', 'fruit', 'fat'),
+    'main': ('protein', 'starch', 'vegetable', 'vegetable', 'fat'),
+    'snack': ('fruit', 'fat'),
+}
+# Extra roles per meal type for diets whose targets need them
+DIET_EXTRA_ROLES = {"Keto": {'breakfast': ('fat',), 'main': ('fat',)}}
+
+# Relative weight of each daily target in the fit, in NUTRIENTS order (fibre is a minimum,
+# so going over it barely counts), then of each meal's energy
+NUTRIENT_WEIGHTS = np.array([2.0, 1.5, 1.0, 1.0, 0.2])
+MEAL_ENERGY_WEIGHT = 1.0
+# Pull towards the usual serving size; keeps portions realistic when the targets allow many mixes
+SERVING_WEIGHT = 0.005
+SOLVER_MAX_STEPS = 200
+# Serving sizes and portion limits are for a meal of this many kcal and scale with larger meals
+REFERENCE_MEAL_KCAL = 600
+# Portions are rounded to this many grams; smaller ones are dropped
+PORTION_STEP_G = 5
+MIN_PORTION_G = 10
+
+MealPlan = namedtuple('MealPlan', ['targets', 'meals', 'totals'])
+# items is a tuple of (food name, grams); totals maps NUTRIENTS to amounts
+Meal = namedtuple('Meal', ['name', 'items', 'totals'])
+
+
+def energy_target(age, exercise_frequency, health_goals=""):
+    """Daily kcal for an age and exercise frequency, adjusted for weight or muscle goals."""
+    kcal = next(kcal for max_age, kcal in ENERGY_BY_AGE if age <= max_age) * ACTIVITY_FACTORS[exercise_frequency]
+    goal = goal_kind(health_goals)
+    if goal == "loss":
+        kcal *= WEIGHT_LOSS_ENERGY_FACTOR
+    elif goal == "gain":
+        kcal *= MUSCLE_GAIN_ENERGY_FACTOR
+    return round(kcal / 50) * 50
+
+
+def goal_kind(health_goals):
+    """"loss", "gain" or None for a health goals text.
+
+    Weight goals need a direction word ("Weight loss", "gain weight"); fat
+    goals count as loss unless they say gain, and muscle or strength goals
+    as gain. A goal with both ("lose fat, build muscle") is a loss goal.
+    """
+    words = set(re.findall(r"[a-z]+", (health_goals or "").lower()))
+    lose = bool(words & GOAL_LOSS_WORDS)
+    gain = bool(words & GOAL_GAIN_WORDS)
+    if (lose and words & {"weight", "fat"}) or ("fat" in words and not gain):
+        return "loss"
+    if ("weight" in words and gain) or words & GOAL_MUSCLE_WORDS:
+        return "gain"
+    return None
+
+
+def macro_targets(user_data):
+    """Daily targets for a profile, keyed by NUTRIENTS (kcal and grams)."""
+    kcal = energy_target(user_data['age'], user_data['exercise_frequency'], user_data.get('health_goals'))
+    protein, carbs, fat = DIET_MACROS.get(user_data['diet_type'], DEFAULT_MACROS)
+    if goal_kind(user_data.get('health_goals')) and protein < GOAL_MIN_PROTEIN_SHARE:
+        # The extra protein comes out of carbs and fat in proportion
+        scale = (1 - GOAL_MIN_PROTEIN_SHARE) / (carbs + fat)
+        protein, carbs, fat = GOAL_MIN_PROTEIN_SHARE, carbs * scale, fat * scale
+    return {
+        'kcal': kcal,
+        'protein_g': round(kcal * protein / 4),
+        'carbs_g': round(kcal * carbs / 4),
+        'fat_g': round(kcal * fat / 9),
+        'fiber_g': round(kcal / 1000 * FIBER_G_PER_1000_KCAL),
+    }
+
+
+def choose_foods(foods, diet_type, slots, variant=0):
+    """(meal number, food index) pairs filling each meal's roles; `variant` rotates the picks.
+
+    Foods aren't repeated within a day while the diet has unused ones, and
+    never within a meal.
+    """
+    used = set()
+    chosen = []
+    for meal_number, (_, meal) in enumerate(slots):
+        in_meal = set()
+        roles = MEAL_ROLES[meal] + DIET_EXTRA_ROLES.get(diet_type, {}).get(meal, ())
+        for role_number, role in enumerate(roles):
+            candidates = foods.candidates(diet_type, meal, role)
+            if not len(candidates):
+                continue
+            start = (variant * 7 + meal_number * 3 + role_number) % len(candidates)
+            order = [int(index) for index in np.roll(candidates, -start) if index not in in_meal]
+            if not order:
+                continue
+            pick = next((index for index in order if index not in used), order[0])
+            used.add(pick)
+            in_meal.add(pick)
+            chosen.append((meal_number, pick))
+    return chosen
+
+
+def fit_portions(matrix, targets, weights, serving, upper):
+    """Portions x (in 100 g) with 0 <= x <= upper minimising the weighted squared target error.
+
+    Minimises sum((weights * (matrix @ x - targets)) ** 2) plus a small pull
+    towards `serving`: a box-constrained quadratic program, solved exactly
+    with a primal active-set method (one small linear solve per step).
+    """
+    weighted = matrix * weights[:, None]
+    pull = SERVING_WEIGHT / serving ** 2
+    hessian = weighted.T @ weighted + np.diag(pull)
+    linear = weighted.T @ (weights * targets) + pull * serving
+    lower = np.zeros_like(upper)
+    x = np.clip(serving, lower, upper)
+    free = np.ones(len(x), dtype=bool)
+    for _ in range(SOLVER_MAX_STEPS):
+        candidate = x.copy()
+        if free.any():
+            fixed = ~free
+            candidate[free] = np.linalg.solve(hessian[np.ix_(free, free)],
+                                              linear[free] - hessian[np.ix_(free, fixed)] @ x[fixed])
+        direction = candidate - x
+        with np.errstate(divide="ignore", invalid="ignore"):
+            room = np.where(direction < 0, (lower - x) / direction, np.where(direction > 0, (upper - x) / direction, np.inf))
+        room[~free] = np.inf
+        blocking = int(np.argmin(room))
+        if room[blocking] < 1:
+            # Move towards the free optimum until the first portion reaches a bound, and fix it there
+            x = x + room[blocking] * direction
+            x[blocking] = lower[blocking] if direction[blocking] < 0 else upper[blocking]
+            free[blocking] = False
+            continue
+        x = candidate
+        # Release the fixed portion whose bound blocks the steepest descent, if any
+        gradient = hessian @ x - linear
+        blocked = ~free & (((x <= lower) & (gradient < 0)) | ((x >= upper) & (gradient > 0)))
+        if not blocked.any():
+            break
+        free[np.flatnonzero(blocked)[np.argmax(np.abs(gradient[blocked]))]] = True
+    return x
+
+
+def plan_meals(user_data, foods, variant=0):
+    """A MealPlan for a profile (Profile or user_data dict) from a nutrients.FoodTable."""
+    targets = macro_targets(user_data)
+    slots = MEAL_SLOTS[user_data['meals_per_day']]
+    chosen = choose_foods(foods, user_data['diet_type'], slots, variant)
+    meal_numbers = np.array([meal_number for meal_number, _ in chosen])
+    indexes = np.array([index for _, index in chosen])
+    values = foods.values[indexes]
+
+    # Rows: the day's nutrients, then each meal's energy
+    meal_weights = np.array([MEAL_ENERGY_WEIGHTS[meal] for _, meal in slots])
+    meal_kcal = targets['kcal'] * meal_weights / meal_weights.sum()
+    in_meal = meal_numbers[None, :] == np.arange(len(slots))[:, None]
+    matrix = np.vstack([values.T, in_meal * values[:, 0]])
+    target_values = np.concatenate([[targets[nutrient] for nutrient in NUTRIENTS], meal_kcal])
+    weights = np.concatenate([NUTRIENT_WEIGHTS, np.full(len(slots), MEAL_ENERGY_WEIGHT)]) / target_values
+    # Bigger meals (fewer meals a day or higher needs) get proportionally bigger portions
+    meal_scale = np.maximum(meal_kcal / REFERENCE_MEAL_KCAL, 1)[meal_numbers]
+    portions = fit_portions(matrix, target_values, weights,
+                            foods.serving_g[indexes] / 100, foods.max_g[indexes] * meal_scale / 100)
+
+    grams = np.round(portions * 100 / PORTION_STEP_G) * PORTION_STEP_G
+    grams[grams < MIN_PORTION_G] = 0
+    amounts = values * (grams / 100)[:, None]
+    meals = []
+    for meal_number, (name, _) in enumerate(slots):
+        items = tuple((foods.foods[index].name, int(amount))
+                      for index, amount, in_this_meal in zip(indexes, grams, in_meal[meal_number])
+                      if in_this_meal and amount)
+        meals.append(Meal(name, items, _totals(amounts[in_meal[meal_number]].sum(axis=0))))
+    return MealPlan(targets, tuple(meals), _totals(amounts.sum(axis=0)))
+
+
+def _totals(amounts):
+    return {nutrient: round(float(amount)) for nutrient, amount in zip(NUTRIENTS, amounts)}
+
+
+def plan_dict(plan):
+    """JSON-ready form of a MealPlan."""
+    return {
+        'targets': plan.targets,
+        'totals': plan.totals,
+        'meals': [{'name': meal.name, 'totals': meal.totals,
+                   'items': [{'food': food, 'grams': grams} for food, grams in meal.items]}
+                  for meal in plan.meals],
+    }
@@ -0,0 +1,191 @@
+# metrics.py
+# Process-wide instrumentation for the recommendation pipeline: per-stage
+# latency histograms, Gemini token counts, error classes and cache/client
+# counters, exported in Prometheus text format.
+
+import http.server
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import settings
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+class Histogram:
+    """Cumulative-bucket histogram plus a bounded sample window for percentiles."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS, sample_size=None):
+        self.buckets = buckets
+        self.bucket_counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.samples = deque(maxlen=sample_size or settings.METRICS_SAMPLE_SIZE)
+
+    def observe(self, value):
+        self.count += 1
+        self.sum += value
+        self.samples.append(value)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.bucket_counts[i] += 1
+                break
+
+    def percentile(self, q):
+        """q in [0, 100], over the most recent samples; None when empty."""
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))]
+
+
+def _escape_label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape_label(value)}"' for key, value in labels) + "}"
+
+
+class MetricsRegistry:
+    """Thread-safe counters and histograms keyed by metric name and labels."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._histograms = {}
+        self._help = {}
+        self._stats_sources = {}
+
+    def describe(self, name, text):
+        self._help[name] = text
+
+    def inc(self, name, amount=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def observe(self, name, value, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.observe(value)
+
+    @contextmanager
+    def timer(self, stage):
+        """Record the duration of the block under advisor_stage_duration_seconds{stage=...}."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe_stage(stage, time.perf_counter() - started)
+
+    def observe_stage(self, stage, seconds):
+        self.observe("advisor_stage_duration_seconds", seconds, stage=stage)
+
+    def record_error(self, stage, error):
+        self.inc("advisor_errors_total", stage=stage, error_class=type(error).__name__)
+
+    def record_usage(self, response):
+        """Count prompt/response tokens from a Gemini response's usage_metadata, if present."""
+        usage = getattr(response, 'usage_metadata', None)
+        if usage is None:
+            return
+        prompt_tokens = getattr(usage, 'prompt_token_count', 0) or 0
+        response_tokens = getattr(usage, 'candidates_token_count', 0) or 0
+        self.inc("advisor_gemini_tokens_total", prompt_tokens, kind="prompt")
+        self.inc("advisor_gemini_tokens_total", response_tokens, kind="response")
+        self.inc("advisor_gemini_responses_total")
+
+    def register_stats(self, prefix, stats):
+        """Export a live dict of counters (e.g. RecommendationCache.stats) as advisor_<prefix>_<key>_total."""
+        self._stats_sources[prefix] = stats
+
+    def snapshot(self):
+        """Copy of the current values for dashboards: (counters, histograms, stats)."""
+        with self._lock:
+            counters = dict(self._counters)
+            histograms = {key: (h.count, h.sum, list(h.bucket_counts), list(h.samples))
+                          for key, h in self._histograms.items()}
+        stats = {prefix: dict(source) for prefix, source in self._stats_sources.items()}
+        return counters, histograms, stats
+
+    def percentiles(self, name, qs=(50, 95, 99), **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            return {q: histogram.percentile(q) if histogram else None for q in qs}
+
+    def render_prometheus(self):
+        counters, histograms, stats = self.snapshot()
+        lines = []
+        described = set()
+
+        def header(name, kind):
+            if name not in described:
+                described.add(name)
+                if name in self._help:
+                    lines.append(f"# HELP {name} {self._help[name]}")
+                lines.append(f"# TYPE {name} {kind}")
+
+        for (name, labels), value in sorted(counters.items()):
+            header(name, "counter")
+            lines.append(f"{name}{_format_labels(labels)} {value}")
+
+        for (name, labels), (count, total, bucket_counts, _) in sorted(histograms.items()):
+            header(name, "histogram")
+            cumulative = 0
+            for bound, bucket_count in zip(LATENCY_BUCKETS, bucket_counts):
+                cumulative += bucket_count
+                lines.append(f"{name}_bucket{_format_labels(labels + (('le', bound),))} {cumulative}")
+            lines.append(f"{name}_bucket{_format_labels(labels + (('le', '+Inf'),))} {count}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {total}")
+            lines.append(f"{name}_count{_format_labels(labels)} {count}")
+
+        for prefix, values in sorted(stats.items()):
+            for key, value in sorted(values.items()):
+                name = f"advisor_{prefix}_{key}_total"
+                header(name, "counter")
+                lines.append(f"{name} {value}")
+
+        return "\n".join(lines) + "\n"
+
+
+METRICS = MetricsRegistry()
+METRICS.describe("advisor_stage_duration_seconds", "Duration of recommendation pipeline stages.")
+METRICS.describe("advisor_gemini_tokens_total", "Gemini tokens by kind, from response usage metadata.")
+METRICS.describe("advisor_gemini_responses_total", "Gemini responses that reported usage metadata.")
+METRICS.describe("advisor_errors_total", "Errors by pipeline stage and exception class.")
+METRICS.describe("advisor_fallback_served_total", "Rule-based fallback reports served, by reason.")
+METRICS.describe("advisor_exports_total", "Reports rendered for download or export, by format.")
+METRICS.describe("advisor_sections_reused_total", "Report sections carried over unchanged from a user's previous assessment.")
+
+
+class _MetricsHandler(http.server.BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = METRICS.render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_metrics_server(port):
+    """Serve /metrics for Prometheus scraping on a daemon thread."""
+    server = http.server.ThreadingHTTPServer(("", port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    return server
@@ -0,0 +1,174 @@
+# microbatch.py
+# Micro-batching of report requests: profiles that arrive within a short
+# window are sent to Gemini as one prompt with the instruction prefix once
+# and a numbered block per profile, and the reply is split back into one
+# report per caller. Reports that are missing or don't look like a report
+# are generated again with a single-profile prompt.
+#
+# Batching applies to whole free-form reports ("single" report mode without
+# structured output); section prompts and JSON reports are sent one by one.
+
+import asyncio
+import re
+from collections import namedtuple
+
+import settings
+from profiles import parse_profile
+from prompts import (PromptBudgetExceeded, build_prompt, estimate_tokens, fit_budget, get_template,
+                     normalize_whitespace, structured_output)
+from sections import REPORT_SECTIONS
+
+# Looks like a single-profile model response to callers, which only read .text
+BatchedResponse = namedtuple('BatchedResponse', ['text'])
+
+BATCH_INSTRUCTIONS = normalize_whitespace("""
+    The {count} numbered user profiles below belong to different people. Write one complete,
+    separate report for each profile following the instructions above, in profile order.
+    Start each report with a line containing only "=== REPORT n ===", where n is the profile
+    number, and never mention the other profiles.
+""")
+
+_DELIMITER = re.compile(r"^[\s*#]*=+\s*REPORT\s+(\d+)\s*=+[\s*]*$", re.IGNORECASE | re.MULTILINE)
+
+# A usable report names at least this many of the report sections
+MIN_SECTIONS_FOUND = len(REPORT_SECTIONS) // 2
+
+
+def enabled():
+    """True when whole free-form reports are configured to be micro-batched."""
+    return settings.MICROBATCH_WINDOW_MS > 0 and settings.REPORT_MODE == "single" and not structured_output()
+
+
+def build_batch_prompt(profiles, mode=None, max_tokens=None):
+    """One prompt asking for a delimited report per profile, with the template prefix once.
+
+    The input budget covers the whole prompt: what the shared header leaves
+    is split evenly between the profile blocks, whose health goals are
+    shortened to fit. Raises PromptBudgetExceeded if a block can't fit its share.
+    """
+    template = get_template(mode)
+    max_tokens = settings.PROMPT_MAX_INPUT_TOKENS if max_tokens is None else max_tokens
+    header = "\n\n".join([template.prefix, BATCH_INSTRUCTIONS.format(count=len(profiles))])
+    share = 0
+    if max_tokens > 0:
+        share = (max_tokens - estimate_tokens(header)) // len(profiles)
+        if share < 1:
+            raise PromptBudgetExceeded(f"{len(profiles)} profiles don't fit a budget of {max_tokens} tokens")
+    blocks = [fit_budget(lambda block, number=number: f"\n\nPROFILE {number}:\n{template.profile(block)}",
+                         profile, share)
+              for number, profile in enumerate(profiles, start=1)]
+    return header + "".join(blocks)
+
+
+def looks_like_report(text):
+    text = (text or "").lower()
+    return sum(section.title.lower() in text for section in REPORT_SECTIONS) >= MIN_SECTIONS_FOUND
+
+
+def split_reports(text, count):
+    """{profile number: report text} for the delimited reports in a batch response.
+
+    Numbers outside 1..count, repeated numbers and reports that don't look
+    like a report are left out.
+    """
+    parts = _DELIMITER.split(text or "")
+    reports = {}
+    repeated = set()
+    for number, report in zip(parts[1::2], parts[2::2]):
+        number = int(number)
+        if number in reports:
+            repeated.add(number)
+        reports[number] = report.strip()
+    return {number: report for number, report in reports.items()
+            if 1 <= number <= count and number not in repeated and looks_like_report(report)}
+
+
+class MicroBatcher:
+    """Collects report requests on the client's event loop and sends them in batches.
+
+    generate() must run on the client's loop (client.submit / run_sync /
+    run_async). A batch is sent when it reaches max_size or window_seconds
+    after its first profile arrived; identical profiles share one report.
+    """
+
+    def __init__(self, client, window_seconds=None, max_size=None, mode=None):
+        self.client = client
+        self.window_seconds = (window_seconds if window_seconds is not None
+                               else settings.MICROBATCH_WINDOW_MS / 1000)
+        self.max_size = max_size if max_size is not None else settings.MICROBATCH_MAX_SIZE
+        self.mode = mode
+        self.stats = {'batches': 0, 'batched_profiles': 0, 'single_calls': 0, 'split_failures': 0}
+        self._pending = {}
+        self._timer = None
+
+    async def generate(self, user_data):
+        """The model's report for a profile, as an object with .text."""
+        profile = parse_profile(user_data)
+        future = self._pending.get(profile)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = self._pending[profile] = loop.create_future()
+            if len(self._pending) >= self.max_size:
+                self._flush()
+            elif self._timer is None:
+                self._timer = loop.call_later(self.window_seconds, self._flush)
+        # Shield so one caller giving up doesn't fail the report for the others
+        return await asyncio.shield(future)
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, {}
+        if batch:
+            asyncio.ensure_future(self._send(batch))
+
+    async def _send(self, batch):
+        if len(batch) == 1:
+            (profile, future), = batch.items()
+            await self._single(profile, future)
+            return
+
+        profiles = list(batch)
+        self.stats['batches'] += 1
+        self.stats['batched_profiles'] += len(profiles)
+        kwargs = {}
+        if settings.PROMPT_MAX_OUTPUT_TOKENS > 0:
+            # The output budget is per report
+            kwargs['generation_config'] = {'max_output_tokens': settings.PROMPT_MAX_OUTPUT_TOKENS * len(profiles)}
+        try:
+            prompt = build_batch_prompt(profiles, self.mode)
+        except PromptBudgetExceeded:
+            # Each profile still fits the budget on its own
+            await asyncio.gather(*(self._single(profile, future) for profile, future in batch.items()))
+            return
+        try:
+            response = await self.client.generate(prompt, **kwargs)
+        except Exception as e:
+            # Already retried by the client; single calls would only repeat the failure
+            for future in batch.values():
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        reports = split_reports(response.text, len(profiles))
+        retries = []
+        for number, (profile, future) in enumerate(batch.items(), start=1):
+            if number in reports:
+                if not future.done():
+                    future.set_result(BatchedResponse(reports[number]))
+            else:
+                self.stats['split_failures'] += 1
+                retries.append(self._single(profile, future))
+        await asyncio.gather(*retries)
+
+    async def _single(self, profile, future):
+        self.stats['single_calls'] += 1
+        try:
+            response = await self.client.generate(build_prompt(profile, self.mode))
+        except Exception as e:
+            if not future.done():
+                future.set_exception(e)
+            return
+        if not future.done():
+            future.set_result(response)
@@ -0,0 +1,84 @@
+# nutrients.py
+# The bundled food-composition table (data/foods.csv, nutrients per 100 g as
+# eaten) and its indexes: which foods suit each diet type, meal type and
+# role on the plate. Loaded once per process into a NumPy array for the
+# meal-plan optimizer.
+
+import csv
+from collections import namedtuple
+
+import numpy as np
+
+import options
+import settings
+
+NUTRIENTS = ('kcal', 'protein_g', 'carbs_g', 'fat_g', 'fiber_g')
+MEAL_TYPES = ('breakfast', 'main', 'snack')
+ROLES = ('protein', 'starch', 'vegetable', 'fruit', 'fat')
+
+# Food groups left out of each diet type
+DIET_EXCLUDED_GROUPS = {
+    "Omnivore": (),
+    "Vegetarian": ("red_meat", "poultry", "fish"),
+    "Vegan": ("red_meat", "poultry", "fish", "egg", "dairy"),
+    "Pescatarian": ("red_meat", "poultry"),
+    "Keto": ("grain", "starchy_vegetable"),
+    "Paleo": ("grain", "legume", "dairy"),
+    "Mediterranean": ("red_meat",),
+}
+# Keto also leaves out foods with more net carbs (carbs - fibre) per 100 g, except nuts and seeds
+KETO_MAX_NET_CARBS_G = 6
+
+Food = namedtuple('Food', ['name', 'group', 'role', 'meals', 'serving_g', 'max_g'])
+
+
+def diet_mask(diet_type, groups, values):
+    """Boolean mask of the foods allowed by a diet type."""
+    mask = ~np.isin(groups, DIET_EXCLUDED_GROUPS[diet_type])
+    if diet_type == "Keto":
+        net_carbs = values[:, NUTRIENTS.index('carbs_g')] - values[:, NUTRIENTS.index('fiber_g')]
+        mask &= (net_carbs <= KETO_MAX_NET_CARBS_G) | (groups == "nut_seed")
+    return mask
+
+
+class FoodTable:
+    """Foods with their nutrients as a (foods x NUTRIENTS) array and a (diet, meal, role) index."""
+
+    def __init__(self, foods, values):
+        self.foods = tuple(foods)
+        self.values = np.asarray(values, dtype=np.float64)
+        self.serving_g = np.array([food.serving_g for food in self.foods], dtype=np.float64)
+        self.max_g = np.array([food.max_g for food in self.foods], dtype=np.float64)
+        groups = np.array([food.group for food in self.foods])
+        roles = np.array([food.role for food in self.foods])
+        self._index = {}
+        for diet_type in options.DIET_TYPES:
+            allowed = diet_mask(diet_type, groups, self.values)
+            for meal in MEAL_TYPES:
+                in_meal = np.array([meal in food.meals for food in self.foods], dtype=bool)
+                for role in ROLES:
+                    self._index[diet_type, meal, role] = np.flatnonzero(allowed & in_meal & (roles == role))
+
+    def __len__(self):
+        return len(self.foods)
+
+    def candidates(self, diet_type, meal, role):
+        """Indexes of the foods a diet type allows for a meal type and role, in table order."""
+        return self._index[diet_type, meal, role]
+
+    @classmethod
+    def load(cls, path=None):
+        """Read a foods CSV (columns name, group, role, meals, serving_g, max_g and NUTRIENTS)."""
+        foods, values = [], []
+        with open(path or settings.FOODS_PATH, newline="", encoding="utf-8") as f:
+            for row_number, row in enumerate(csv.DictReader(f), start=2):
+                try:
+                    meals = tuple(row['meals'].split(";"))
+                    if row['role'] not in ROLES or not set(meals) <= set(MEAL_TYPES):
+                        raise ValueError(f"unknown role {row['role']!r} or meals {row['meals']!r}")
+                    foods.append(Food(row['name'], row['group'], row['role'], meals,
+                                      float(row['serving_g']), float(row['max_g'])))
+                    values.append([float(row[nutrient]) for nutrient in NUTRIENTS])
+                except (KeyError, ValueError) as e:
+                    raise ValueError(f"{path or settings.FOODS_PATH} row {row_number}: {e}") from None
+        return cls(foods, values)
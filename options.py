@@ -0,0 +1,43 @@
+# options.py
+# Choice vocabularies and numeric ranges of the lifestyle_form widgets.
+# Order matters: categorical fields are encoded as their index in these tuples.
+
+DIET_TYPES = ("Omnivore", "Vegetarian", "Vegan", "Pescatarian", "Keto", "Paleo", "Mediterranean")
+SLEEP_QUALITIES = ("Very Poor", "Poor", "Fair", "Good", "Excellent")
+EXERCISE_FREQUENCIES = ("Sedentary", "1-2 times/week", "3-4 times/week", "5-6 times/week", "Daily")
+EXERCISE_TYPES = ("Cardio", "Strength Training", "Yoga", "Sports", "Walking", "Cycling", "Swimming")
+STRESS_LEVELS = ("Very Low", "Low", "Moderate", "High", "Very High")
+MEDITATION_OPTIONS = ("Yes, regularly", "Sometimes", "No")
+SMOKING_OPTIONS = ("Non-smoker", "Occasional", "Regular")
+ALCOHOL_OPTIONS = ("None", "Occasional (1-2/week)", "Moderate (3-5/week)", "Regular (daily)")
+
+# (min, max, default) for the sliders and number input
+AGE_RANGE = (15, 100, 30)
+MEALS_PER_DAY_RANGE = (1, 6, 3)
+WATER_INTAKE_RANGE = (0, 15, 8)
+SLEEP_HOURS_RANGE = (3, 12, 7)
+
+# Categorical profile fields and their vocabularies
+CATEGORICAL_FIELDS = {
+    'diet_type': DIET_TYPES,
+    'sleep_quality': SLEEP_QUALITIES,
+    'exercise_frequency': EXERCISE_FREQUENCIES,
+    'stress_level': STRESS_LEVELS,
+    'meditation': MEDITATION_OPTIONS,
+    'smoking': SMOKING_OPTIONS,
+    'alcohol': ALCOHOL_OPTIONS,
+}
+
+NUMERIC_FIELDS = {
+    'age': AGE_RANGE,
+    'meals_per_day': MEALS_PER_DAY_RANGE,
+    'water_intake': WATER_INTAKE_RANGE,
+    'sleep_hours': SLEEP_HOURS_RANGE,
+}
+
+# Field order of st.session_state.user_data
+PROFILE_FIELDS = (
+    'age', 'diet_type', 'meals_per_day', 'water_intake', 'sleep_hours', 'sleep_quality',
+    'exercise_frequency', 'exercise_type', 'stress_level', 'meditation', 'smoking',
+    'alcohol', 'health_goals',
+)
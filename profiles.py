@@ -0,0 +1,268 @@
+# profiles.py
+# The lifestyle profile type and validation of profiles coming from outside
+# the Streamlit form. Categorical answers are stored as small IntEnums (their
+# index in the options vocabularies) and exercise types as a bitmask.
+
+import json
+import struct
+from collections.abc import Mapping
+from enum import IntEnum
+
+import options
+
+# Separator for exercise types in flat formats such as CSV
+EXERCISE_TYPE_SEPARATOR = ";"
+
+
+class Choice(IntEnum):
+    """A categorical form answer, stored as its index in the options vocabulary."""
+
+    @property
+    def label(self):
+        return CHOICE_LABELS[type(self)][self]
+
+    @classmethod
+    def from_label(cls, label):
+        try:
+            return cls(CHOICE_LABELS[cls].index(label))
+        except ValueError:
+            raise ValueError(f"must be one of {', '.join(CHOICE_LABELS[cls])}, got {label!r}") from None
+
+
+class DietType(Choice):
+    OMNIVORE = 0
+    VEGETARIAN = 1
+    VEGAN = 2
+    PESCATARIAN = 3
+    KETO = 4
+    PALEO = 5
+    MEDITERRANEAN = 6
+
+
+class SleepQuality(Choice):
+    VERY_POOR = 0
+    POOR = 1
+    FAIR = 2
+    GOOD = 3
+    EXCELLENT = 4
+
+
+class ExerciseFrequency(Choice):
+    SEDENTARY = 0
+    ONE_TO_TWO_WEEKLY = 1
+    THREE_TO_FOUR_WEEKLY = 2
+    FIVE_TO_SIX_WEEKLY = 3
+    DAILY = 4
+
+
+class StressLevel(Choice):
+    VERY_LOW = 0
+    LOW = 1
+    MODERATE = 2
+    HIGH = 3
+    VERY_HIGH = 4
+
+
+class Meditation(Choice):
+    REGULARLY = 0
+    SOMETIMES = 1
+    NO = 2
+
+
+class Smoking(Choice):
+    NON_SMOKER = 0
+    OCCASIONAL = 1
+    REGULAR = 2
+
+
+class Alcohol(Choice):
+    NONE = 0
+    OCCASIONAL = 1
+    MODERATE = 2
+    REGULAR = 3
+
+
+CHOICE_LABELS = {
+    DietType: options.DIET_TYPES,
+    SleepQuality: options.SLEEP_QUALITIES,
+    ExerciseFrequency: options.EXERCISE_FREQUENCIES,
+    StressLevel: options.STRESS_LEVELS,
+    Meditation: options.MEDITATION_OPTIONS,
+    Smoking: options.SMOKING_OPTIONS,
+    Alcohol: options.ALCOHOL_OPTIONS,
+}
+
+# Categorical profile field -> its enum
+CHOICE_FIELDS = {
+    'diet_type': DietType,
+    'sleep_quality': SleepQuality,
+    'exercise_frequency': ExerciseFrequency,
+    'stress_level': StressLevel,
+    'meditation': Meditation,
+    'smoking': Smoking,
+    'alcohol': Alcohol,
+}
+
+for _enum, _labels in CHOICE_LABELS.items():
+    assert len(_enum) == len(_labels), f"{_enum.__name__} is out of sync with options"
+
+
+def exercise_mask(exercise_types):
+    """Bitmask over options.EXERCISE_TYPES; unknown types raise ValueError."""
+    mask = 0
+    for name in exercise_types:
+        if name not in options.EXERCISE_TYPES:
+            raise ValueError(f"Unknown exercise_type: {name}")
+        mask |= 1 << options.EXERCISE_TYPES.index(name)
+    return mask
+
+
+# Binary layout: format version, then one unsigned byte per field in PROFILE_FIELDS
+# order (exercise types as their bitmask), then the UTF-8 health goals
+BINARY_VERSION = 1
+_BINARY_HEADER = struct.Struct("<13B")
+
+
+class Profile(Mapping):
+    """Immutable lifestyle profile.
+
+    Attributes hold compact values (ints, Choice enums, an exercise bitmask);
+    as a read-only mapping it presents the form's labels, so
+    profile['diet_type'] == "Vegan" and dict(profile) is the user_data dict
+    used for prompts, reports and JSON. Equal profiles hash equally.
+    """
+
+    __slots__ = ('age', 'diet_type', 'meals_per_day', 'water_intake', 'sleep_hours', 'sleep_quality',
+                 'exercise_frequency', 'exercise_mask', 'stress_level', 'meditation', 'smoking',
+                 'alcohol', 'health_goals')
+
+    def __init__(self, age, diet_type, meals_per_day, water_intake, sleep_hours, sleep_quality,
+                 exercise_frequency, exercise_mask, stress_level, meditation, smoking, alcohol, health_goals=""):
+        values = (int(age), DietType(diet_type), int(meals_per_day), int(water_intake), int(sleep_hours),
+                  SleepQuality(sleep_quality), ExerciseFrequency(exercise_frequency), int(exercise_mask),
+                  StressLevel(stress_level), Meditation(meditation), Smoking(smoking), Alcohol(alcohol),
+                  str(health_goals))
+        for name, value in zip(self.__slots__, values):
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Profile is immutable; use replace()")
+
+    __delattr__ = __setattr__
+
+    @property
+    def exercise_type(self):
+        return [name for bit, name in enumerate(options.EXERCISE_TYPES) if self.exercise_mask >> bit & 1]
+
+    def _values(self):
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    # Mapping interface, in form labels
+    def __getitem__(self, field):
+        if field in CHOICE_FIELDS:
+            return getattr(self, field).label
+        if field == 'exercise_type':
+            return self.exercise_type
+        if field in options.PROFILE_FIELDS:
+            return getattr(self, field)
+        raise KeyError(field)
+
+    def __iter__(self):
+        return iter(options.PROFILE_FIELDS)
+
+    def __len__(self):
+        return len(options.PROFILE_FIELDS)
+
+    def __eq__(self, other):
+        if isinstance(other, Profile):
+            return self._values() == other._values()
+        return Mapping.__eq__(self, other)
+
+    def __hash__(self):
+        return hash(self._values())
+
+    def __repr__(self):
+        return f"Profile({', '.join(f'{name}={getattr(self, name)!r}' for name in self.__slots__)})"
+
+    def __reduce__(self):
+        return Profile, self._values()
+
+    def replace(self, **changes):
+        values = dict(zip(self.__slots__, self._values()), **changes)
+        return Profile(**values)
+
+    def to_dict(self):
+        return dict(self)
+
+    def to_json(self):
+        return json.dumps(self.to_dict(), ensure_ascii=False, separators=(",", ":"))
+
+    @classmethod
+    def from_json(cls, text):
+        return parse_profile(json.loads(text))
+
+    def to_bytes(self):
+        fields = self._values()
+        return _BINARY_HEADER.pack(BINARY_VERSION, *fields[:-1]) + fields[-1].encode("utf-8")
+
+    @classmethod
+    def from_bytes(cls, data):
+        version, *fields = _BINARY_HEADER.unpack_from(data)
+        if version != BINARY_VERSION:
+            raise ValueError(f"Unsupported profile format version {version}")
+        return cls(*fields, data[_BINARY_HEADER.size:].decode("utf-8"))
+
+
+def parse_profile(record):
+    """Validate a raw record (CSV row, JSON object or form values) into a Profile.
+
+    Values may be strings, as read from CSV. Raises ValueError naming the
+    offending field when a value is missing, out of range or not one of
+    the form's choices.
+    """
+    if isinstance(record, Profile):
+        return record
+    values = {}
+    for field in options.PROFILE_FIELDS:
+        value = record.get(field)
+
+        if field in options.NUMERIC_FIELDS:
+            low, high, _ = options.NUMERIC_FIELDS[field]
+            # int() would accept True and truncate 7.9 to 7
+            if isinstance(value, bool) or (isinstance(value, float) and not value.is_integer()):
+                raise ValueError(f"{field} must be an integer, got {value!r}")
+            try:
+                value = int(value)
+            except (TypeError, ValueError, OverflowError):
+                raise ValueError(f"{field} must be an integer, got {value!r}") from None
+            if not low <= value <= high:
+                raise ValueError(f"{field} must be between {low} and {high}, got {value}")
+
+        elif field in CHOICE_FIELDS:
+            try:
+                value = CHOICE_FIELDS[field].from_label(value)
+            except ValueError as e:
+                raise ValueError(f"{field} {e}") from None
+
+        elif field == 'exercise_type':
+            if value is None or value == "":
+                value = []
+            elif isinstance(value, str):
+                value = [item.strip() for item in value.split(EXERCISE_TYPE_SEPARATOR) if item.strip()]
+            elif isinstance(value, (list, tuple)):
+                value = list(value)
+            else:
+                raise ValueError(f"exercise_type must be a list of exercise types, got {value!r}")
+            unknown = [item for item in value if item not in options.EXERCISE_TYPES]
+            if unknown:
+                raise ValueError(f"exercise_type must be one of {', '.join(options.EXERCISE_TYPES)}, "
+                                 f"got {', '.join(map(repr, unknown))}")
+            field, value = 'exercise_mask', exercise_mask(value)
+
+        elif field == 'health_goals':
+            value = value or ""
+            if not isinstance(value, str):
+                raise ValueError(f"health_goals must be text, got {value!r}")
+
+        values[field] = value
+    return Profile(**values)
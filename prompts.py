@@ -0,0 +1,197 @@
+# prompts.py
+# Prompt construction for the Gemini recommendation call. Prompts are built
+# from versioned templates: a static instruction prefix, normalized once at
+# import, followed by the user's profile. "compact" asks for the same report
+# sections as "full" in far fewer prompt and response tokens.
+
+import math
+import re
+import textwrap
+from collections import namedtuple
+
+import settings
+from gemini_client import CHARS_PER_TOKEN
+
+# mode/version identify the wording for cache namespaces; profile renders the user's answers
+PromptTemplate = namedtuple('PromptTemplate', ['mode', 'version', 'prefix', 'profile'])
+
+
+class PromptBudgetExceeded(ValueError):
+    """Raised when a prompt can't be fitted into the input token budget."""
+
+
+def normalize_whitespace(text):
+    """Dedent, strip trailing spaces and collapse runs of blank lines."""
+    lines = [line.rstrip() for line in textwrap.dedent(text).splitlines()]
+    return re.sub(r"\n{3,}", "\n\n", "\n".join(lines)).strip()
+
+
+def estimate_tokens(text):
+    """Rough token count of `text`, using the client's characters-per-token ratio."""
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def profile_lines(user_data):
+    """The "User Profile" bullet lines shared by every prompt."""
+    exercise_types = ', '.join(user_data['exercise_type']) if user_data['exercise_type'] else 'None'
+    health_goals = user_data['health_goals'] if user_data['health_goals'] else 'General wellness'
+    return [
+        f"- Age: {user_data['age']}",
+        f"- Diet Type: {user_data['diet_type']}",
+        f"- Meals per Day: {user_data['meals_per_day']}",
+        f"- Water Intake: {user_data['water_intake']} glasses/day",
+        f"- Sleep: {user_data['sleep_hours']} hours/night, Quality: {user_data['sleep_quality']}",
+        f"- Exercise: {user_data['exercise_frequency']}, Types: {exercise_types}",
+        f"- Stress Level: {user_data['stress_level']}",
+        f"- Meditation: {user_data['meditation']}",
+        f"- Smoking: {user_data['smoking']}",
+        f"- Alcohol: {user_data['alcohol']}",
+        f"- Health Goals: {health_goals}",
+    ]
+
+
+def profile_block(user_data):
+    return "User Profile:\n" + "\n".join(profile_lines(user_data))
+
+
+def compact_profile_line(user_data):
+    """The profile as one semicolon-separated line."""
+    exercise_types = ', '.join(user_data['exercise_type']) or 'none'
+    return (
+        f"Profile: age {user_data['age']}; diet {user_data['diet_type']}; "
+        f"{user_data['meals_per_day']} meals/day; {user_data['water_intake']} glasses water/day; "
+        f"sleep {user_data['sleep_hours']}h {user_data['sleep_quality']}; "
+        f"exercise {user_data['exercise_frequency']} ({exercise_types}); "
+        f"stress {user_data['stress_level']}; meditation {user_data['meditation']}; "
+        f"smoking {user_data['smoking']}; alcohol {user_data['alcohol']}; "
+        f"goals: {user_data['health_goals'] or 'general wellness'}"
+    )
+
+
+FULL_PREFIX = normalize_whitespace("""
+    As a professional health and lifestyle advisor, analyze the user profile at the end and provide comprehensive recommendations.
+
+    Please provide a comprehensive analysis with:
+
+    1. LIFESTYLE HEALTH SCORE ANALYSIS:
+       - Provide an estimated score out of 100
+       - Break down the score by category (positive and negative aspects)
+       - Explain what impacts the score
+
+    2. DETAILED RECOMMENDATIONS by category:
+
+       **Diet & Nutrition:**
+       - Specific meal suggestions with timing and portions
+       - Foods to include and avoid
+       - Nutrient focus areas
+
+       **Hydration:**
+       - Optimal water intake recommendations
+       - Best timing for hydration
+
+       **Sleep Optimization:**
+       - Sleep hygiene tips
+       - Bedtime routine suggestions
+       - Environmental factors to improve sleep quality
+
+       **Exercise Plan:**
+       - Specific activities suited to their lifestyle
+       - Duration and frequency recommendations
+       - Progressive plan to increase activity
+
+       **Stress Management:**
+       - Practical stress-reduction techniques
+       - Mindfulness and relaxation practices
+
+       **Habit Modifications:**
+       - Specific lifestyle changes needed
+       - Sustainable behavior modifications
+
+    3. PERSONALIZED ACTION PLAN:
+       - 3-5 immediate steps to take this week
+       - Prioritized by impact and ease of implementation
+
+    4. HEALTH RISKS & CONCERNS:
+       - Potential health risks based on current lifestyle
+       - Warning signs to watch for
+       - When to consult healthcare professionals
+
+    Format the response with clear headings using **bold** for sections and bullet points for easy reading.
+    Make it detailed, actionable, and personalized to their specific situation.
+""")
+
+COMPACT_PREFIX = normalize_whitespace("""
+    As a health and lifestyle advisor, write a personalized report for the profile below.
+    Use these **bold** headings, 2-4 short, specific bullets each, no preamble:
+    Lifestyle Health Score Analysis (score /100, main positives and negatives); Diet & Nutrition;
+    Hydration; Sleep Optimization; Exercise Plan; Stress Management; Habit Modifications;
+    Personalized Action Plan (3-5 steps this week, by impact); Health Risks & Concerns
+    (risks, warning signs, when to see a professional).
+""")
+
+TEMPLATES = {
+    'full': PromptTemplate('full', 2, FULL_PREFIX, profile_block),
+    'compact': PromptTemplate('compact', 1, COMPACT_PREFIX, compact_profile_line),
+}
+
+
+def get_template(mode=None):
+    mode = mode or settings.PROMPT_MODE
+    if mode not in TEMPLATES:
+        raise ValueError(f"Unknown prompt mode {mode!r}; expected one of {', '.join(TEMPLATES)}")
+    return TEMPLATES[mode]
+
+
+def structured_output():
+    """True when whole reports are requested as JSON (see structured.py)."""
+    return settings.STRUCTURED_OUTPUT and settings.REPORT_MODE == "single"
+
+
+def cache_namespace(model_name=None, mode=None):
+    """Cache namespace for responses of `model_name` to prompts of the given template."""
+    template = get_template(mode)
+    namespace = f"{model_name or settings.GEMINI_MODEL}|{template.mode}-v{template.version}"
+    if model_name is None and settings.GEMINI_FAST_MODEL:
+        # Reports are routed by profile (routing.py), so the routing rule is part of the namespace
+        namespace += f"+{settings.GEMINI_FAST_MODEL}:{settings.FAST_MAX_GOAL_CHARS}"
+    if structured_output():
+        # JSON reports are cached apart from markdown ones
+        namespace += "|json"
+    return namespace
+
+
+def fit_budget(render, user_data, max_tokens=None):
+    """render(user_data), with the health goals shortened if it exceeds max_tokens.
+
+    Goals are the only free text in a profile, so they are what gets cut;
+    raises PromptBudgetExceeded if the prompt is over budget even without them.
+    """
+    max_tokens = settings.PROMPT_MAX_INPUT_TOKENS if max_tokens is None else max_tokens
+    prompt = render(user_data)
+    overflow = estimate_tokens(prompt) - max_tokens
+    if max_tokens <= 0 or overflow <= 0:
+        return prompt
+
+    goals = user_data['health_goals'] or ""
+    keep = max(len(goals) - overflow * CHARS_PER_TOKEN - 1, 0)
+    prompt = render(dict(user_data, health_goals=(goals[:keep].rstrip() + "…") if keep else ""))
+    if estimate_tokens(prompt) > max_tokens:
+        raise PromptBudgetExceeded(f"prompt needs {estimate_tokens(prompt)} tokens, budget is {max_tokens}")
+    return prompt
+
+
+def build_prompt(user_data, mode=None, max_tokens=None):
+    """Build the recommendation prompt for a profile (mode defaults to settings.PROMPT_MODE)."""
+    template = get_template(mode)
+    return fit_budget(lambda profile: f"{template.prefix}\n\n{template.profile(profile)}", user_data, max_tokens)
+
+
+def generation_config():
+    """Model generation settings: the output token budget and, for structured output, the JSON schema."""
+    config = {}
+    if settings.PROMPT_MAX_OUTPUT_TOKENS > 0:
+        config['max_output_tokens'] = settings.PROMPT_MAX_OUTPUT_TOKENS
+    if structured_output():
+        from structured import REPORT_SCHEMA
+        config.update(response_mime_type="application/json", response_schema=REPORT_SCHEMA)
+    return config
@@ -0,0 +1,47 @@
+# report.py
+# Plain-text health report, shared by the download button and batch jobs.
+
+from datetime import datetime
+
+
+def build_report(profile, lifestyle_score, score_breakdown, recommendations, generated_at=None):
+    """Render the downloadable TXT health report for a Profile."""
+    if generated_at is None:
+        generated_at = datetime.now()
+    breakdown_text = "\n".join([f"{category}: {score} points" for category, score in score_breakdown.items()])
+
+    return f"""
+LIFESTYLE & DIET ADVISOR - HEALTH REPORT
+{'='*50}
+
+Generated on: {generated_at.strftime('%Y-%m-%d %H:%M:%S')}
+
+LIFESTYLE SCORE: {lifestyle_score}/100
+
+SCORE BREAKDOWN:
+{breakdown_text}
+
+USER PROFILE:
+{'='*50}
+Age: {profile.age}
+Diet Type: {profile.diet_type.label}
+Meals per Day: {profile.meals_per_day}
+Water Intake: {profile.water_intake} glasses/day
+Sleep Hours: {profile.sleep_hours} hours/night
+Sleep Quality: {profile.sleep_quality.label}
+Exercise Frequency: {profile.exercise_frequency.label}
+Exercise Types: {', '.join(profile.exercise_type) or 'None'}
+Stress Level: {profile.stress_level.label}
+Meditation: {profile.meditation.label}
+Smoking: {profile.smoking.label}
+Alcohol: {profile.alcohol.label}
+Health Goals: {profile.health_goals}
+
+PERSONALIZED RECOMMENDATIONS:
+{'='*50}
+{recommendations}
+
+{'='*50}
+Disclaimer: This report provides general wellness guidance. 
+Always consult healthcare professionals for medical advice.
+"""
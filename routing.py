@@ -0,0 +1,28 @@
+# routing.py
+# Model tiers for whole reports. Profiles with no (or only short) health
+# goals need little personal reasoning, so when GEMINI_FAST_MODEL is set
+# their reports go to that faster, cheaper model; everything else, and all
+# section prompts, use GEMINI_MODEL. Each model gets its own client, so
+# rate limits and hedging latency estimates are kept per tier.
+
+import settings
+
+
+def model_tiers():
+    """Configured models by tier name, standard first."""
+    tiers = {'standard': settings.GEMINI_MODEL}
+    if settings.GEMINI_FAST_MODEL:
+        tiers['fast'] = settings.GEMINI_FAST_MODEL
+    return tiers
+
+
+def model_tier(user_data):
+    goals = (user_data['health_goals'] or "").strip()
+    if settings.GEMINI_FAST_MODEL and len(goals) <= settings.FAST_MAX_GOAL_CHARS:
+        return 'fast'
+    return 'standard'
+
+
+def model_for(user_data):
+    """The model that writes a profile's whole report."""
+    return model_tiers()[model_tier(user_data)]
@@ -0,0 +1,150 @@
+# scoring.py
+# Lifestyle score calculation for a single profile and for columnar batches.
+
+from collections import namedtuple
+
+import numpy as np
+
+import options
+
+# Category -> maximum points, in the order shown in the report
+CATEGORY_MAX_POINTS = {
+    'Water Intake': 40,
+    'Sleep Duration': 35,
+    'Sleep Quality': 10,
+    'Exercise': 15,
+    'Stress Management': 10,
+    'Non-smoking': 10,
+    'Alcohol Moderation': 5,
+    'Meditation': 5,
+}
+SCORE_CATEGORIES = tuple(CATEGORY_MAX_POINTS)
+
+# Result of calculate_score(); unpacks as (score, score_breakdown)
+ScoreResult = namedtuple('ScoreResult', ['score', 'breakdown'])
+
+GOOD_SLEEP_QUALITIES = ("Good", "Excellent")
+ACTIVE_EXERCISE_FREQUENCIES = ("3-4 times/week", "5-6 times/week", "Daily")
+LOW_STRESS_LEVELS = ("Very Low", "Low")
+MODERATE_ALCOHOL_OPTIONS = ("None", "Occasional (1-2/week)")
+
+
+def _points_by_code(vocabulary, rewarded, points):
+    return np.array([points if option in rewarded else 0 for option in vocabulary], dtype=np.int16)
+
+
+# Points per integer code, indexed by the position in the options vocabulary
+SLEEP_QUALITY_POINTS = _points_by_code(options.SLEEP_QUALITIES, GOOD_SLEEP_QUALITIES, 10)
+EXERCISE_POINTS = _points_by_code(options.EXERCISE_FREQUENCIES, ACTIVE_EXERCISE_FREQUENCIES, 15)
+STRESS_POINTS = _points_by_code(options.STRESS_LEVELS, LOW_STRESS_LEVELS, 10)
+SMOKING_POINTS = _points_by_code(options.SMOKING_OPTIONS, ("Non-smoker",), 10)
+ALCOHOL_POINTS = _points_by_code(options.ALCOHOL_OPTIONS, MODERATE_ALCOHOL_OPTIONS, 5)
+MEDITATION_POINTS = _points_by_code(options.MEDITATION_OPTIONS, ("Yes, regularly",), 5)
+
+
+def _range_points(value_range, per_unit, maximum):
+    return {value: min(value * per_unit, maximum) for value in range(value_range[0], value_range[1] + 1)}
+
+
+# Category and points for every form value of the scored fields, in report order;
+# preview_score() is a handful of dict lookups, cheap enough for every widget change
+FIELD_POINTS = {
+    'water_intake': ('Water Intake', _range_points(options.WATER_INTAKE_RANGE, 5, 40)),
+    'sleep_hours': ('Sleep Duration', _range_points(options.SLEEP_HOURS_RANGE, 5, 35)),
+    'sleep_quality': ('Sleep Quality', dict(zip(options.SLEEP_QUALITIES, SLEEP_QUALITY_POINTS.tolist()))),
+    'exercise_frequency': ('Exercise', dict(zip(options.EXERCISE_FREQUENCIES, EXERCISE_POINTS.tolist()))),
+    'stress_level': ('Stress Management', dict(zip(options.STRESS_LEVELS, STRESS_POINTS.tolist()))),
+    'smoking': ('Non-smoking', dict(zip(options.SMOKING_OPTIONS, SMOKING_POINTS.tolist()))),
+    'alcohol': ('Alcohol Moderation', dict(zip(options.ALCOHOL_OPTIONS, ALCOHOL_POINTS.tolist()))),
+    'meditation': ('Meditation', dict(zip(options.MEDITATION_OPTIONS, MEDITATION_POINTS.tolist()))),
+}
+
+
+def calculate_score(profile):
+    """Score one Profile or user_data dict; returns ScoreResult(score, score_breakdown)."""
+    score_breakdown = {}
+
+    # Water intake (max 40 points)
+    score_breakdown['Water Intake'] = min(profile['water_intake'] * 5, 40)
+
+    # Sleep duration (max 35 points)
+    score_breakdown['Sleep Duration'] = min(profile['sleep_hours'] * 5, 35)
+
+    # Sleep quality (10 points)
+    score_breakdown['Sleep Quality'] = 10 if profile['sleep_quality'] in GOOD_SLEEP_QUALITIES else 0
+
+    # Exercise frequency (15 points)
+    score_breakdown['Exercise'] = 15 if profile['exercise_frequency'] in ACTIVE_EXERCISE_FREQUENCIES else 0
+
+    # Stress management (10 points)
+    score_breakdown['Stress Management'] = 10 if profile['stress_level'] in LOW_STRESS_LEVELS else 0
+
+    # Smoking status (10 points)
+    score_breakdown['Non-smoking'] = 10 if profile['smoking'] == "Non-smoker" else 0
+
+    # Alcohol consumption (5 points)
+    score_breakdown['Alcohol Moderation'] = 5 if profile['alcohol'] in MODERATE_ALCOHOL_OPTIONS else 0
+
+    # Meditation bonus (5 points)
+    score_breakdown['Meditation'] = 5 if profile['meditation'] == "Yes, regularly" else 0
+
+    score = min(sum(score_breakdown.values()), 100)
+    return ScoreResult(score, score_breakdown)
+
+
+def preview_score(values):
+    """Score raw form values (widget choices, not validated) from FIELD_POINTS; returns ScoreResult."""
+    score_breakdown = {category: points[values[field]] for field, (category, points) in FIELD_POINTS.items()}
+    return ScoreResult(min(sum(score_breakdown.values()), 100), score_breakdown)
+
+
+def score_delta(previous_breakdown, score_breakdown):
+    """Score change between two breakdowns: (total delta, {category: delta} for changed categories)."""
+    changes = {
+        category: score_breakdown.get(category, 0) - previous_breakdown.get(category, 0)
+        for category in SCORE_CATEGORIES
+        if score_breakdown.get(category, 0) != previous_breakdown.get(category, 0)
+    }
+    total = min(sum(score_breakdown.values()), 100) - min(sum(previous_breakdown.values()), 100)
+    return total, changes
+
+
+def encode_profiles(profiles):
+    """Convert an iterable of profile dicts into score_batch() columns.
+
+    Categorical fields become int8 codes (their index in the options
+    vocabulary); unknown values raise ValueError.
+    """
+    profiles = list(profiles)
+    columns = {}
+    for field in ('water_intake', 'sleep_hours'):
+        columns[field] = np.fromiter((p[field] for p in profiles), dtype=np.int16, count=len(profiles))
+    for field in ('sleep_quality', 'exercise_frequency', 'stress_level', 'smoking', 'alcohol', 'meditation'):
+        codes = {option: code for code, option in enumerate(options.CATEGORICAL_FIELDS[field])}
+        try:
+            columns[field] = np.fromiter((codes[p[field]] for p in profiles), dtype=np.int8, count=len(profiles))
+        except KeyError as e:
+            raise ValueError(f"Unknown {field} value: {e.args[0]!r}") from None
+    return columns
+
+
+def score_batch(columns):
+    """Score many profiles at once.
+
+    `columns` maps field names to equal-length arrays (a dict of arrays or
+    a NumPy structured array): integer counts for water_intake and
+    sleep_hours, integer codes for the categorical fields. Returns
+    (scores, breakdown) where breakdown maps each category to an array.
+    """
+    breakdown = {
+        'Water Intake': np.minimum(np.asarray(columns['water_intake'], dtype=np.int16) * 5, 40),
+        'Sleep Duration': np.minimum(np.asarray(columns['sleep_hours'], dtype=np.int16) * 5, 35),
+        'Sleep Quality': SLEEP_QUALITY_POINTS[np.asarray(columns['sleep_quality'])],
+        'Exercise': EXERCISE_POINTS[np.asarray(columns['exercise_frequency'])],
+        'Stress Management': STRESS_POINTS[np.asarray(columns['stress_level'])],
+        'Non-smoking': SMOKING_POINTS[np.asarray(columns['smoking'])],
+        'Alcohol Moderation': ALCOHOL_POINTS[np.asarray(columns['alcohol'])],
+        'Meditation': MEDITATION_POINTS[np.asarray(columns['meditation'])],
+    }
+    scores = np.minimum(sum(breakdown.values()), 100)
+    return scores, breakdown
@@ -0,0 +1,161 @@
+# sections.py
+# Split the recommendation report into independent sections that can be
+# generated concurrently and assembled afterwards.
+
+import asyncio
+from collections import namedtuple
+
+import options
+from cache import normalize_profile, profile_key
+from prompts import fit_budget, get_template
+
+# key: stable identifier, title: report heading, tab: results tab that shows it
+Section = namedtuple('Section', ['key', 'title', 'tab', 'topics'])
+
+REPORT_SECTIONS = (
+    Section('diet', "Diet & Nutrition", 'nutrition', (
+        "Specific meal suggestions with timing and portions",
+        "Foods to include and avoid",
+        "Nutrient focus areas",
+    )),
+    Section('hydration', "Hydration", 'nutrition', (
+        "Optimal water intake recommendations",
+        "Best timing for hydration",
+    )),
+    Section('sleep', "Sleep Optimization", 'wellness', (
+        "Sleep hygiene tips",
+        "Bedtime routine suggestions",
+        "Environmental factors to improve sleep quality",
+    )),
+    Section('exercise', "Exercise Plan", 'fitness', (
+        "Specific activities suited to their lifestyle",
+        "Duration and frequency recommendations",
+        "Progressive plan to increase activity",
+    )),
+    Section('stress', "Stress Management", 'wellness', (
+        "Practical stress-reduction techniques",
+        "Mindfulness and relaxation practices",
+    )),
+    Section('habits', "Habit Modifications", 'wellness', (
+        "Specific lifestyle changes needed",
+        "Sustainable behavior modifications",
+    )),
+    Section('action_plan', "Personalized Action Plan", 'overview', (
+        "3-5 immediate steps to take this week",
+        "Prioritized by impact and ease of implementation",
+    )),
+    Section('risks', "Health Risks & Concerns", 'overview', (
+        "Potential health risks based on current lifestyle",
+        "Warning signs to watch for",
+        "When to consult healthcare professionals",
+    )),
+)
+
+SECTIONS_BY_KEY = {section.key: section for section in REPORT_SECTIONS}
+
+# Profile fields whose value changes a section's advice; age and goals shape every
+# section, and the action plan and risks weigh the whole profile
+_PERSONAL_FIELDS = ('age', 'health_goals')
+SECTION_FIELDS = {
+    'diet': ('diet_type', 'meals_per_day') + _PERSONAL_FIELDS,
+    'hydration': ('water_intake', 'exercise_frequency') + _PERSONAL_FIELDS,
+    'sleep': ('sleep_hours', 'sleep_quality', 'stress_level') + _PERSONAL_FIELDS,
+    'exercise': ('exercise_frequency', 'exercise_type') + _PERSONAL_FIELDS,
+    'stress': ('stress_level', 'meditation', 'sleep_quality') + _PERSONAL_FIELDS,
+    'habits': ('smoking', 'alcohol') + _PERSONAL_FIELDS,
+    'action_plan': options.PROFILE_FIELDS,
+    'risks': options.PROFILE_FIELDS,
+}
+
+
+def sections_for_tab(tab):
+    return [section for section in REPORT_SECTIONS if section.tab == tab]
+
+
+def build_section_prompt(user_data, section, mode=None):
+    template = get_template(mode)
+    topics = "\n".join(f"- {topic}" for topic in section.topics)
+    if template.mode == 'compact':
+        style = "Be brief and specific."
+    else:
+        style = "Make it detailed, actionable, and personalized to their specific situation."
+    # Static instructions first and the profile last, as in the whole-report templates
+    instructions = (
+        "As a professional health and lifestyle advisor, write the "
+        f"\"{section.title}\" section of a personalized lifestyle report for the user below.\n\n"
+        f"Cover:\n{topics}\n\n"
+        f"Use bullet points and do not repeat the section heading. {style}"
+    )
+    return fit_budget(lambda profile: f"{instructions}\n\n{template.profile(profile)}", user_data)
+
+
+def section_cache_key(user_data, section, namespace=""):
+    return profile_key(user_data, namespace=f"{namespace}|section:{section.key}")
+
+
+def changed_fields(previous, current):
+    """Profile fields whose canonical values differ between two profiles."""
+    previous, current = normalize_profile(previous), normalize_profile(current)
+    return {field for field in options.PROFILE_FIELDS if previous.get(field) != current.get(field)}
+
+
+def affected_sections(changed, sections=REPORT_SECTIONS):
+    return [section for section in sections if changed.intersection(SECTION_FIELDS[section.key])]
+
+
+def carry_over_sections(previous, current, cache, namespace="", sections=REPORT_SECTIONS):
+    """Reuse cached sections of the previous profile that the changed fields don't affect.
+
+    Their text is re-cached under the current profile's keys, so
+    generate_sections() serves them from the cache and only calls the model
+    for the affected sections. Returns the keys of the reused sections.
+    """
+    affected = affected_sections(changed_fields(previous, current), sections)
+    reused = []
+    for section in sections:
+        if section in affected:
+            continue
+        text = cache.get(section_cache_key(previous, section, namespace))
+        if text is not None:
+            cache.set(section_cache_key(current, section, namespace), text)
+            reused.append(section.key)
+    return reused
+
+
+async def generate_sections(client, user_data, sections=REPORT_SECTIONS, cache=None, namespace=""):
+    """Generate report sections concurrently.
+
+    Yields (section, text, error) tuples in completion order, cached
+    sections first. A failed section yields its exception instead of
+    text so the others can still be shown.
+    """
+    pending = []
+    for section in sections:
+        cached = cache.get(section_cache_key(user_data, section, namespace)) if cache is not None else None
+        if cached is not None:
+            yield section, cached, None
+        else:
+            pending.append(section)
+
+    async def generate(section):
+        try:
+            response = await client.generate(build_section_prompt(user_data, section))
+            text = response.text
+        except Exception as e:
+            return section, None, e
+        if cache is not None:
+            cache.set(section_cache_key(user_data, section, namespace), text)
+        return section, text, None
+
+    for completed in asyncio.as_completed([generate(section) for section in pending]):
+        yield await completed
+
+
+def assemble_report(section_texts):
+    """Join section texts (keyed by section key) into one markdown report in report order."""
+    parts = []
+    for section in REPORT_SECTIONS:
+        text = section_texts.get(section.key)
+        if text:
+            parts.append(f"**{section.title}:**\n\n{text.strip()}")
+    return "\n\n".join(parts)
@@ -0,0 +1,122 @@
+# settings.py
+# Runtime configuration for the advisor. Every value can be overridden
+# with an environment variable so deployments don't need code changes.
+
+import os
+
+# Gemini model used for recommendations
+GEMINI_MODEL = os.environ.get("ADVISOR_GEMINI_MODEL", "gemini-2.0-flash-exp")
+
+# Gemini client: quota limits (0 disables a limit), retries and timeouts
+GEMINI_REQUESTS_PER_MINUTE = int(os.environ.get("ADVISOR_GEMINI_RPM", 60))
+GEMINI_TOKENS_PER_MINUTE = int(os.environ.get("ADVISOR_GEMINI_TPM", 1000000))
+GEMINI_EXPECTED_OUTPUT_TOKENS = int(os.environ.get("ADVISOR_GEMINI_EXPECTED_OUTPUT_TOKENS", 1500))
+GEMINI_MAX_RETRIES = int(os.environ.get("ADVISOR_GEMINI_MAX_RETRIES", 4))
+GEMINI_TIMEOUT_SECONDS = float(os.environ.get("ADVISOR_GEMINI_TIMEOUT_SECONDS", 60))
+GEMINI_BACKOFF_BASE_SECONDS = float(os.environ.get("ADVISOR_GEMINI_BACKOFF_BASE_SECONDS", 1.0))
+GEMINI_BACKOFF_MAX_SECONDS = float(os.environ.get("ADVISOR_GEMINI_BACKOFF_MAX_SECONDS", 30.0))
+
+# Hedged requests: a call still running at this percentile of the model's last
+# GEMINI_HEDGE_WINDOW latencies gets a duplicate request and the first response wins.
+# At most GEMINI_HEDGE_MAX_RATIO of calls are hedged (0 = off)
+GEMINI_HEDGE_PERCENTILE = float(os.environ.get("ADVISOR_GEMINI_HEDGE_PERCENTILE", 95))
+GEMINI_HEDGE_MAX_RATIO = float(os.environ.get("ADVISOR_GEMINI_HEDGE_MAX_RATIO", 0.05))
+GEMINI_HEDGE_WINDOW = int(os.environ.get("ADVISOR_GEMINI_HEDGE_WINDOW", 200))
+GEMINI_HEDGE_MIN_SAMPLES = int(os.environ.get("ADVISOR_GEMINI_HEDGE_MIN_SAMPLES", 20))
+
+# Model routing: whole reports for profiles whose health goals are at most
+# FAST_MAX_GOAL_CHARS long go to GEMINI_FAST_MODEL (empty = every profile uses GEMINI_MODEL)
+GEMINI_FAST_MODEL = os.environ.get("ADVISOR_GEMINI_FAST_MODEL", "")
+FAST_MAX_GOAL_CHARS = int(os.environ.get("ADVISOR_FAST_MAX_GOAL_CHARS", 0))
+
+# Prompt template: "full", or "compact" (the same report sections in fewer prompt and response
+# tokens). Token budgets (0 = none): prompts over the input budget have their health goals
+# shortened to fit; the output budget caps the model's response length
+PROMPT_MODE = os.environ.get("ADVISOR_PROMPT_MODE", "full")
+PROMPT_MAX_INPUT_TOKENS = int(os.environ.get("ADVISOR_PROMPT_MAX_INPUT_TOKENS", 2000))
+PROMPT_MAX_OUTPUT_TOKENS = int(os.environ.get("ADVISOR_PROMPT_MAX_OUTPUT_TOKENS", 0))
+
+# Recommendation cache
+CACHE_PATH = os.environ.get("ADVISOR_CACHE_PATH", os.path.join(".cache", "recommendations.sqlite3"))
+CACHE_TTL_SECONDS = int(os.environ.get("ADVISOR_CACHE_TTL_SECONDS", 7 * 24 * 3600))
+CACHE_MEMORY_ENTRIES = int(os.environ.get("ADVISOR_CACHE_MEMORY_ENTRIES", 256))
+CACHE_DISK_ENTRIES = int(os.environ.get("ADVISOR_CACHE_DISK_ENTRIES", 10000))
+
+# Reuse a cached recommendation for an otherwise identical profile whose health goals
+# share their numbers and directions and have at least this trigram cosine similarity
+# (0 = exact matches only). The default reuses none of the different-goal pairs in
+# benchmarks/goal_pairs.py, the closest of which ("Run a half marathon" / "Run a
+# marathon") scores 0.85, while most of its reworded pairs score 1.0.
+GOAL_SIMILARITY_THRESHOLD = float(os.environ.get("ADVISOR_GOAL_SIMILARITY_THRESHOLD", 0.9))
+GOAL_INDEX_ENTRIES = int(os.environ.get("ADVISOR_GOAL_INDEX_ENTRIES", 10000))
+
+# Precomputed recommendations for common profiles, built with lookup_table.py
+# (used when the file exists and was built for GEMINI_MODEL and PROMPT_MODE)
+LOOKUP_TABLE_PATH = os.environ.get("ADVISOR_LOOKUP_TABLE_PATH", os.path.join(".cache", "recommendations.table"))
+
+# Assessment history (scores over time per user), when BACKEND is "local"
+HISTORY_PATH = os.environ.get("ADVISOR_HISTORY_PATH", os.path.join(".cache", "history.sqlite3"))
+
+# Rule-based daily meal plan in the Nutrition tab and at the API's /meal-plan, built from
+# the bundled food-composition table (nutrients per 100 g) without model calls
+MEAL_PLAN = os.environ.get("ADVISOR_MEAL_PLAN", "1") == "1"
+FOODS_PATH = os.environ.get("ADVISOR_FOODS_PATH",
+                            os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "foods.csv"))
+
+# Where the recommendation cache's second tier, the Gemini rate limits and the assessment
+# history live (backends.py): "local": cache in the CACHE_PATH file, history in HISTORY_PATH,
+# rate limits per process; "memory": all in the process; "sqlite": all in the BACKEND_PATH
+# database, shared by every process using it (several app workers behind a load balancer,
+# batch jobs) so they share one history and one API quota
+BACKEND = os.environ.get("ADVISOR_BACKEND", "local")
+BACKEND_PATH = os.environ.get("ADVISOR_BACKEND_PATH", os.path.join(".cache", "shared.sqlite3"))
+# How long a SQLite write waits for another process's write to finish
+SQLITE_BUSY_TIMEOUT_SECONDS = float(os.environ.get("ADVISOR_SQLITE_BUSY_TIMEOUT_SECONDS", 10))
+
+# "single": one prompt for the whole report; "sections": one concurrent call per report section;
+# "incremental": like "sections", but a returning user's follow-up assessment only regenerates
+# the sections affected by the fields that changed since their last assessment
+REPORT_MODE = os.environ.get("ADVISOR_REPORT_MODE", "single")
+
+# Ask Gemini for a JSON report (REPORT_SCHEMA in structured.py) in "single" mode and show its
+# sections in the Nutrition, Fitness and Wellness tabs; replaces streaming for those reports
+STRUCTURED_OUTPUT = os.environ.get("ADVISOR_STRUCTURED_OUTPUT", "0") == "1"
+
+# Micro-batching (microbatch.py): whole reports requested within this many milliseconds of
+# each other are sent as one multi-profile prompt of up to MICROBATCH_MAX_SIZE profiles
+# (0 = off; single report mode without structured output, and never streamed)
+MICROBATCH_WINDOW_MS = int(os.environ.get("ADVISOR_MICROBATCH_WINDOW_MS", 0))
+MICROBATCH_MAX_SIZE = int(os.environ.get("ADVISOR_MICROBATCH_MAX_SIZE", 4))
+
+# Stream model output into the Overview tab instead of waiting for the full response
+STREAM_RECOMMENDATIONS = os.environ.get("ADVISOR_STREAM_RECOMMENDATIONS", "1") == "1"
+
+# Show the lifestyle score and its breakdown below the form, updated as the form is edited
+SCORE_PREVIEW = os.environ.get("ADVISOR_SCORE_PREVIEW", "1") == "1"
+
+# Generate single-mode reports in background worker threads instead of the script run;
+# the results page polls the job (?job=<id>), so it survives reloads and can be cancelled
+BACKGROUND_JOBS = os.environ.get("ADVISOR_BACKGROUND_JOBS", "0") == "1"
+JOB_WORKERS = int(os.environ.get("ADVISOR_JOB_WORKERS", 8))
+JOB_MAX_PENDING = int(os.environ.get("ADVISOR_JOB_MAX_PENDING", 64))
+JOB_RESULT_TTL_SECONDS = int(os.environ.get("ADVISOR_JOB_RESULT_TTL_SECONDS", 900))
+
+# Batch advisor CLI
+BATCH_CONCURRENCY = int(os.environ.get("ADVISOR_BATCH_CONCURRENCY", 4))
+
+# JSON API server (api.py): bind address, worker processes and the largest /batch request
+API_HOST = os.environ.get("ADVISOR_API_HOST", "127.0.0.1")
+API_PORT = int(os.environ.get("ADVISOR_API_PORT", 8000))
+API_WORKERS = int(os.environ.get("ADVISOR_API_WORKERS", 4))
+API_MAX_BATCH_PROFILES = int(os.environ.get("ADVISOR_API_MAX_BATCH_PROFILES", 10000))
+
+# Serve the rule-based fallback report when the model hasn't answered within this
+# many seconds (0 = only when the call fails), and swap in the model output once it arrives
+FALLBACK_BUDGET_SECONDS = float(os.environ.get("ADVISOR_FALLBACK_BUDGET_SECONDS", 8))
+FALLBACK_UPGRADE = os.environ.get("ADVISOR_FALLBACK_UPGRADE", "1") == "1"
+
+# Instrumentation: latency samples kept per series for percentiles, optional
+# Prometheus /metrics port (0 = off), and the ?admin=<token> dashboard token (empty = off)
+METRICS_SAMPLE_SIZE = int(os.environ.get("ADVISOR_METRICS_SAMPLE_SIZE", 2048))
+METRICS_PORT = int(os.environ.get("ADVISOR_METRICS_PORT", 0))
+ADMIN_TOKEN = os.environ.get("ADVISOR_ADMIN_TOKEN", "")
@@ -0,0 +1,29 @@
+# startup.py
+# Timing of one-off, per-process startup work (client creation, asset
+# preparation) so slow cold starts are visible in the server log.
+
+import logging
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger("advisor.startup")
+
+# Step name -> duration in seconds, in the order the steps ran
+STARTUP_TIMINGS = {}
+
+
+@contextmanager
+def timed(step):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        STARTUP_TIMINGS[step] = time.perf_counter() - started
+        logger.info("Startup step %r took %.1f ms", step, STARTUP_TIMINGS[step] * 1000)
+
+
+def startup_report():
+    """Human-readable summary of STARTUP_TIMINGS."""
+    lines = [f"{step}: {seconds * 1000:.1f} ms" for step, seconds in STARTUP_TIMINGS.items()]
+    lines.append(f"total: {sum(STARTUP_TIMINGS.values()) * 1000:.1f} ms")
+    return "\n".join(lines)
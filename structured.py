@@ -0,0 +1,159 @@
+# structured.py
+# Structured recommendation reports: Gemini is asked for a JSON object
+# following REPORT_SCHEMA instead of free-form markdown, and the response is
+# validated and split into the per-section texts shown in the results tabs.
+# Responses are cached as the model's JSON; parsing is memoized per text.
+
+import json
+from functools import lru_cache
+
+from prompts import TEMPLATES, fit_budget, get_template, normalize_whitespace, structured_output
+from sections import REPORT_SECTIONS, assemble_report
+
+# Structured output replaces the single whole-report call; sections modes are unaffected
+ENABLED = structured_output()
+
+# Section keys under "recommendations"; the action plan and risks are top-level lists
+CATEGORY_KEYS = ('diet', 'hydration', 'sleep', 'exercise', 'stress', 'habits')
+SCORE_ANALYSIS_TITLE = "Lifestyle Health Score Analysis"
+
+_STRING_LIST = {'type': 'array', 'items': {'type': 'string'}}
+REPORT_SCHEMA = {
+    'type': 'object',
+    'properties': {
+        'score_analysis': {
+            'type': 'object',
+            'properties': {
+                'estimated_score': {'type': 'integer'},
+                'summary': {'type': 'string'},
+                'positives': _STRING_LIST,
+                'negatives': _STRING_LIST,
+            },
+            'required': ['estimated_score', 'summary', 'positives', 'negatives'],
+        },
+        'recommendations': {
+            'type': 'object',
+            'properties': {key: _STRING_LIST for key in CATEGORY_KEYS},
+            'required': list(CATEGORY_KEYS),
+        },
+        'action_plan': _STRING_LIST,
+        'risks': _STRING_LIST,
+    },
+    'required': ['score_analysis', 'recommendations', 'action_plan', 'risks'],
+}
+
+
+class MalformedReport(ValueError):
+    """Raised when a response isn't a JSON report with any usable section."""
+
+
+def _topics(section):
+    return "; ".join(topic[0].lower() + topic[1:] for topic in section.topics)
+
+
+def _instructions(mode):
+    if mode == 'compact':
+        items = "2-4 short, specific items per list"
+    else:
+        items = "3-6 items per list, each a specific, actionable sentence personalized to the user"
+    fields = "\n".join(
+        f'- {"recommendations." if section.key in CATEGORY_KEYS else ""}{section.key}: {_topics(section)}'
+        for section in REPORT_SECTIONS
+    )
+    return normalize_whitespace(f"""
+        As a professional health and lifestyle advisor, analyze the user profile at the end.
+        Respond only with a JSON object, without markdown fences, with these fields:
+        - score_analysis: estimated_score (0-100), summary (one or two sentences), positives, negatives
+    """) + "\n" + fields + f"\nAll lists contain plain-text strings without bullet characters; {items}."
+
+
+# Static prefix per prompt mode
+_PREFIXES = {mode: _instructions(mode) for mode in TEMPLATES}
+
+
+def build_structured_prompt(user_data, mode=None):
+    """Prompt asking for a REPORT_SCHEMA JSON report about a profile."""
+    template = get_template(mode)
+    prefix = _PREFIXES[template.mode]
+    return fit_budget(lambda profile: f"{prefix}\n\n{template.profile(profile)}", user_data)
+
+
+def looks_like_json(text):
+    return (text or "").lstrip().startswith(("{", "```"))
+
+
+def _items(value):
+    if isinstance(value, str):
+        value = [value]
+    if not isinstance(value, list):
+        return []
+    items = (" ".join(str(item).split()).lstrip("-•* ") for item in value
+             if isinstance(item, (str, int, float)) and not isinstance(item, bool))
+    return [item for item in items if item]
+
+
+def _bullets(items):
+    return "\n".join(f"- {item}" for item in items)
+
+
+def _score_analysis(value):
+    if not isinstance(value, dict):
+        return None
+    parts = []
+    score = value.get('estimated_score')
+    if isinstance(score, (int, float)) and not isinstance(score, bool) and 0 <= score <= 100:
+        parts.append(f"**Estimated score:** {round(score)}/100")
+    summary = " ".join(str(value.get('summary') or "").split())
+    if summary:
+        parts.append(summary)
+    for key, heading in (('positives', "What helps your score"), ('negatives', "What holds it back")):
+        items = _items(value.get(key))
+        if items:
+            parts.append(f"*{heading}:*\n{_bullets(items)}")
+    return "\n\n".join(parts) or None
+
+
+@lru_cache(maxsize=256)
+def _parse(text):
+    text = text.strip()
+    if text.startswith("```"):
+        # Fenced despite the instructions: drop the ``` / ```json lines
+        text = text.split("\n", 1)[-1].rsplit("```", 1)[0]
+    try:
+        data = json.loads(text)
+    except ValueError as e:
+        raise MalformedReport(f"invalid JSON: {e}") from None
+    if not isinstance(data, dict):
+        raise MalformedReport(f"expected a JSON object, got {type(data).__name__}")
+
+    categories = data.get('recommendations')
+    if not isinstance(categories, dict):
+        categories = {}
+    sections = {}
+    analysis = _score_analysis(data.get('score_analysis'))
+    if analysis:
+        sections['score_analysis'] = analysis
+    for section in REPORT_SECTIONS:
+        items = _items(categories.get(section.key) if section.key in CATEGORY_KEYS else data.get(section.key))
+        if items:
+            sections[section.key] = _bullets(items)
+    if not sections.keys() - {'score_analysis'}:
+        raise MalformedReport("no recommendation sections in the response")
+    return tuple(sections.items())
+
+
+def parse_report(text):
+    """Markdown text per section key (plus 'score_analysis') of a JSON report.
+
+    Unknown fields are ignored and sections that are missing or empty are
+    left out; raises MalformedReport if nothing usable remains.
+    """
+    return dict(_parse(text or ""))
+
+
+def report_markdown(sections):
+    """The full report as markdown: score analysis first, then the sections in report order."""
+    report = assemble_report(sections)
+    if sections.get('score_analysis'):
+        report = f"**{SCORE_ANALYSIS_TITLE}:**\n\n{sections['score_analysis']}\n\n{report}"
+    return report
@@ -0,0 +1,16 @@
+from benchmarks.synthetic_profiles import synthetic_profiles
+from fallback import fallback_sections
+from scoring import calculate_score
+
+
+def diet_tips(health_goals):
+    user_data = dict(synthetic_profiles(1)[0], health_goals=health_goals)
+    _, score_breakdown = calculate_score(user_data)
+    return fallback_sections(user_data, score_breakdown)['diet']
+
+
+def test_weight_loss_tip_only_for_weight_loss_goals():
+    assert "For weight loss" in diet_tips("lose weight")
+    assert "For weight loss" not in diet_tips("gain weight")
+    assert "For weight or muscle gain" in diet_tips("gain weight")
+    assert "For weight" not in diet_tips("healthy weight")
@@ -0,0 +1,71 @@
+import asyncio
+import time
+
+from benchmarks.fake_gemini import FakeGenerativeModel
+from gemini_client import AsyncGeminiClient
+
+
+def make_client(latency, **kwargs):
+    model = FakeGenerativeModel(latency=latency, first_chunk_fraction=0.5)
+    return AsyncGeminiClient(model, requests_per_minute=0, tokens_per_minute=0, **kwargs), model
+
+
+def other_tasks():
+    return [task for task in asyncio.all_tasks() if task is not asyncio.current_task() and not task.done()]
+
+
+def test_slow_stream_start_is_hedged():
+    async def main():
+        client, model = make_client("fixed:0.2", hedge_max_ratio=1)
+        for _ in range(20):
+            client.first_chunk_latency.observe(0.01)
+        chunks = [chunk async for chunk in client.stream("prompt")]
+        await asyncio.sleep(0.01)
+        return chunks, client.stats['hedges'], model.calls, other_tasks()
+
+    chunks, hedges, calls, leftover = asyncio.run(main())
+    assert chunks and hedges == 1 and calls == 2
+    assert leftover == []
+
+
+def test_cancelling_a_hedged_call_before_the_hedge_cancels_the_request():
+    async def main():
+        client, _ = make_client("fixed:5", hedge_max_ratio=1)
+        for _ in range(20):
+            client.first_chunk_latency.observe(1.0)
+        call = asyncio.ensure_future(client.stream("prompt").__anext__())
+        await asyncio.sleep(0.05)
+        call.cancel()
+        await asyncio.gather(call, return_exceptions=True)
+        await asyncio.sleep(0.01)
+        return other_tasks()
+
+    assert asyncio.run(main()) == []
+
+
+def test_cancelling_the_only_caller_cancels_the_request():
+    client, _ = make_client("fixed:5")
+    future = client.submit(client.generate("prompt"))
+    time.sleep(0.05)
+    future.cancel()
+    time.sleep(0.05)
+
+    async def running():
+        return other_tasks()
+
+    assert client.run_sync(running()) == []
+    client.close()
+
+
+def test_request_shared_by_callers_survives_one_cancelling():
+    async def main():
+        client, model = make_client("fixed:0.1")
+        first = asyncio.ensure_future(client.generate("prompt"))
+        second = asyncio.ensure_future(client.generate("prompt"))
+        await asyncio.sleep(0.02)
+        first.cancel()
+        response = await second
+        return response, model.calls
+
+    response, calls = asyncio.run(main())
+    assert response.text and calls == 1
@@ -0,0 +1,28 @@
+from benchmarks.synthetic_profiles import synthetic_profiles
+from goal_index import GoalIndex
+
+PROFILE = synthetic_profiles(1)[0]
+
+
+def reuses(stored, asked):
+    index = GoalIndex(threshold=0.9, max_entries=100)
+    index.add(dict(PROFILE, health_goals=stored), "stored-key")
+    return index.find(dict(PROFILE, health_goals=asked)) == "stored-key"
+
+
+def test_reworded_goals_reuse():
+    assert reuses("lose weight", "Weight loss")
+    assert reuses("Weight loss", "I want to lose some weight")
+    assert reuses("Muscle gain", "Build muscle")
+
+
+def test_opposite_directions_and_other_numbers_do_not_reuse():
+    assert not reuses("lose weight", "gain weight")
+    assert not reuses("lose 5 kg", "lose 50 kg")
+    assert not reuses("Run a half marathon", "Run a marathon")
+
+
+def test_other_profile_fields_must_match():
+    index = GoalIndex(threshold=0.9, max_entries=100)
+    index.add(dict(PROFILE, health_goals="lose weight"), "stored-key")
+    assert index.find(dict(PROFILE, health_goals="Weight loss", age=PROFILE['age'] + 1)) is None
@@ -0,0 +1,19 @@
+from backends import MemoryBackend, SQLiteBackend
+from history import AssessmentStore
+
+BREAKDOWN = {'Exercise': 10}
+
+
+def test_sqlite_backend_shares_history_between_stores(tmp_path):
+    path = str(tmp_path / "shared.sqlite3")
+    writer = AssessmentStore(backend=SQLiteBackend(path))
+    writer.save("user", {'age': 30}, 70, BREAKDOWN)
+    reader = AssessmentStore(backend=SQLiteBackend(path))
+    assert [row['lifestyle_score'] for row in reader.score_history("user")] == [70]
+
+
+def test_memory_backend_keeps_history_in_the_process(tmp_path):
+    store = AssessmentStore(path=str(tmp_path / "unused.sqlite3"), backend=MemoryBackend())
+    store.save("user", {'age': 30}, 70, BREAKDOWN)
+    assert store.latest("user") == ({'age': 30}, BREAKDOWN)
+    assert not (tmp_path / "unused.sqlite3").exists()
@@ -0,0 +1,19 @@
+from meal_plan import goal_kind, macro_targets
+
+PROFILE = {'age': 30, 'exercise_frequency': "Sedentary", 'diet_type': "Omnivore", 'meals_per_day': 3}
+
+
+def test_goal_kind_reads_the_direction_word():
+    assert goal_kind("Weight loss") == "loss"
+    assert goal_kind("lose belly fat") == "loss"
+    assert goal_kind("lose fat and build muscle") == "loss"
+    assert goal_kind("gain weight") == "gain"
+    assert goal_kind("Muscle gain") == "gain"
+    assert goal_kind("healthy weight") is None
+    assert goal_kind("") is None
+
+
+def test_gain_weight_goal_gets_a_surplus():
+    baseline = macro_targets(dict(PROFILE, health_goals=""))['kcal']
+    assert macro_targets(dict(PROFILE, health_goals="gain weight"))['kcal'] > baseline
+    assert macro_targets(dict(PROFILE, health_goals="lose weight"))['kcal'] < baseline
@@ -0,0 +1,24 @@
+import pytest
+
+from benchmarks.synthetic_profiles import synthetic_profiles
+from microbatch import build_batch_prompt
+from profiles import parse_profile
+from prompts import PromptBudgetExceeded, estimate_tokens
+
+BUDGET = 2000
+
+
+def long_goal_profiles(count):
+    return [parse_profile(dict(profile, health_goals="Run a marathon and sleep better. " * 100))
+            for profile in synthetic_profiles(count)]
+
+
+def test_batch_prompt_with_long_goals_stays_within_the_input_budget():
+    prompt = build_batch_prompt(long_goal_profiles(4), max_tokens=BUDGET)
+    assert estimate_tokens(prompt) <= BUDGET
+    assert all(f"PROFILE {number}:" in prompt for number in range(1, 5))
+
+
+def test_batch_that_cannot_fit_the_budget_raises():
+    with pytest.raises(PromptBudgetExceeded):
+        build_batch_prompt(long_goal_profiles(4), max_tokens=700)
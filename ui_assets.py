@@ -0,0 +1,330 @@
+# ui_assets.py
+# Static markup for the Streamlit page. Built once per process at import
+# time; app.py only re-emits the prepared strings on each rerun.
+
+import re
+
+from startup import timed
+
+
+def minify_css(css):
+    """Strip comments and collapse whitespace in a <style> block."""
+    css = re.sub(r"/\*.*?\*/", "", css, flags=re.DOTALL)
+    css = re.sub(r"\s+", " ", css)
+    css = re.sub(r"\s*([{}:;,>])\s*", r"\1", css)
+    return css.strip()
+
+
+# Custom CSS for clean, simple UI
+_CUSTOM_CSS_SOURCE = """
+<style>
+    /* Clean white background */
+    .stApp {
+        background-color: #ffffff;
+    }
+    
+    .main {
+        background-color: #ffffff;
+        max-width: 1200px;
+        margin: 0 auto;
+    }
+    
+    /* Simple header */
+    .main-header {
+        font-size: 2.5rem;
+        font-weight: 700;
+        color: #000000 !important;
+        text-align: center;
+        margin-bottom: 0.5rem;
+    }
+    
+    .sub-header {
+        text-align: center;
+        color: #000000 !important;
+        font-size: 1.1rem;
+        margin-bottom: 2rem;
+    }
+    
+    /* Clean section headers */
+    .section-header {
+        font-size: 1.3rem;
+        font-weight: 600;
+        color: #000000 !important;
+        margin: 2rem 0 1rem 0;
+        padding-bottom: 0.5rem;
+        border-bottom: 2px solid #e2e8f0;
+    }
+    
+    /* Simple inputs */
+    .stSelectbox label, .stMultiSelect label, .stSlider label, .stRadio label, 
+    .stNumberInput label, .stTextArea label {
+        font-size: 0.95rem;
+        font-weight: 600;
+        color: #000000 !important;
+    }
+    
+    /* All text elements */
+    p, span, div, label, h1, h2, h3, h4, h5, h6 {
+        color: #000000 !important;
+    }
+    
+    /* Streamlit specific text */
+    .stMarkdown, .stMarkdown p, .stMarkdown span, .stMarkdown div {
+        color: #000000 !important;
+    }
+    
+    /* Metric labels and values */
+    [data-testid="stMetricLabel"], [data-testid="stMetricValue"] {
+        color: #000000 !important;
+    }
+    
+    div[data-baseweb="select"] > div,
+    div[data-baseweb="input"] > div,
+    .stTextArea textarea,
+    .stNumberInput input {
+        border-radius: 8px;
+        border: 1px solid #cbd5e0;
+        background: white;
+        color: #000000 !important;
+    }
+    
+    div[data-baseweb="select"] > div:hover,
+    div[data-baseweb="input"] > div:hover,
+    .stTextArea textarea:hover,
+    .stNumberInput input:hover {
+        border-color: #4299e1;
+    }
+    
+    /* Simple button */
+    .stButton>button {
+        width: 100% !important;
+        background-color: #48bb78 !important;
+        color: white !important;
+        font-weight: 700 !important;
+        padding: 0.75rem 2rem !important;
+        border-radius: 8px !important;
+        border: none !important;
+        font-size: 1.1rem !important;
+        margin-top: 2rem !important;
+    }
+    
+    .stButton>button:hover {
+        background-color: #38a169 !important;
+    }
+    
+    .stButton>button:active {
+        background-color: #2f855a !important;
+    }
+    
+    /* All button types */
+    button[kind="primary"], button[kind="secondary"] {
+        background-color: #48bb78 !important;
+        color: white !important;
+        font-weight: 700 !important;
+        font-size: 1.1rem !important;
+        border: none !important;
+    }
+    
+    button[kind="primary"]:hover, button[kind="secondary"]:hover {
+        background-color: #38a169 !important;
+    }
+    
+    button[kind="primary"]:active, button[kind="secondary"]:active {
+        background-color: #2f855a !important;
+    }
+    
+    /* Score card */
+    .score-card {
+        padding: 2rem;
+        border-radius: 12px;
+        background: white;
+        text-align: center;
+        box-shadow: 0 1px 3px rgba(0,0,0,0.1);
+        border: 1px solid #e2e8f0;
+    }
+    
+    .score-card h3, .score-card h2 {
+        color: #000000 !important;
+    }
+    
+    .health-score {
+        font-size: 4rem;
+        font-weight: 700;
+        margin: 1rem 0;
+    }
+    
+    /* Metric cards */
+    .metric-card {
+        padding: 1.5rem;
+        border-radius: 8px;
+        background: white;
+        box-shadow: 0 1px 3px rgba(0,0,0,0.1);
+        margin: 1rem 0;
+        border: 1px solid #e2e8f0;
+    }
+    
+    /* Recommendation box */
+    .recommendation-box {
+        padding: 2rem;
+        border-radius: 8px;
+        background: white;
+        margin: 1rem 0;
+        border: 1px solid #e2e8f0;
+        box-shadow: 0 1px 3px rgba(0,0,0,0.1);
+        color: #000000 !important;
+        line-height: 1.8;
+    }
+    
+    .recommendation-box * {
+        color: #000000 !important;
+    }
+    
+    /* Tabs */
+    .stTabs [data-baseweb="tab-list"] {
+        gap: 0.5rem;
+    }
+    
+    .stTabs [data-baseweb="tab"] {
+        border-radius: 8px;
+        padding: 0.75rem 1.5rem;
+        background: white;
+        border: 1px solid #e2e8f0;
+        color: #000000 !important;
+    }
+    
+    .stTabs [data-baseweb="tab"]:hover {
+        background: #f7fafc;
+    }
+    
+    .stTabs [data-baseweb="tab"][aria-selected="true"] {
+        background: #4299e1;
+        color: white !important;
+        border-color: #4299e1;
+    }
+    
+    /* Progress bar */
+    .stProgress > div > div > div {
+        background-color: #4299e1;
+    }
+    
+    /* Divider */
+    .input-divider {
+        height: 1px;
+        background: #e2e8f0;
+        margin: 1.5rem 0;
+    }
+    
+    /* Info boxes */
+    .stAlert {
+        border-radius: 8px;
+        border: 1px solid #e2e8f0;
+    }
+    
+    .stAlert * {
+        color: #000000 !important;
+    }
+    
+    /* Slider */
+    .stSlider > div > div > div > div {
+        background: #4299e1 !important;
+    }
+    
+    /* Multiselect tags */
+    .stMultiSelect [data-baseweb="tag"] {
+        background-color: #4299e1;
+        color: white !important;
+    }
+    
+    /* Form container (app.lifestyle_form) */
+    .st-key-lifestyle_form {
+        background: white;
+        padding: 2rem;
+        border-radius: 12px;
+        box-shadow: 0 1px 3px rgba(0,0,0,0.1);
+        border: 1px solid #e2e8f0;
+    }
+    
+    /* Welcome card */
+    .welcome-card {
+        background: white;
+        padding: 2rem;
+        border-radius: 12px;
+        box-shadow: 0 1px 3px rgba(0,0,0,0.1);
+        border: 1px solid #e2e8f0;
+        margin: 2rem 0;
+    }
+    
+    .welcome-card * {
+        color: #000000 !important;
+    }
+    
+    /* Download button specific */
+    .stDownloadButton > button {
+        background-color: #48bb78 !important;
+        color: white !important;
+        font-weight: 700 !important;
+        font-size: 1.1rem !important;
+        padding: 0.75rem 2rem !important;
+        border-radius: 8px !important;
+        width: 100% !important;
+        border: none !important;
+    }
+    
+    .stDownloadButton > button:hover {
+        background-color: #38a169 !important;
+    }
+    
+    .stDownloadButton > button:active {
+        background-color: #2f855a !important;
+    }
+    
+    /* Ensure button text is always visible */
+    button p, button span, button div, button * {
+        color: white !important;
+        font-weight: 700 !important;
+        background: transparent !important;
+    }
+    
+    /* Force all buttons to be green */
+    button {
+        background-color: #48bb78 !important;
+        color: white !important;
+    }
+    
+    button:hover {
+        background-color: #38a169 !important;
+    }
+    
+    button:active {
+        background-color: #2f855a !important;
+    }
+</style>
+"""
+
+WELCOME_CARD_HTML = """
+    <div class="welcome-card">
+        <h3 style="color: #000000;">👋 Welcome!</h3>
+        <p style="color: #000000; margin: 1rem 0;">
+            Fill out the form above to receive personalized health and lifestyle recommendations powered by AI.
+        </p>
+        <p style="color: #000000;">
+            Our system analyzes your lifestyle habits and provides tailored advice for:
+        </p>
+        <ul style="color: #000000; text-align: left; margin: 1rem 0;">
+            <li>Diet and nutrition planning</li>
+            <li>Exercise recommendations</li>
+            <li>Sleep optimization tips</li>
+            <li>Stress management techniques</li>
+        </ul>
+    </div>
+    """
+
+FOOTER_HTML = """
+<div style='text-align: center; color: #000000; padding: 1rem 0;'>
+    <p><strong>Lifestyle & Diet Advisor</strong> | Powered by Google Gemini AI</p>
+    <p style='font-size: 0.9rem;'>⚠️ This tool provides general wellness guidance. Consult healthcare professionals for medical advice.</p>
+</div>
+"""
+
+with timed("ui_assets"):
+    CUSTOM_CSS = minify_css(_CUSTOM_CSS_SOURCE)